@@ -246,7 +246,7 @@ def download_sumario_temp(date_obj: datetime, scraper: BOCMScraper):
         temp_file.close()
         
         logging.info(f"Descargando sumario temporalmente: {sumario_url}")
-        response = requests.get(sumario_url, stream=True, timeout=30)
+        response = scraper.session.get(sumario_url, stream=True, timeout=30)
         response.raise_for_status()
         
         with open(temp_path, 'wb') as f:
@@ -1,7 +1,6 @@
 import os
 import sys
 import tempfile
-import requests
 from datetime import datetime
 
 # Añadir el directorio actual al path para importar los módulos
@@ -36,7 +35,8 @@ def test_fecha_20230228():
             temp_path = temp_file.name
         
         print(f"📥 Descargando sumario desde: {url_sumario}")
-        response = requests.get(url_sumario, timeout=30)
+        # Con la sesión del scraper (pool de conexiones), no con una conexión suelta
+        response = BOCMScraper().session.get(url_sumario, timeout=30)
         
         if response.status_code == 200:
             with open(temp_path, 'wb') as f:
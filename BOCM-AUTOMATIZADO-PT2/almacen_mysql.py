@@ -0,0 +1,125 @@
+try:
+    import mysql.connector
+except ImportError:
+    print("mysql-connector-python no instalado. Instala con: pip install mysql-connector-python")
+    mysql = None
+# Verificación de MySQL
+if not mysql:
+    class MockMySQL:
+        class connector:
+            @staticmethod
+            def connect(*args, **kwargs):
+                raise ImportError("mysql-connector-python no disponible. Ejecuta: pip install mysql-connector-python")
+
+            class Error(Exception):
+                pass
+
+    mysql = MockMySQL()
+
+try:
+    from mysql.connector.errors import IntegrityError, DataError
+    _ERRORES_DE_DATOS_MYSQL = (IntegrityError, DataError)
+except ImportError:
+    _ERRORES_DE_DATOS_MYSQL = ()
+
+from config import DB_CONFIG
+from almacenamiento import AlmacenConvenios
+
+
+class AlmacenMySQL(AlmacenConvenios):
+    """Almacén sobre el servidor MySQL/MariaDB de DB_CONFIG (esquema de basededatos.txt)"""
+
+    nombre = 'mysql'
+    MARCADOR = '%s'
+    ERRORES_DE_DATOS = AlmacenConvenios.ERRORES_DE_DATOS + _ERRORES_DE_DATOS_MYSQL
+
+    # Las asignaciones se evalúan en orden: codigos_historicos debe leer el
+    # codigo_principal antiguo antes de sobrescribirlo
+    QUERY_UPSERT_CONVENIO = """
+        INSERT INTO convenios(nombre_convenio, id_procedencia, codigo_principal, codigos_historicos, id_version_actual)
+        VALUES (%s, %s, %s, %s, %s)
+        ON DUPLICATE KEY UPDATE
+            codigos_historicos = IF(codigo_principal <> VALUES(codigo_principal),
+                                    JSON_ARRAY_APPEND(codigos_historicos, '$', codigo_principal),
+                                    codigos_historicos),
+            id_procedencia = VALUES(id_procedencia),
+            codigo_principal = VALUES(codigo_principal),
+            id_convenio = LAST_INSERT_ID(id_convenio)
+    """
+
+    QUERY_INSERTAR_VERSION = """
+        INSERT INTO convenios_versiones (
+            id_convenio, version_num, codigo_publicado, fecha_publicacion, fecha_inicio_vigencia, fecha_fin_vigencia, etapa_vigencia, resumen, fuente_pdf
+        )
+        VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s)
+    """
+
+    QUERY_EXISTE_NOMBRE = """
+        SELECT 1 FROM convenios
+        WHERE nombre_convenio = %s
+        LIMIT 1
+    """
+
+    # Un OR entre dos columnas suele acabar en recorrido completo de la tabla;
+    # como UNION cada rama usa su índice (uq_convenios_nombre e idx_convenios_codigo)
+    # y el nombre tiene preferencia sobre el código
+    QUERY_BUSCAR_POR_NOMBRE_O_CODIGO = """
+        (SELECT id_convenio, nombre_convenio, codigo_principal FROM convenios WHERE nombre_convenio = %s LIMIT 1)
+        UNION ALL
+        (SELECT id_convenio, nombre_convenio, codigo_principal FROM convenios WHERE codigo_principal = %s LIMIT 1)
+        LIMIT 1
+    """
+
+    QUERY_IDS_CONVENIOS = """
+        SELECT nombre_convenio, id_convenio FROM convenios
+        WHERE nombre_convenio IN ({marcadores})
+    """
+
+    QUERY_IDS_VERSIONES = """
+        SELECT id_convenio, version_num, MAX(id_version) FROM convenios_versiones
+        WHERE id_convenio IN ({marcadores})
+        GROUP BY id_convenio, version_num
+    """
+
+    QUERY_ACTUALIZAR_CONVENIO = """
+        UPDATE convenios
+        SET id_procedencia = %s, codigo_principal = %s
+        WHERE id_convenio = %s
+    """
+
+    QUERY_CODIGO_HISTORICO = """
+        UPDATE convenios
+        SET codigos_historicos = JSON_ARRAY_APPEND(codigos_historicos, '$', %s)
+        WHERE nombre_convenio = %s
+    """
+
+    QUERY_ACTUALIZAR_VERSION_ACTUAL = "UPDATE convenios SET id_version_actual = %s WHERE id_convenio = %s"
+
+    QUERY_NOMBRE_POR_ID = "SELECT nombre_convenio FROM convenios WHERE id_convenio = %s"
+
+    QUERY_INSERTAR_TABLA_SALARIAL = """
+        INSERT INTO tablas_salariales (
+            id_version, ejercicio, categoria_profesional, concepto_retributivo, importe, fecha_entrada_vigor, fecha_fin_vigor
+        )
+        VALUES (%s, %s, %s, %s, %s, %s, %s)
+    """
+
+    QUERY_INSERTAR_HISTORIAL = """
+        INSERT INTO historial_convenios (id_version_nueva, id_version_antigua, tipo_cambio, descripcion_cambio, diff_json)
+        VALUES (%s, %s, %s, %s, %s)
+    """
+
+    def __init__(self, config=None, **kwargs):
+        self.config = config or DB_CONFIG
+        super().__init__(**kwargs)
+
+    def _abrir_conexion(self):
+        return mysql.connector.connect(**self.config)
+
+    def _conexion_viva(self, conn):
+        return conn.is_connected()
+
+    def _resultado_upsert(self, cursor, nombre_convenio):
+        # rowcount es 1 si se insertó la fila y 2 (o 0 sin cambios) si ya existía;
+        # lastrowid es el id_convenio también al actualizar gracias a LAST_INSERT_ID
+        return cursor.lastrowid, cursor.rowcount == 1
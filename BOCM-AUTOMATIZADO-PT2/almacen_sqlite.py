@@ -0,0 +1,254 @@
+import sqlite3
+
+from config import SQLITE_RUTA, ID_PROCEDENCIA
+from almacenamiento import AlmacenConvenios
+
+# Traducción de base_de_datos/basededatos.txt a SQLite:
+#   AUTO_INCREMENT -> INTEGER PRIMARY KEY, ENUM -> CHECK, JSON -> TEXT con json_valid,
+#   DATE/TIMESTAMP -> TEXT ISO 8601, DECIMAL -> NUMERIC.
+# ON UPDATE CURRENT_TIMESTAMP no existe en SQLite: updated_at solo toma el valor inicial.
+ESQUEMA = """
+CREATE TABLE IF NOT EXISTS procedencia (
+  id_procedencia INTEGER PRIMARY KEY,
+  tipo TEXT NOT NULL CHECK (tipo IN ('Nacional','Autonómico','Provincial')),
+  codigo_boletin TEXT NOT NULL,
+  nombre_boletin TEXT NOT NULL,
+  ambito_geografico TEXT NOT NULL,
+  url_boletin TEXT NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS convenios (
+  id_convenio INTEGER PRIMARY KEY,
+  nombre_convenio TEXT NOT NULL,
+  id_procedencia INTEGER NULL REFERENCES procedencia(id_procedencia) ON DELETE SET NULL,
+  codigo_principal TEXT NOT NULL,
+  codigos_historicos TEXT NOT NULL DEFAULT '[]' CHECK (json_valid(codigos_historicos)),
+  id_version_actual INTEGER NULL REFERENCES convenios_versiones(id_version) ON DELETE SET NULL,
+  CONSTRAINT uq_convenios_nombre UNIQUE (nombre_convenio)
+);
+CREATE INDEX IF NOT EXISTS idx_convenios_codigo ON convenios(codigo_principal);
+CREATE INDEX IF NOT EXISTS idx_convenios_procedencia ON convenios(id_procedencia);
+CREATE INDEX IF NOT EXISTS idx_convenios_version_actual ON convenios(id_version_actual);
+
+CREATE TABLE IF NOT EXISTS convenios_versiones (
+  id_version INTEGER PRIMARY KEY,
+  id_convenio INTEGER NOT NULL REFERENCES convenios(id_convenio) ON DELETE CASCADE,
+  version_num INTEGER NOT NULL,
+  codigo_publicado TEXT NOT NULL,
+  fecha_publicacion TEXT NOT NULL,
+  fecha_inicio_vigencia TEXT NOT NULL,
+  fecha_fin_vigencia TEXT NULL,
+  etapa_vigencia TEXT NOT NULL CHECK (etapa_vigencia IN ('Vigente','Denunciado','En negociación','Expirado')),
+  resumen TEXT,
+  fuente_pdf TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_versiones_convenio_num ON convenios_versiones(id_convenio, version_num);
+
+CREATE TABLE IF NOT EXISTS tablas_salariales (
+  id_tabla INTEGER PRIMARY KEY,
+  id_version INTEGER NOT NULL REFERENCES convenios_versiones(id_version) ON DELETE CASCADE,
+  ejercicio INTEGER NOT NULL,
+  categoria_profesional TEXT NOT NULL,
+  concepto_retributivo TEXT NOT NULL,
+  importe NUMERIC NOT NULL,
+  fecha_entrada_vigor TEXT NULL,
+  fecha_fin_vigor TEXT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_tablas_version_categoria ON tablas_salariales(id_version, categoria_profesional, concepto_retributivo, ejercicio);
+
+CREATE TABLE IF NOT EXISTS historial_tablas_salariales (
+  id_historial INTEGER PRIMARY KEY,
+  id_version_nueva INTEGER NOT NULL REFERENCES convenios_versiones(id_version) ON DELETE CASCADE,
+  id_version_antigua INTEGER NOT NULL REFERENCES convenios_versiones(id_version) ON DELETE CASCADE,
+  categoria_profesional TEXT NOT NULL,
+  concepto_retributivo TEXT NOT NULL,
+  importe_antiguo NUMERIC NOT NULL,
+  importe_nuevo NUMERIC NOT NULL,
+  diferencia NUMERIC GENERATED ALWAYS AS (importe_nuevo - importe_antiguo) STORED,
+  fecha_registro TEXT DEFAULT CURRENT_TIMESTAMP
+);
+CREATE INDEX IF NOT EXISTS idx_historial_tablas_nueva ON historial_tablas_salariales(id_version_nueva);
+CREATE INDEX IF NOT EXISTS idx_historial_tablas_antigua ON historial_tablas_salariales(id_version_antigua);
+
+CREATE TABLE IF NOT EXISTS historial_convenios (
+  id_historial_conv INTEGER PRIMARY KEY,
+  id_version_nueva INTEGER NOT NULL REFERENCES convenios_versiones(id_version) ON DELETE CASCADE,
+  id_version_antigua INTEGER NOT NULL REFERENCES convenios_versiones(id_version) ON DELETE CASCADE,
+  tipo_cambio TEXT NOT NULL CHECK (tipo_cambio IN ('Texto','Ámbito','Vigencia','Otro')),
+  descripcion_cambio TEXT,
+  diff_json TEXT CHECK (diff_json IS NULL OR json_valid(diff_json)),
+  fecha_registro TEXT DEFAULT CURRENT_TIMESTAMP
+);
+CREATE INDEX IF NOT EXISTS idx_historial_conv_nueva ON historial_convenios(id_version_nueva);
+CREATE INDEX IF NOT EXISTS idx_historial_conv_antigua ON historial_convenios(id_version_antigua);
+
+CREATE TABLE IF NOT EXISTS users (
+  id INTEGER PRIMARY KEY,
+  username TEXT NOT NULL,
+  email TEXT NOT NULL UNIQUE,
+  password_hash TEXT NOT NULL,
+  is_admin INTEGER DEFAULT 0,
+  created_at TEXT DEFAULT CURRENT_TIMESTAMP,
+  updated_at TEXT DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE TABLE IF NOT EXISTS chats (
+  id INTEGER PRIMARY KEY,
+  id_user INTEGER NOT NULL REFERENCES users(id) ON DELETE CASCADE,
+  name_chat TEXT NOT NULL,
+  created_at TEXT DEFAULT CURRENT_TIMESTAMP
+);
+CREATE INDEX IF NOT EXISTS idx_chats_user ON chats(id_user);
+
+CREATE TABLE IF NOT EXISTS messages (
+  id INTEGER PRIMARY KEY,
+  id_chat INTEGER NOT NULL REFERENCES chats(id) ON DELETE CASCADE,
+  question TEXT NOT NULL,
+  answer TEXT NOT NULL,
+  created_at TEXT DEFAULT CURRENT_TIMESTAMP
+);
+CREATE INDEX IF NOT EXISTS idx_messages_chat ON messages(id_chat);
+
+CREATE TABLE IF NOT EXISTS documents (
+  id INTEGER PRIMARY KEY,
+  title TEXT NOT NULL,
+  chromadb_id TEXT NOT NULL,
+  uploaded_by INTEGER NULL REFERENCES users(id) ON DELETE SET NULL,
+  created_at TEXT DEFAULT CURRENT_TIMESTAMP,
+  updated_at TEXT DEFAULT CURRENT_TIMESTAMP
+);
+CREATE INDEX IF NOT EXISTS idx_documents_user ON documents(uploaded_by);
+
+CREATE TABLE IF NOT EXISTS documentos_usuario (
+  id INTEGER PRIMARY KEY,
+  id_document INTEGER NOT NULL REFERENCES documents(id) ON DELETE CASCADE,
+  id_user INTEGER NOT NULL REFERENCES users(id) ON DELETE CASCADE,
+  linked_time TEXT DEFAULT CURRENT_TIMESTAMP
+);
+CREATE INDEX IF NOT EXISTS idx_doc_user_document ON documentos_usuario(id_document);
+CREATE INDEX IF NOT EXISTS idx_doc_user_user ON documentos_usuario(id_user);
+"""
+
+# Procedencia del BOCM (la misma fila que carga sqldatosparaprobar.txt en MySQL),
+# para que la base recién creada acepte los convenios que inserta main.py
+QUERY_PROCEDENCIA_BOCM = """
+    INSERT OR IGNORE INTO procedencia (id_procedencia, tipo, codigo_boletin, nombre_boletin, ambito_geografico, url_boletin)
+    VALUES (?, 'Provincial', 'BOPM-2022', 'Boletín Oficial de la Provincia de Madrid', 'Madrid', 'https://www.bocm.es')
+"""
+
+
+class AlmacenSQLite(AlmacenConvenios):
+    """
+    Almacén embebido en un fichero SQLite en modo WAL: sin servidor ni red,
+    pensado para instalaciones de un solo nodo y para los tests.
+
+    El esquema se crea al abrir el almacén si no existe. Cada conexión del
+    pool es independiente, así que la ruta debe ser un fichero (':memory:'
+    daría una base distinta por conexión).
+    """
+
+    nombre = 'sqlite'
+    MARCADOR = '?'
+    ERRORES_DE_DATOS = AlmacenConvenios.ERRORES_DE_DATOS + (sqlite3.IntegrityError, sqlite3.DataError)
+
+    # En DO UPDATE las columnas sin prefijo son los valores antiguos de la fila
+    # y 'excluded' los que se intentaban insertar
+    QUERY_UPSERT_CONVENIO = """
+        INSERT INTO convenios(nombre_convenio, id_procedencia, codigo_principal, codigos_historicos, id_version_actual)
+        VALUES (?, ?, ?, ?, ?)
+        ON CONFLICT(nombre_convenio) DO UPDATE SET
+            codigos_historicos = CASE WHEN codigo_principal <> excluded.codigo_principal
+                                      THEN json_insert(codigos_historicos, '$[#]', codigo_principal)
+                                      ELSE codigos_historicos END,
+            id_procedencia = excluded.id_procedencia,
+            codigo_principal = excluded.codigo_principal
+    """
+
+    QUERY_INSERTAR_VERSION = """
+        INSERT INTO convenios_versiones (
+            id_convenio, version_num, codigo_publicado, fecha_publicacion, fecha_inicio_vigencia, fecha_fin_vigencia, etapa_vigencia, resumen, fuente_pdf
+        )
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+    """
+
+    QUERY_EXISTE_NOMBRE = """
+        SELECT 1 FROM convenios
+        WHERE nombre_convenio = ?
+        LIMIT 1
+    """
+
+    # SQLite no admite LIMIT dentro de las ramas de un UNION: se ordena por rama
+    QUERY_BUSCAR_POR_NOMBRE_O_CODIGO = """
+        SELECT id_convenio, nombre_convenio, codigo_principal FROM (
+            SELECT id_convenio, nombre_convenio, codigo_principal, 0 AS prioridad FROM convenios WHERE nombre_convenio = ?
+            UNION ALL
+            SELECT id_convenio, nombre_convenio, codigo_principal, 1 AS prioridad FROM convenios WHERE codigo_principal = ?
+        )
+        ORDER BY prioridad
+        LIMIT 1
+    """
+
+    QUERY_IDS_CONVENIOS = """
+        SELECT nombre_convenio, id_convenio FROM convenios
+        WHERE nombre_convenio IN ({marcadores})
+    """
+
+    QUERY_IDS_VERSIONES = """
+        SELECT id_convenio, version_num, MAX(id_version) FROM convenios_versiones
+        WHERE id_convenio IN ({marcadores})
+        GROUP BY id_convenio, version_num
+    """
+
+    QUERY_ACTUALIZAR_CONVENIO = """
+        UPDATE convenios
+        SET id_procedencia = ?, codigo_principal = ?
+        WHERE id_convenio = ?
+    """
+
+    QUERY_CODIGO_HISTORICO = """
+        UPDATE convenios
+        SET codigos_historicos = json_insert(codigos_historicos, '$[#]', ?)
+        WHERE nombre_convenio = ?
+    """
+
+    QUERY_ACTUALIZAR_VERSION_ACTUAL = "UPDATE convenios SET id_version_actual = ? WHERE id_convenio = ?"
+
+    QUERY_NOMBRE_POR_ID = "SELECT nombre_convenio FROM convenios WHERE id_convenio = ?"
+
+    QUERY_INSERTAR_TABLA_SALARIAL = """
+        INSERT INTO tablas_salariales (
+            id_version, ejercicio, categoria_profesional, concepto_retributivo, importe, fecha_entrada_vigor, fecha_fin_vigor
+        )
+        VALUES (?, ?, ?, ?, ?, ?, ?)
+    """
+
+    QUERY_INSERTAR_HISTORIAL = """
+        INSERT INTO historial_convenios (id_version_nueva, id_version_antigua, tipo_cambio, descripcion_cambio, diff_json)
+        VALUES (?, ?, ?, ?, ?)
+    """
+
+    def __init__(self, ruta=None, **kwargs):
+        self.ruta = ruta or SQLITE_RUTA
+        super().__init__(**kwargs)
+        with self.conexion() as (conn, cursor):
+            cursor.executescript(ESQUEMA)
+            cursor.execute(QUERY_PROCEDENCIA_BOCM, (ID_PROCEDENCIA,))
+            conn.commit()
+
+    def condicion_prefijo(self, columna, prefijo):
+        # LIKE no distingue mayúsculas en SQLite y por eso no usa el índice:
+        # un rango sobre la columna sí (distingue mayúsculas)
+        return f"{columna} >= ? AND {columna} < ?", [prefijo, prefijo + '\U0010ffff']
+
+    def _abrir_conexion(self):
+        # El pool garantiza que cada conexión la usa un solo hilo a la vez
+        conn = sqlite3.connect(self.ruta, timeout=30, check_same_thread=False)
+        conn.execute("PRAGMA journal_mode = WAL")
+        conn.execute("PRAGMA synchronous = NORMAL")
+        conn.execute("PRAGMA foreign_keys = ON")
+        return conn
+
+    def _resultado_upsert(self, cursor, nombre_convenio):
+        # lastrowid no cambia cuando el upsert actualiza: el id se lee por nombre
+        cursor.execute(self.QUERY_IDS_CONVENIOS.format(marcadores='?'), (nombre_convenio,))
+        return cursor.fetchone()[1], None
@@ -0,0 +1,518 @@
+"""
+Interfaz de almacenamiento de convenios.
+
+AlmacenConvenios implementa las operaciones CRUD una sola vez sobre un pool
+de conexiones DB-API; cada motor (almacen_mysql, almacen_sqlite) solo aporta
+cómo abrir una conexión y el SQL de su dialecto. Para obtener el almacén
+configurado se usa insertar_convenios.obtener_almacen().
+"""
+
+import re
+import json
+
+from config import DB_POOL_SIZE, DB_POOL_VALIDAR_TRAS, DB_TAMANO_LOTE, CACHE_CONVENIOS_MAX
+from pool_conexiones import PoolConexiones
+from cache_convenios import CacheConvenios
+
+CAMPOS_TABLA_SALARIAL = ('ejercicio', 'categoria_profesional', 'concepto_retributivo', 'importe',
+                         'fecha_entrada_vigor', 'fecha_fin_vigor')
+
+CAMPOS_VERSION = ('id_convenio', 'version_num', 'codigo_publicado', 'fecha_publicacion', 'fecha_inicio_vigencia',
+                  'fecha_fin_vigencia', 'etapa_vigencia', 'resumen', 'fuente_pdf')
+
+
+# tipo_cambio del detector -> tipo_cambio de historial_convenios
+TIPOS_HISTORIAL = {
+    'Prórroga/Extensión': 'Vigencia',
+    'Corrección': 'Texto',
+    'Actualización': 'Texto',
+}
+
+
+def _en_lotes(elementos, tamano_lote):
+    for inicio in range(0, len(elementos), tamano_lote):
+        yield elementos[inicio:inicio + tamano_lote]
+
+
+def _rondas_sin_repetidos(convenios):
+    """
+    Reparte los convenios en rondas sin nombres repetidos, manteniendo el
+    orden: si un convenio aparece dos veces, su segunda versión va en la
+    ronda siguiente y se apoya en la primera.
+    """
+    rondas = []
+    for convenio in convenios:
+        for ronda in rondas:
+            if convenio['nombre_convenio'] not in ronda:
+                ronda[convenio['nombre_convenio']] = convenio
+                break
+        else:
+            rondas.append({convenio['nombre_convenio']: convenio})
+    return [list(ronda.values()) for ronda in rondas]
+
+
+def _fecha_publicacion(convenio):
+    """'AAAA-MM-DD' a partir de 'fecha_publicacion' (AAAAMMDD) o del nombre del fichero"""
+    fecha = convenio.get('fecha_publicacion')
+    if not fecha:
+        match = re.search(r'(\d{8})', convenio.get('fichero') or '')
+        if not match:
+            raise ValueError(f"Sin fecha de publicación: {convenio['nombre_convenio']}")
+        fecha = match.group(1)
+    fecha = str(fecha).replace('-', '')
+    return f"{fecha[:4]}-{fecha[4:6]}-{fecha[6:8]}"
+
+
+class AlmacenConvenios:
+    """
+    Operaciones sobre las tablas convenios y convenios_versiones.
+
+    Las subclases definen _abrir_conexion() y las consultas QUERY_* con el
+    marcador de parámetros de su driver (MARCADOR).
+    """
+
+    nombre = None
+    MARCADOR = '%s'
+
+    QUERY_UPSERT_CONVENIO = None
+    QUERY_INSERTAR_VERSION = None
+    QUERY_EXISTE_NOMBRE = None
+    QUERY_BUSCAR_POR_NOMBRE_O_CODIGO = None
+    QUERY_IDS_CONVENIOS = None
+    QUERY_IDS_VERSIONES = None
+    QUERY_ACTUALIZAR_CONVENIO = None
+    QUERY_CODIGO_HISTORICO = None
+    QUERY_ACTUALIZAR_VERSION_ACTUAL = None
+    QUERY_NOMBRE_POR_ID = None
+    QUERY_INSERTAR_HISTORIAL = None
+    QUERY_INSERTAR_TABLA_SALARIAL = None
+
+    # Errores por los datos de un convenio: reintentar no sirve de nada
+    ERRORES_DE_DATOS = (KeyError, TypeError, ValueError)
+
+    QUERY_INDICE_CONVENIOS = "SELECT nombre_convenio, codigo_principal, id_convenio FROM convenios"
+
+    # Convenio y versión actual de cada nombre
+    QUERY_ESTADO_CONVENIOS = """
+        SELECT c.nombre_convenio, c.id_convenio, c.codigo_principal,
+               v.id_version, v.version_num, v.codigo_publicado, v.fecha_publicacion
+        FROM convenios c
+        LEFT JOIN convenios_versiones v ON v.id_version = c.id_version_actual
+        WHERE c.nombre_convenio IN ({marcadores})
+    """
+
+    # Diferencias de importes entre cada versión nueva y la anterior del mismo
+    # convenio, en una sola sentencia: por cada (categoría, concepto) se compara
+    # el último ejercicio que trae cada versión. Las categorías nuevas o
+    # eliminadas no generan fila (historial_tablas_salariales exige los dos importes)
+    QUERY_DIFERENCIAS_TABLAS = """
+        INSERT INTO historial_tablas_salariales (
+            id_version_nueva, id_version_antigua, categoria_profesional, concepto_retributivo, importe_antiguo, importe_nuevo
+        )
+        SELECT n.id_version, a.id_version, n.categoria_profesional, n.concepto_retributivo, a.importe, n.importe
+        FROM convenios_versiones vn
+        JOIN convenios_versiones va ON va.id_convenio = vn.id_convenio AND va.version_num = vn.version_num - 1
+        JOIN tablas_salariales n ON n.id_version = vn.id_version
+        JOIN tablas_salariales a ON a.id_version = va.id_version
+            AND a.categoria_profesional = n.categoria_profesional
+            AND a.concepto_retributivo = n.concepto_retributivo
+        WHERE vn.id_version IN ({marcadores})
+          AND n.ejercicio = (SELECT MAX(x.ejercicio) FROM tablas_salariales x
+                             WHERE x.id_version = n.id_version AND x.categoria_profesional = n.categoria_profesional
+                               AND x.concepto_retributivo = n.concepto_retributivo)
+          AND a.ejercicio = (SELECT MAX(x.ejercicio) FROM tablas_salariales x
+                             WHERE x.id_version = a.id_version AND x.categoria_profesional = a.categoria_profesional
+                               AND x.concepto_retributivo = a.concepto_retributivo)
+          AND n.importe <> a.importe
+    """
+
+    # Un solo UPDATE para todos los convenios de la ronda
+    QUERY_ACTUALIZAR_VERSIONES_ACTUALES = """
+        UPDATE convenios
+        SET id_version_actual = CASE id_convenio {casos} END
+        WHERE id_convenio IN ({marcadores})
+    """
+
+    def __init__(self, tamano_pool=DB_POOL_SIZE, validar_tras=DB_POOL_VALIDAR_TRAS, tamano_cache=CACHE_CONVENIOS_MAX):
+        """
+        Args:
+            tamano_pool: Conexiones abiertas como máximo
+            validar_tras: Segundos de inactividad antes de comprobar una conexión
+            tamano_cache: Convenios en la caché de existencia (0 la desactiva)
+        """
+        self.pool = PoolConexiones(
+            self._abrir_conexion,
+            tamano=tamano_pool,
+            validar=self._conexion_viva,
+            validar_tras=validar_tras
+        )
+        self.cache = CacheConvenios(self._leer_indice, self._buscar_fila, tamano_cache) if tamano_cache else None
+
+    # --- Lo que aporta cada motor ---
+
+    def _abrir_conexion(self):
+        raise NotImplementedError
+
+    def _conexion_viva(self, conn) -> bool:
+        return True
+
+    def _resultado_upsert(self, cursor, nombre_convenio):
+        """Devuelve (id_convenio, insertado) tras QUERY_UPSERT_CONVENIO; insertado puede ser None si no se sabe"""
+        raise NotImplementedError
+
+    # --- Conexiones ---
+
+    def conexion(self):
+        """
+        Conexión y cursor prestados por el pool:
+
+            with almacen.conexion() as (conn, cursor):
+                cursor.execute(...)
+        """
+        return self.pool.conexion()
+
+    def cerrar(self):
+        """Cierra las conexiones del pool (al terminar el programa)"""
+        self.pool.cerrar()
+
+    @classmethod
+    def marcadores(cls, cantidad):
+        """'%s, %s, ...' (o '?, ?, ...') para una lista IN de 'cantidad' valores"""
+        return ', '.join([cls.MARCADOR] * cantidad)
+
+    def condicion_prefijo(self, columna, prefijo):
+        """Condición 'columna empieza por prefijo' (y sus parámetros) que puede usar el índice de la columna"""
+        escapado = prefijo.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+        return f"{columna} LIKE {self.MARCADOR}", [escapado + '%']
+
+    # --- Búsquedas (a través de la caché si está activa) ---
+
+    def _leer_indice(self):
+        with self.conexion() as (conn, cursor):
+            cursor.execute(self.QUERY_INDICE_CONVENIOS)
+            return cursor.fetchall()
+
+    def _buscar_fila(self, nombre_convenio, codigo_principal=None):
+        """(nombre, codigo, id_convenio) del convenio con ese nombre o, si no hay, con ese código"""
+        with self.conexion() as (conn, cursor):
+            cursor.execute(self.QUERY_BUSCAR_POR_NOMBRE_O_CODIGO, (nombre_convenio, codigo_principal))
+            fila = cursor.fetchone()
+        return (fila[1], fila[2], fila[0]) if fila else None
+
+    def buscar_convenio(self, nombre_convenio, codigo_principal=None):
+        """id_convenio por nombre o, si no hay, por código principal; None si no existe"""
+        if self.cache is not None:
+            return self.cache.buscar(nombre_convenio, codigo_principal)
+        fila = self._buscar_fila(nombre_convenio, codigo_principal)
+        return fila[2] if fila else None
+
+    def _registrar_en_cache(self, nombre_convenio, codigo_principal, id_convenio):
+        if self.cache is not None and id_convenio is not None:
+            self.cache.registrar(nombre_convenio, codigo_principal, id_convenio)
+
+    # --- CRUD ---
+
+    @staticmethod
+    def _params_convenio(nombre_convenio, id_procedencia, codigo_principal):
+        codigos_historicos = '[]'  # vacío al crear
+        id_version_actual = None  # aún no hay versión
+        return (nombre_convenio, id_procedencia, codigo_principal, codigos_historicos, id_version_actual)
+
+    def _upsert_convenios(self, cursor, convenios):
+        """Upsert de varios convenios con el cursor dado; devuelve {nombre: id_convenio}"""
+        params = [self._params_convenio(c['nombre_convenio'], c['id_procedencia'], c['codigo_principal']) for c in convenios]
+        cursor.executemany(self.QUERY_UPSERT_CONVENIO, params)
+
+        # executemany solo informa del primer id: se recuperan por nombre (clave única)
+        nombres = list({c['nombre_convenio'] for c in convenios})
+        cursor.execute(self.QUERY_IDS_CONVENIOS.format(marcadores=self.marcadores(len(nombres))), nombres)
+        return dict(cursor.fetchall())
+
+    def _insertar_versiones(self, cursor, versiones):
+        """Inserta filas de convenios_versiones con el cursor dado; devuelve {(id_convenio, version_num): id_version}"""
+        params = [tuple(v[campo] for campo in CAMPOS_VERSION) for v in versiones]
+        cursor.executemany(self.QUERY_INSERTAR_VERSION, params)
+
+        # Recuperar los ids por (id_convenio, version_num); si hubiera
+        # repetidos, el más reciente es el que se acaba de insertar
+        ids_convenio = list({v['id_convenio'] for v in versiones})
+        cursor.execute(self.QUERY_IDS_VERSIONES.format(marcadores=self.marcadores(len(ids_convenio))), ids_convenio)
+        return {(id_convenio, version_num): id_version for id_convenio, version_num, id_version in cursor.fetchall()}
+
+    def insertar_convenio(self, nombre_convenio, id_procedencia, codigo_principal):
+        """
+        Inserta el convenio o, si ya existe uno con ese nombre, actualiza su
+        procedencia y código guardando el código anterior en codigos_historicos.
+        Todo en una sola sentencia apoyada en la clave única uq_convenios_nombre,
+        así que dos procesos a la vez no pueden crear duplicados.
+
+        Returns:
+            id_convenio insertado o actualizado
+        """
+        params = self._params_convenio(nombre_convenio, id_procedencia, codigo_principal)
+        with self.conexion() as (conn, cursor):
+            cursor.execute(self.QUERY_UPSERT_CONVENIO, params)
+            id_convenio, insertado = self._resultado_upsert(cursor, nombre_convenio)
+            conn.commit()
+        self._registrar_en_cache(nombre_convenio, codigo_principal, id_convenio)
+        if insertado:
+            print("Convenio insertado correctamente.")
+        elif insertado is None:
+            print(f"Convenio insertado o actualizado correctamente (id: {id_convenio}).")
+        else:
+            print(f"Convenio actualizado correctamente (id: {id_convenio}).")
+        return id_convenio
+
+    def insertar_convenios_lote(self, convenios, tamano_lote=DB_TAMANO_LOTE):
+        """
+        Versión por lotes de insertar_convenio: mismo upsert, pero con
+        executemany (INSERT de varias filas) y un único commit para todo.
+
+        Args:
+            convenios: Lista de diccionarios con 'nombre_convenio',
+                       'id_procedencia' y 'codigo_principal' (los mismos que
+                       se generan para el JSON de salida)
+            tamano_lote: Filas por sentencia
+
+        Returns:
+            Lista de id_convenio en el mismo orden que 'convenios'
+        """
+        convenios = list(convenios)
+        if not convenios:
+            return []
+
+        ids_por_nombre = {}
+        with self.conexion() as (conn, cursor):
+            for lote in _en_lotes(convenios, tamano_lote):
+                ids_por_nombre.update(self._upsert_convenios(cursor, lote))
+            conn.commit()
+
+        for c in convenios:
+            self._registrar_en_cache(c['nombre_convenio'], c['codigo_principal'], ids_por_nombre.get(c['nombre_convenio']))
+
+        print(f"{len(convenios)} convenios insertados/actualizados en lotes de {tamano_lote}.")
+        return [ids_por_nombre.get(c['nombre_convenio']) for c in convenios]
+
+    def nombre_ya_esta(self, nombre_convenio):
+        if self.cache is not None:
+            return self.cache.existe(nombre_convenio)
+        with self.conexion() as (conn, cursor):
+            cursor.execute(self.QUERY_EXISTE_NOMBRE, (nombre_convenio,))
+            return cursor.fetchone() is not None
+
+    def trigger_actualizar_convenio(self, nombre_convenio, id_procedencia, codigo_principal):
+        # Busca por nombre o por código principal
+        id_convenio = self.buscar_convenio(nombre_convenio, codigo_principal)
+        if id_convenio is None:
+            print("No se encontró convenio para actualizar.")
+            return
+
+        with self.conexion() as (conn, cursor):
+            cursor.execute(self.QUERY_NOMBRE_POR_ID, (id_convenio,))
+            fila = cursor.fetchone()
+            if fila is None:
+                # Lo ha borrado otro proceso (y la caché, si la hay, no lo sabía)
+                if self.cache is not None:
+                    self.cache.invalidar()
+                print("No se encontró convenio para actualizar.")
+                return
+            nombre_guardado = fila[0]
+            cursor.execute(self.QUERY_ACTUALIZAR_CONVENIO, (id_procedencia, codigo_principal, id_convenio))
+            conn.commit()
+        self._registrar_en_cache(nombre_guardado, codigo_principal, id_convenio)
+        print(f"Convenio actualizado correctamente (id: {id_convenio}).")
+
+    def insertar_codigo_historico(self, codigo_principal, nombre_convenio):
+        with self.conexion() as (conn, cursor):
+            cursor.execute(self.QUERY_CODIGO_HISTORICO, (codigo_principal, nombre_convenio))
+            conn.commit()
+        print("Código histórico insertado correctamente.")
+
+    def insertar_convenios_versiones(self, id_convenio, version_num, codigo_publicado, fecha_publicacion, fecha_inicio_vigencia, fecha_fin_vigencia, etapa_vigencia, resumen, fuente_pdf):
+        params = (id_convenio, version_num, codigo_publicado, fecha_publicacion, fecha_inicio_vigencia, fecha_fin_vigencia, etapa_vigencia, resumen, fuente_pdf)
+        with self.conexion() as (conn, cursor):
+            cursor.execute(self.QUERY_INSERTAR_VERSION, params)
+            conn.commit()
+            print("Convenio_version insertado correctamente.")
+            return cursor.lastrowid  # devuelve el id_version insertado
+
+    def insertar_convenios_versiones_lote(self, versiones, tamano_lote=DB_TAMANO_LOTE):
+        """
+        Inserta varias filas de convenios_versiones en una sola transacción.
+
+        Args:
+            versiones: Lista de diccionarios con las claves de CAMPOS_VERSION
+            tamano_lote: Filas por sentencia
+
+        Returns:
+            Lista de id_version en el mismo orden que 'versiones'
+        """
+        versiones = list(versiones)
+        if not versiones:
+            return []
+
+        ids_por_version = {}
+        with self.conexion() as (conn, cursor):
+            for lote in _en_lotes(versiones, tamano_lote):
+                ids_por_version.update(self._insertar_versiones(cursor, lote))
+            conn.commit()
+
+        print(f"{len(versiones)} versiones de convenio insertadas en lotes de {tamano_lote}.")
+        return [ids_por_version.get((v['id_convenio'], v['version_num'])) for v in versiones]
+
+    def ingestar_convenios(self, convenios, tamano_lote=DB_TAMANO_LOTE):
+        """
+        Guarda convenios detectados conservando su historia: por cada uno
+        actualiza el convenio (el código anterior pasa a codigos_historicos),
+        crea la fila de convenios_versiones, la marca como id_version_actual y,
+        si había una versión anterior, deja el cambio en historial_convenios.
+
+        Cada lote va en una sola transacción con unas pocas sentencias para
+        todos sus convenios (no una por convenio): si algo falla no queda
+        ningún convenio del lote a medias. Volver a ingestar la misma
+        publicación de un convenio no crea otra versión.
+
+        Args:
+            convenios: Lista de diccionarios con 'nombre_convenio',
+                       'id_procedencia', 'codigo_principal' y opcionalmente
+                       'fecha_publicacion' (AAAAMMDD; si falta se toma de
+                       'fichero'), 'tipo_cambio', 'resumen', 'fuente_pdf' y
+                       'tablas_salariales' (FilaSalarial.a_dict() de cada importe)
+            tamano_lote: Convenios por transacción
+
+        Returns:
+            Diccionario con el número de 'versiones' creadas, entradas de
+            'historial', convenios 'sin_cambios' e 'importes' salariales guardados
+        """
+        resumen = {'versiones': 0, 'historial': 0, 'sin_cambios': 0, 'importes': 0}
+        for lote in _en_lotes(list(convenios), tamano_lote):
+            guardados = []
+            with self.conexion() as (conn, cursor):
+                for ronda in _rondas_sin_repetidos(lote):
+                    guardados.extend(self._ingestar_ronda(cursor, ronda, resumen))
+                conn.commit()
+            for nombre, codigo, id_convenio in guardados:
+                self._registrar_en_cache(nombre, codigo, id_convenio)
+
+        print(f"Ingesta: {resumen['versiones']} versiones nuevas, {resumen['historial']} cambios en el historial, "
+              f"{resumen['sin_cambios']} sin cambios, {resumen['importes']} importes salariales.")
+        return resumen
+
+    def _ingestar_ronda(self, cursor, ronda, resumen):
+        nombres = [c['nombre_convenio'] for c in ronda]
+        cursor.execute(self.QUERY_ESTADO_CONVENIOS.format(marcadores=self.marcadores(len(nombres))), nombres)
+        estado = {fila[0]: fila[1:] for fila in cursor.fetchall()}
+
+        # (convenio, fecha, fila anterior) de los que traen una publicación nueva
+        nuevos = []
+        for convenio in ronda:
+            fecha = _fecha_publicacion(convenio)
+            anterior = estado.get(convenio['nombre_convenio'])
+            if anterior and anterior[4] == convenio['codigo_principal'] and str(anterior[5]) == fecha:
+                resumen['sin_cambios'] += 1
+                continue
+            nuevos.append((convenio, fecha, anterior))
+        if not nuevos:
+            return []
+
+        ids_convenio = self._upsert_convenios(cursor, [convenio for convenio, _, _ in nuevos])
+
+        versiones = []
+        for convenio, fecha, anterior in nuevos:
+            versiones.append({
+                'id_convenio': ids_convenio[convenio['nombre_convenio']],
+                'version_num': (anterior[3] or 0) + 1 if anterior else 1,
+                'codigo_publicado': convenio['codigo_principal'],
+                'fecha_publicacion': fecha,
+                'fecha_inicio_vigencia': fecha,
+                'fecha_fin_vigencia': None,
+                'etapa_vigencia': 'Vigente',
+                'resumen': convenio.get('resumen'),
+                'fuente_pdf': convenio.get('fuente_pdf') or convenio.get('fichero'),
+            })
+        ids_version = self._insertar_versiones(cursor, versiones)
+        nuevas = [ids_version[(v['id_convenio'], v['version_num'])] for v in versiones]
+
+        casos = ' '.join([f"WHEN {self.MARCADOR} THEN {self.MARCADOR}"] * len(versiones))
+        params = [dato for v, id_version in zip(versiones, nuevas) for dato in (v['id_convenio'], id_version)]
+        params += [v['id_convenio'] for v in versiones]
+        cursor.execute(self.QUERY_ACTUALIZAR_VERSIONES_ACTUALES.format(casos=casos, marcadores=self.marcadores(len(versiones))), params)
+
+        historial = []
+        for (convenio, fecha, anterior), id_version in zip(nuevos, nuevas):
+            if not anterior or anterior[2] is None:
+                continue  # primera versión: no hay con qué comparar
+            codigo_anterior = anterior[1]
+            diff = {
+                'codigo_principal': {'antes': codigo_anterior, 'despues': convenio['codigo_principal']},
+                'fecha_publicacion': {'antes': str(anterior[5]), 'despues': fecha},
+                'tipo_cambio_detectado': convenio.get('tipo_cambio'),
+                'documento': convenio.get('fichero'),
+            }
+            descripcion = f"{convenio.get('tipo_cambio') or 'Nueva publicación'}: {codigo_anterior} -> {convenio['codigo_principal']}"
+            historial.append((id_version, anterior[2], TIPOS_HISTORIAL.get(convenio.get('tipo_cambio'), 'Otro'),
+                              descripcion, json.dumps(diff, ensure_ascii=False)))
+        if historial:
+            cursor.executemany(self.QUERY_INSERTAR_HISTORIAL, historial)
+
+        tablas = {id_version: convenio['tablas_salariales']
+                  for (convenio, _, _), id_version in zip(nuevos, nuevas) if convenio.get('tablas_salariales')}
+        if tablas:
+            resumen['importes'] += self._guardar_tablas(cursor, tablas)
+
+        resumen['versiones'] += len(versiones)
+        resumen['historial'] += len(historial)
+        return [(convenio['nombre_convenio'], convenio['codigo_principal'], ids_convenio[convenio['nombre_convenio']])
+                for convenio, _, _ in nuevos]
+
+    def _guardar_tablas(self, cursor, tablas):
+        """
+        Carga las tablas salariales de varias versiones con un solo executemany
+        (INSERT de varias filas) y calcula sus diferencias con la versión
+        anterior en la base de datos. Devuelve el número de importes cargados.
+
+        Args:
+            tablas: {id_version: lista de FilaSalarial o de sus a_dict()}
+        """
+        params = []
+        for id_version, filas in tablas.items():
+            for fila in filas:
+                fila = fila if isinstance(fila, dict) else fila.a_dict()
+                params.append((id_version,) + tuple(fila[campo] for campo in CAMPOS_TABLA_SALARIAL))
+        if not params:
+            return 0
+        cursor.executemany(self.QUERY_INSERTAR_TABLA_SALARIAL, params)
+
+        ids_version = list(tablas)
+        cursor.execute(self.QUERY_DIFERENCIAS_TABLAS.format(marcadores=self.marcadores(len(ids_version))), ids_version)
+        return len(params)
+
+    def guardar_tablas_salariales(self, id_version, filas):
+        """
+        Guarda las tablas salariales de una versión ya creada y registra en
+        historial_tablas_salariales lo que cambia respecto a la versión anterior.
+
+        Returns:
+            Número de importes guardados
+        """
+        with self.conexion() as (conn, cursor):
+            guardados = self._guardar_tablas(cursor, {id_version: filas})
+            conn.commit()
+        print(f"{guardados} importes salariales guardados.")
+        return guardados
+
+    def actualizar_id_version_actual(self, id_convenio, id_version):
+        with self.conexion() as (conn, cursor):
+            cursor.execute(self.QUERY_ACTUALIZAR_VERSION_ACTUAL, (id_version, id_convenio))
+            conn.commit()
+        print("id_version_actual actualizado correctamente.")
+
+    def leer_convenios_versiones(self):
+        with self.conexion() as (conn, cursor):
+            cursor.execute("SELECT * FROM convenios_versiones")
+            return cursor.fetchall()
+
+    def leer_convenios(self):
+        with self.conexion() as (conn, cursor):
+            cursor.execute("SELECT * FROM convenios")
+            return cursor.fetchall()
@@ -6,9 +6,12 @@ import re
 import json
 import tempfile
 from datetime import datetime
+from typing import List
 from concurrent.futures import ThreadPoolExecutor, as_completed, TimeoutError
 import threading
 from detector_patrones_cambio import procesar_dia_con_detector_inteligente
+from config import TRAFICO_CONCURRENCIA_MAX
+from cliente_http import obtener_cliente
 
 # Configurar logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
@@ -62,29 +65,46 @@ def verificar_dependencias():
     return True
 
 
+URL_BOLETIN = "https://www.bocm.es/boletin/CM_Boletin_BOCM/{anio}/{mes}/{dia}/"
+
+
+def urls_sumario(date_obj: datetime, numero: int) -> List[str]:
+    """URLs en las que puede estar el sumario del boletín 'numero' (formatos de días laborables)"""
+    base = URL_BOLETIN.format(anio=date_obj.strftime('%Y'), mes=date_obj.strftime('%m'), dia=date_obj.strftime('%d'))
+    # Formato 05000.PDF, 12300.PDF, etc.
+    if numero < 10:
+        nombres = [f"00{numero}00", f"0{numero}00", f"0{numero}000"]
+    elif numero < 100:
+        nombres = [f"0{numero}00", f"{numero}00", f"{numero}000"]
+    else:
+        nombres = [f"{numero}00"]
+    return [f"{base}{nombre}.PDF" for nombre in nombres]
+
+
+def url_sumario_fin_de_semana(date_obj: datetime, numero: int) -> str:
+    """URL del sumario del boletín 'numero' en formato de fin de semana (75 -> BOCM-20250329075.PDF)"""
+    base = URL_BOLETIN.format(anio=date_obj.strftime('%Y'), mes=date_obj.strftime('%m'), dia=date_obj.strftime('%d'))
+    return f"{base}BOCM-{date_obj.strftime('%Y%m%d')}{numero:03d}.PDF"
+
+
 class BOCMScraper:
     """Scraper ARREGLADO para el BOCM"""
     
     MAIN_PAGE_URL = "https://www.bocm.es"
 
-    def __init__(self):
+    def __init__(self, cliente=None):
+        """
+        Args:
+            cliente: Sesión HTTP a usar (por defecto el ClienteHTTP compartido,
+                     con pool de conexiones, control de tráfico y reintentos)
+        """
         if not verificar_dependencias():
             raise ScraperError("Dependencias no disponibles")
         
-        # Sesión con pool ampliado
-        self.session = requests.Session()
-        self.session.headers.update({
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
-        })
-        
-        # Pool grande para múltiples conexiones
-        adapter = requests.adapters.HTTPAdapter(
-            pool_connections=100,
-            pool_maxsize=100,
-            max_retries=0
-        )
-        self.session.mount('http://', adapter)
-        self.session.mount('https://', adapter)
+        self.session = cliente or obtener_cliente()
+        
+        # Sumarios ya localizados: fecha (YYYYMMDD) -> (url, número de boletín)
+        self.sumarios = {}
 
     def get_sumario_url(self, date_obj: datetime) -> str:
         """Obtiene la URL del sumario - VERSIÓN ARREGLADA"""
@@ -96,6 +116,10 @@ class BOCMScraper:
         day = date_obj.strftime('%d')
         fecha_str = date_obj.strftime('%Y%m%d')
         
+        # Ya localizado en esta sesión (p. ej. por el planificador)
+        if fecha_str in self.sumarios:
+            return self.sumarios[fecha_str][0]
+        
         # Verificar si es fin de semana
         dia_semana = date_obj.weekday()
         es_fin_semana = dia_semana >= 5
@@ -105,49 +129,25 @@ class BOCMScraper:
         
         print(f"   🔍 Buscando sumario...")
         
-        # GENERAR URLs CORRECTAMENTE
-        todas_urls = []
+        # GENERAR URLs CORRECTAMENTE (cada una con el número de boletín que supone)
+        candidatas = []
         
         # Para fines de semana, el formato BOCM-YYYYMMDD0XX es prioritario
         if es_fin_semana:
             # Números más probables para fines de semana
             numeros_prioritarios = [75, 50, 100, 125, 150, 25, 175, 200]
-            
-            # Generar URLs para números prioritarios
-            for num in numeros_prioritarios:
-                # Para 75 -> BOCM-20250329075.PDF (sin cero extra)
-                if num < 10:
-                    url = f"https://www.bocm.es/boletin/CM_Boletin_BOCM/{year}/{month}/{day}/BOCM-{fecha_str}00{num}.PDF"
-                elif num < 100:
-                    url = f"https://www.bocm.es/boletin/CM_Boletin_BOCM/{year}/{month}/{day}/BOCM-{fecha_str}0{num}.PDF"
-                else:
-                    url = f"https://www.bocm.es/boletin/CM_Boletin_BOCM/{year}/{month}/{day}/BOCM-{fecha_str}{num}.PDF"
-                todas_urls.append(url)
-            
-            # Luego probar el resto de números
-            for i in range(1, 201):
-                if i not in numeros_prioritarios:
-                    if i < 10:
-                        url = f"https://www.bocm.es/boletin/CM_Boletin_BOCM/{year}/{month}/{day}/BOCM-{fecha_str}00{i}.PDF"
-                    elif i < 100:
-                        url = f"https://www.bocm.es/boletin/CM_Boletin_BOCM/{year}/{month}/{day}/BOCM-{fecha_str}0{i}.PDF"
-                    else:
-                        url = f"https://www.bocm.es/boletin/CM_Boletin_BOCM/{year}/{month}/{day}/BOCM-{fecha_str}{i}.PDF"
-                    todas_urls.append(url)
+            resto = [i for i in range(1, 201) if i not in numeros_prioritarios]
+            for num in numeros_prioritarios + resto:
+                candidatas.append((url_sumario_fin_de_semana(date_obj, num), num))
         
         # Para días normales, formatos estándar
         for i in range(1, 201):
-            # Formato 05000.PDF, 12300.PDF, etc.
-            if i < 10:
-                todas_urls.append(f"https://www.bocm.es/boletin/CM_Boletin_BOCM/{year}/{month}/{day}/00{i}00.PDF")
-                todas_urls.append(f"https://www.bocm.es/boletin/CM_Boletin_BOCM/{year}/{month}/{day}/0{i}00.PDF")
-                todas_urls.append(f"https://www.bocm.es/boletin/CM_Boletin_BOCM/{year}/{month}/{day}/0{i}000.PDF")
-            elif i < 100:
-                todas_urls.append(f"https://www.bocm.es/boletin/CM_Boletin_BOCM/{year}/{month}/{day}/0{i}00.PDF")
-                todas_urls.append(f"https://www.bocm.es/boletin/CM_Boletin_BOCM/{year}/{month}/{day}/{i}00.PDF")
-                todas_urls.append(f"https://www.bocm.es/boletin/CM_Boletin_BOCM/{year}/{month}/{day}/{i}000.PDF")
-            else:
-                todas_urls.append(f"https://www.bocm.es/boletin/CM_Boletin_BOCM/{year}/{month}/{day}/{i}00.PDF")
+            candidatas.extend((url, i) for url in urls_sumario(date_obj, i))
+        
+        todas_urls = [url for url, _ in candidatas]
+        numero_de_url = {}
+        for url, numero in candidatas:
+            numero_de_url.setdefault(url, numero)
         
         # Mostrar las primeras URLs a verificar para debug
         print(f"   📍 Primeras URLs a verificar:")
@@ -158,26 +158,35 @@ class BOCMScraper:
         tiempo_inicio = time.time()
         url_encontrada = None
         
-        # Configuración optimizada
-        max_workers = 50  # Muchos threads
+        # Los hilos solo ponen las peticiones en cola: cuántas salen a la vez lo decide el control de tráfico
+        max_workers = TRAFICO_CONCURRENCIA_MAX
         batch_size = 100  # Lotes grandes
         timeout_conexion = 2.0  # Timeout más realista
         
-        # Variable para detener cuando se encuentra
+        # Variables para detener cuando se encuentra (o cuando ya no se puede seguir buscando)
         encontrado = threading.Event()
+        fallido = threading.Event()
         
         def verificar_url(url):
             """Verifica una URL"""
-            if encontrado.is_set():
+            if encontrado.is_set() or fallido.is_set():
                 return None
                 
             try:
                 response = self.session.head(url, timeout=timeout_conexion, allow_redirects=True)
-                if response.status_code == 200:
-                    encontrado.set()
-                    return url
-            except:
-                pass
+            except requests.RequestException as e:
+                # Timeout, conexión caída o cortacircuitos abierto (ya reintentados):
+                # no se sabe si el sumario está, que no es lo mismo que no estar
+                logging.debug(f"Error verificando {url}: {e}")
+                fallido.set()
+                raise
+            if response.status_code == 200:
+                encontrado.set()
+                return url
+            if response.status_code != 404:
+                # Solo un 404 significa que el sumario no está en esa URL
+                fallido.set()
+                raise requests.HTTPError(f"HTTP {response.status_code} verificando {url}", response=response)
             return None
         
         # Procesar TODAS las URLs sin límite artificial
@@ -197,18 +206,21 @@ class BOCMScraper:
             with ThreadPoolExecutor(max_workers=max_workers) as executor:
                 futures = {executor.submit(verificar_url, url): url for url in batch}
                 
-                for future in as_completed(futures, timeout=20):
+                # Sin plazo global: con el ritmo limitado un lote puede tardar, y cada HEAD ya tiene su timeout
+                for future in as_completed(futures):
                     try:
                         resultado = future.result()
-                        if resultado:
-                            url_encontrada = resultado
-                            # Cancelar el resto
-                            for f in futures:
-                                if not f.done():
-                                    f.cancel()
-                            break
-                    except:
-                        pass
+                    except requests.RequestException:
+                        for f in futures:
+                            f.cancel()
+                        raise
+                    if resultado:
+                        url_encontrada = resultado
+                        # Cancelar el resto
+                        for f in futures:
+                            if not f.done():
+                                f.cancel()
+                        break
                 
                 if url_encontrada:
                     break
@@ -222,6 +234,7 @@ class BOCMScraper:
             tiempo_total = time.time() - tiempo_inicio
             print(f"   ✅ Encontrado: {formato} ({tiempo_total:.1f}s, {intentos} URLs verificadas)")
             logging.info(f"Sumario encontrado: {url_encontrada}")
+            self.sumarios[fecha_str] = (url_encontrada, numero_de_url[url_encontrada])
             return url_encontrada
         
         # No encontrado
@@ -232,7 +245,16 @@ class BOCMScraper:
 
 
 def download_sumario_temp(date_obj: datetime, scraper: BOCMScraper):
-    """Descarga el sumario del BOCM en un archivo temporal"""
+    """
+    Descarga el sumario del BOCM en un archivo temporal.
+
+    Returns:
+        Ruta del archivo, o None si no hay BOCM publicado para la fecha
+
+    Raises:
+        requests.RequestException: bocm.es no responde (o su cortacircuitos
+            está abierto) y no se puede saber si hay sumario
+    """
     if not REQUESTS_DISPONIBLE:
         print("❌ No se puede descargar: requests no disponible")
         return None
@@ -246,7 +268,7 @@ def download_sumario_temp(date_obj: datetime, scraper: BOCMScraper):
         temp_file.close()
         
         logging.info(f"Descargando sumario temporalmente: {sumario_url}")
-        response = requests.get(sumario_url, stream=True, timeout=30)
+        response = scraper.session.get(sumario_url, stream=True)
         response.raise_for_status()
         
         with open(temp_path, 'wb') as f:
@@ -257,13 +279,16 @@ def download_sumario_temp(date_obj: datetime, scraper: BOCMScraper):
     except ScraperError as e:
         logging.error(f"[{date_obj.strftime('%Y-%m-%d')}] {e}")
         return None
+    except requests.RequestException as e:
+        logging.error(f"bocm.es no responde al buscar el sumario del {date_obj.strftime('%Y-%m-%d')}: {e}")
+        raise
     except Exception as e:
         logging.error(f"Error al descargar sumario para {date_obj.strftime('%Y-%m-%d')}: {e}")
         return None
 
 
 # Mantener el resto de funciones igual
-def extraer_documentos_del_sumario(ruta_sumario):
+def extraer_documentos_del_sumario(ruta_sumario, cliente=None):
     """Extrae las URLs de todos los documentos referenciados en el sumario del BOCM"""
     if not PYPDF2_DISPONIBLE:
         print("❌ No se puede procesar PDF: PyPDF2 no disponible")
@@ -273,6 +298,7 @@ def extraer_documentos_del_sumario(ruta_sumario):
         print("❌ No se puede verificar URLs: requests no disponible")
         return []
     
+    cliente = cliente or obtener_cliente()
     try:
         # Abrir el PDF del sumario
         with open(ruta_sumario, 'rb') as archivo:
@@ -347,7 +373,7 @@ def extraer_documentos_del_sumario(ruta_sumario):
                 
                 # Verificar si la URL existe
                 try:
-                    response = requests.head(url_doc, timeout=5)
+                    response = cliente.head(url_doc, timeout=5)
                     if response.status_code == 200:
                         documentos.append({
                             'id': num_doc,
@@ -367,10 +393,10 @@ def extraer_documentos_del_sumario(ruta_sumario):
         return []
 
 
-def extraer_convenios_del_sumario(ruta_sumario):
+def extraer_convenios_del_sumario(ruta_sumario, cliente=None):
     """Extrae TODOS los posibles convenios colectivos"""
     try:
-        todos_documentos = extraer_documentos_del_sumario(ruta_sumario)
+        todos_documentos = extraer_documentos_del_sumario(ruta_sumario, cliente)
         
         if not todos_documentos:
             logging.warning("No se encontraron documentos en el sumario")
@@ -540,7 +566,7 @@ def procesar_pdfs(directorio_o_lista):
     return resultados
 
 
-def descargar_convenios(convenios_info, directorio_destino):
+def descargar_convenios(convenios_info, directorio_destino, cliente=None):
     """Descarga los convenios a partir de la información proporcionada"""
     if not REQUESTS_DISPONIBLE:
         print("❌ No se pueden descargar convenios: requests no disponible")
@@ -555,6 +581,7 @@ def descargar_convenios(convenios_info, directorio_destino):
     
     logging.info(f"Descargando {len(convenios_info)} posibles convenios")
     
+    cliente = cliente or obtener_cliente()
     rutas_descargadas = []
     
     for convenio in convenios_info:
@@ -569,7 +596,7 @@ def descargar_convenios(convenios_info, directorio_destino):
                 continue
             
             logging.info(f"Descargando convenio: {url}")
-            response = requests.get(url, timeout=10)
+            response = cliente.get(url, timeout=10)
             
             if response.status_code == 200:
                 with open(ruta_local, 'wb') as archivo:
@@ -0,0 +1,129 @@
+# Caché en memoria de los convenios conocidos (nombre, código) -> id_convenio
+
+import logging
+import threading
+from collections import OrderedDict
+
+
+class CacheConvenios:
+    """
+    Índice en memoria de los convenios de la base de datos para responder
+    "¿existe este convenio?" sin consultarla.
+
+    Se carga entero con una sola consulta la primera vez que se usa. Mientras
+    quepa completo (hasta 'tamano_max' convenios) un fallo significa que el
+    convenio no existe; si no cabe, los fallos se consultan a la base de
+    datos (read-through) y se descartan los menos usados.
+
+    Las escrituras hechas a través del almacén lo mantienen al día con
+    registrar(). Si otros procesos escriben en la misma base, llamar a
+    invalidar() para que se recargue en el siguiente uso. Las escrituras no
+    dependen de la caché: las claves únicas de la base siguen evitando
+    duplicados aunque esté desactualizada.
+    """
+
+    def __init__(self, cargar, buscar, tamano_max=50000):
+        """
+        Args:
+            cargar: Función () -> iterable de (nombre, codigo, id_convenio)
+            buscar: Función (nombre, codigo) -> (nombre, codigo, id_convenio) o None
+            tamano_max: Número máximo de convenios en memoria
+        """
+        self._cargar = cargar
+        self._buscar = buscar
+        self.tamano_max = tamano_max
+
+        self._por_nombre = OrderedDict()  # nombre -> (codigo, id_convenio), en orden de uso
+        self._por_codigo = {}             # codigo -> nombre
+        self._cargada = False
+        self._completa = False
+        self._lock = threading.RLock()
+
+        self.aciertos = 0
+        self.fallos = 0
+
+    def _asegurar_carga(self):
+        if self._cargada:
+            return
+        self._por_nombre.clear()
+        self._por_codigo.clear()
+        self._completa = True
+        for nombre, codigo, id_convenio in self._cargar():
+            if len(self._por_nombre) >= self.tamano_max:
+                self._completa = False
+                break
+            self._guardar(nombre, codigo, id_convenio)
+        self._cargada = True
+        logging.info(f"Caché de convenios cargada: {len(self._por_nombre)} convenios (completa: {self._completa})")
+
+    def _guardar(self, nombre, codigo, id_convenio):
+        anterior = self._por_nombre.pop(nombre, None)
+        if anterior and self._por_codigo.get(anterior[0]) == nombre:
+            del self._por_codigo[anterior[0]]
+
+        self._por_nombre[nombre] = (codigo, id_convenio)
+        self._por_codigo[codigo] = nombre
+
+        while len(self._por_nombre) > self.tamano_max:
+            nombre_viejo, (codigo_viejo, _) = self._por_nombre.popitem(last=False)
+            if self._por_codigo.get(codigo_viejo) == nombre_viejo:
+                del self._por_codigo[codigo_viejo]
+            self._completa = False
+
+    def buscar(self, nombre, codigo=None):
+        """
+        id_convenio del convenio con ese nombre o, si no hay, con ese código.
+        None si no existe.
+        """
+        with self._lock:
+            self._asegurar_carga()
+
+            if nombre not in self._por_nombre and codigo is not None:
+                nombre_por_codigo = self._por_codigo.get(codigo)
+                if nombre_por_codigo is not None:
+                    nombre = nombre_por_codigo
+
+            if nombre in self._por_nombre:
+                self._por_nombre.move_to_end(nombre)
+                self.aciertos += 1
+                return self._por_nombre[nombre][1]
+
+            self.fallos += 1
+            if self._completa:
+                return None
+
+        fila = self._buscar(nombre, codigo)
+        if fila is None:
+            return None
+        with self._lock:
+            self._guardar(*fila)
+        return fila[2]
+
+    def existe(self, nombre) -> bool:
+        return self.buscar(nombre) is not None
+
+    def registrar(self, nombre, codigo, id_convenio):
+        """Refleja una escritura hecha por este proceso"""
+        with self._lock:
+            if self._cargada:
+                self._guardar(nombre, codigo, id_convenio)
+
+    def invalidar(self, nombre=None):
+        """
+        Olvida un convenio (o todos si no se indica nombre). Para cuando otro
+        proceso ha modificado la base de datos.
+        """
+        with self._lock:
+            if nombre is None:
+                self._cargada = False
+                self._por_nombre.clear()
+                self._por_codigo.clear()
+                return
+            anterior = self._por_nombre.pop(nombre, None)
+            if anterior and self._por_codigo.get(anterior[0]) == nombre:
+                del self._por_codigo[anterior[0]]
+            self._completa = False
+
+    def estadisticas(self) -> dict:
+        return {'convenios': len(self._por_nombre), 'completa': self._completa,
+                'aciertos': self.aciertos, 'fallos': self.fallos}
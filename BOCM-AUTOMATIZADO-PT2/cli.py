@@ -0,0 +1,294 @@
+"""
+Ejecución sin menú ni preguntas, para tareas programadas y mediciones.
+
+    python main.py --date 20250524 --yes
+    python main.py --from 20250501 --to 20250531 --yes --output jsonl > convenios.jsonl
+    python main.py --date 20250524 --dry-run
+    python main.py --date 20250524 --yes --jobs 1      # en serie, como referencia
+    python main.py --from 20200101 --to 20241231 --yes --resume   # sigue donde se quedó
+    python main.py --watch --yes        # espera cada día al BOCM y lo procesa al publicarse
+
+Con --output jsonl cada convenio se escribe en la salida estándar en cuanto
+se procesa (una línea JSON por convenio) y los mensajes van a la salida de
+errores. Sin argumentos, main.py sigue mostrando el menú interactivo.
+"""
+
+import sys
+import json
+import logging
+import argparse
+import contextlib
+from datetime import datetime, timedelta
+
+import requests
+
+from config import setup_logging, DIARIO_EJECUCION_FILE, RESULTADOS_DIR
+from bocm_scraper import BOCMScraper, download_sumario_temp
+from detector_patrones_cambio import procesar_dia_con_detector_inteligente, ConvenioDetectado
+from diario_ejecucion import DiarioEjecucion
+import diagnosticos
+from utils import limpiar_archivos_temporales
+from pipeline_convenios import procesar_convenios, ResultadoProceso
+from planificador import Planificador
+from control_trafico import obtener_control
+from resiliencia_http import obtener_resiliencia
+from resultados_jsonl import SalidaJSONL, leer_resultados
+
+# Campos de cada convenio en la salida JSON (los mismos que el menú)
+CAMPOS_JSON = ('fichero', 'nombre_convenio', 'codigo_principal', 'id_procedencia')
+
+# Códigos de salida
+SALIDA_OK = 0
+SALIDA_ERROR = 1           # error inesperado
+SALIDA_USO = 2             # argumentos incorrectos
+SALIDA_PARCIAL = 3         # algún convenio no se pudo descargar, leer o guardar
+SALIDA_SIN_SUMARIO = 4     # ninguna de las fechas tiene sumario
+
+# Fecha que no se pudo consultar (bocm.es no responde o el sumario no se pudo
+# analizar): no se da por completada en el diario ni cuenta como día sin
+# sumario, y la salida es SALIDA_PARCIAL
+FECHA_FALLIDA = ResultadoProceso(convenios=[], procesados=0, fallidos=1, escritos=0, desbordados=0,
+                                 rechazados=0, segundos=0.0)
+
+
+class SumarioNoAnalizado(Exception):
+    """El sumario se descargó pero no se pudo analizar: la fecha no se da por completada"""
+    pass
+
+
+def _fecha(texto):
+    try:
+        return datetime.strptime(texto, '%Y%m%d')
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"fecha inválida '{texto}': usa YYYYMMDD (ej: 20250525)")
+
+
+def crear_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog='main.py',
+        description="Detecta en el sumario del BOCM los convenios con cambios de código y los procesa."
+    )
+    fechas = parser.add_mutually_exclusive_group()
+    fechas.add_argument('--date', type=_fecha, metavar='YYYYMMDD', help="Fecha a procesar (por defecto, hoy)")
+    fechas.add_argument('--from', dest='desde', type=_fecha, metavar='YYYYMMDD', help="Primera fecha de un intervalo")
+    parser.add_argument('--to', dest='hasta', type=_fecha, metavar='YYYYMMDD', help="Última fecha del intervalo (por defecto, hoy)")
+    parser.add_argument('--yes', '-y', action='store_true', help="Procesar sin pedir confirmación")
+    parser.add_argument('--dry-run', action='store_true', help="Solo detectar: no descarga ni guarda convenios")
+    parser.add_argument('--jobs', '-j', type=int, metavar='N', help="Descargas y procesos de extracción simultáneos (1 = en serie)")
+    parser.add_argument('--diagnostics', action='store_true',
+                        help="Diagnóstico de cada sumario (texto, códigos, muestra) en diagnosticos.jsonl")
+    parser.add_argument('--watch', action='store_true',
+                        help="Vigilar: esperar cada día a que se publique el BOCM y procesarlo en cuanto aparezca")
+    parser.add_argument('--resume', action='store_true',
+                        help="Reanudar la ejecución anterior: salta fechas y documentos ya procesados")
+    parser.add_argument('--output', choices=['json', 'jsonl'], default='json',
+                        help="json: resumen y JSON al final (como el menú); jsonl: una línea por convenio según se procesa")
+    return parser
+
+
+def _fechas(args):
+    if args.desde:
+        hasta = args.hasta or datetime.now()
+        dias = (hasta - args.desde).days
+        return [args.desde + timedelta(days=n) for n in range(dias + 1)]
+    return [args.date or datetime.now()]
+
+
+def _confirmar(detalles, args):
+    if args.yes:
+        return True
+    print(f"\n🎯 Se detectaron {len(detalles)} convenios con cambios")
+    try:
+        respuesta = input("¿Deseas procesar estos convenios? (s/n): ").lower().strip()
+    except EOFError:
+        return False
+    return respuesta in ('s', 'si')
+
+
+def _detectar(fecha_obj, fecha_str, scraper, diario):
+    """Convenios detectados en el sumario del día (del diario si ya se analizó), o None sin sumario"""
+    anotadas = diario.detecciones(fecha_str)
+    if anotadas is not None:
+        print(f"   📒 Detecciones del {fecha_obj.strftime('%d/%m/%Y')} tomadas del diario")
+        return [ConvenioDetectado.desde_dict(d) for d in anotadas]
+
+    ruta_sumario_temp = download_sumario_temp(fecha_obj, scraper)
+    diario.anotar_sumario(fecha_str, bool(ruta_sumario_temp))
+    if not ruta_sumario_temp:
+        print(f"❌ No se encontró sumario para {fecha_obj.strftime('%d/%m/%Y')}")
+        return None
+
+    try:
+        resultado = procesar_dia_con_detector_inteligente(fecha_str, ruta_sumario_temp)
+    finally:
+        limpiar_archivos_temporales(ruta_sumario_temp)
+    if resultado is None:
+        raise SumarioNoAnalizado(f"no se pudo analizar el sumario del {fecha_obj.strftime('%d/%m/%Y')}")
+    detalles = resultado.get('detalles', [])
+    diario.anotar_detecciones(fecha_str, detalles)
+    return detalles
+
+
+def _resultado_anterior(fecha_str):
+    """
+    ResultadoProceso de una fecha completada en una ejecución anterior: sus
+    convenios siguen en los resultados en disco y entran en el JSON final
+    """
+    procesados = sum(1 for _ in leer_resultados(RESULTADOS_DIR, desde=fecha_str, hasta=fecha_str))
+    return ResultadoProceso(convenios=[], procesados=procesados, fallidos=0, escritos=0, desbordados=0,
+                            rechazados=0, segundos=0.0)
+
+
+def procesar_fecha(fecha_obj, scraper, args, escribir_linea, resultados, diario):
+    """
+    Detecta y procesa los convenios de un día. Cada convenio se añade a
+    'resultados' (SalidaJSONL) según se procesa, y cada paso se anota en
+    'diario' (DiarioEjecucion) para poder reanudar.
+
+    Returns:
+        ResultadoProceso (el de la ejecución anterior si la fecha ya estaba
+        completada), [] si no había nada que procesar (o en --dry-run), None
+        si no hay sumario para esa fecha o FECHA_FALLIDA si no se pudo consultar
+        o analizar
+    """
+    fecha_str = fecha_obj.strftime('%Y%m%d')
+    print(f"\n📅 Procesando fecha: {fecha_obj.strftime('%d/%m/%Y')}")
+    if diario.completada(fecha_str):
+        resultado = _resultado_anterior(fecha_str)
+        print(f"   ⏭️ Ya procesada en la ejecución anterior ({resultado.procesados} convenios)")
+        return resultado
+
+    try:
+        detalles = _detectar(fecha_obj, fecha_str, scraper, diario)
+    except requests.RequestException as e:
+        print(f"❌ No se pudo consultar el BOCM del {fecha_obj.strftime('%d/%m/%Y')}: {e}")
+        return FECHA_FALLIDA
+    except SumarioNoAnalizado as e:
+        print(f"❌ {e.args[0].capitalize()}; se reintentará con --resume")
+        return FECHA_FALLIDA
+    if detalles is None:
+        return None
+
+    print(f"   🔄 Convenios con cambios: {len(detalles)}")
+    for detalle in detalles:
+        print(f"   - Doc {detalle.documento}: {detalle.tipo_cambio} (Código: {detalle.codigo})")
+        if args.dry_run and escribir_linea:
+            escribir_linea(detalle.a_dict())
+
+    if not detalles:
+        diario.anotar_completada(fecha_str)
+        return []
+    if args.dry_run or not _confirmar(detalles, args):
+        return []
+
+    pendientes = [d for d in detalles if not diario.procesado(fecha_str, d.fichero)]
+    if len(pendientes) < len(detalles):
+        print(f"   ⏭️ {len(detalles) - len(pendientes)} convenios ya procesados en la ejecución anterior")
+
+    opciones = {}
+    if args.jobs:
+        opciones = {'descargas': args.jobs, 'procesos': 0 if args.jobs == 1 else args.jobs}
+
+    def al_procesar(registro):
+        resultados.escribir(registro)
+        if escribir_linea:
+            escribir_linea(registro)
+
+    def al_etapa(detalle, etapa):
+        diario.anotar_documento(fecha_str, detalle.fichero, etapa)
+
+    resultados.abrir_fecha(fecha_str, continuar=len(pendientes) < len(detalles))
+    # Los convenios ya quedan en disco: el resultado solo lleva los contadores
+    resultado = procesar_convenios(fecha_str, pendientes, session=scraper.session, al_procesar=al_procesar,
+                                   conservar_convenios=False, al_etapa=al_etapa, **opciones)
+    resultados.cerrar_fecha()
+    # Los desbordados están en el fichero de la cola y se guardarán en la siguiente ejecución
+    if not resultado.fallidos:
+        diario.anotar_completada(fecha_str)
+    return resultado
+
+
+def _imprimir_json(fechas):
+    """El JSON de todas las fechas, leído de los resultados en disco sin cargarlo entero"""
+    sys.stdout.write('[')
+    separador = ''
+    for fecha in fechas:
+        for registro in leer_resultados(RESULTADOS_DIR, desde=fecha, hasta=fecha):
+            sys.stdout.write(separador + json.dumps({campo: registro[campo] for campo in CAMPOS_JSON}, ensure_ascii=False))
+            separador = ', '
+    sys.stdout.write(']\n')
+
+
+def main(argv=None) -> int:
+    parser = crear_parser()
+    args = parser.parse_args(argv)
+    if args.hasta and not args.desde:
+        parser.error("--to necesita --from")
+    if args.jobs is not None and args.jobs < 1:
+        parser.error("--jobs debe ser 1 o más")
+    if args.watch and (args.date or args.desde):
+        parser.error("--watch procesa siempre el día en curso: no admite --date ni --from")
+    if args.desde and args.desde > (args.hasta or datetime.now()):
+        parser.error("--from es posterior a --to")
+    if not (args.yes or args.dry_run) and not sys.stdin.isatty():
+        parser.error("sin terminal no se puede confirmar: usa --yes (o --dry-run)")
+
+    setup_logging()
+    if args.diagnostics:
+        diagnosticos.activar()
+    salida = sys.stdout
+    escribir_linea = None
+    if args.output == 'jsonl':
+        def escribir_linea(registro):
+            salida.write(json.dumps(registro, ensure_ascii=False) + '\n')
+            salida.flush()
+
+    # En modo jsonl la salida estándar es solo para los datos
+    mensajes = sys.stderr if args.output == 'jsonl' else sys.stdout
+    with contextlib.redirect_stdout(mensajes):
+        try:
+            scraper = BOCMScraper()
+            # Un --dry-run no anota nada: no debe estropear el diario de una ejecución a medias
+            ruta_diario = None if args.dry_run else DIARIO_EJECUCION_FILE
+            with SalidaJSONL(RESULTADOS_DIR) as salida_resultados, \
+                    DiarioEjecucion(ruta_diario, reanudar=args.resume) as diario:
+                if args.watch:
+                    Planificador(scraper, lambda fecha: procesar_fecha(
+                        fecha, scraper, args, escribir_linea, salida_resultados, diario)).vigilar()
+                    return SALIDA_OK
+                fechas = _fechas(args)
+                resultados = []
+                for fecha in fechas:
+                    resultados.append(procesar_fecha(fecha, scraper, args, escribir_linea, salida_resultados, diario))
+        except KeyboardInterrupt:
+            if args.watch:
+                # Es la forma normal de parar la vigilancia
+                print("\n⏹️ Vigilancia detenida")
+                return SALIDA_OK
+            print("\n❌ Interrumpido")
+            return SALIDA_ERROR
+        except Exception as e:
+            logging.error(f"Error en la ejecución por línea de comandos: {e}")
+            print(f"❌ Error durante el procesamiento: {e}")
+            return SALIDA_ERROR
+
+        con_sumario = [r for r in resultados if r is not None and r is not FECHA_FALLIDA]
+        sin_consultar = sum(1 for r in resultados if r is FECHA_FALLIDA)
+        procesados = [(fecha, r) for fecha, r in zip(fechas, resultados) if r]
+        if args.output == 'json' and procesados:
+            print('\n=== JSON ===')
+            _imprimir_json([fecha.strftime('%Y%m%d') for fecha, _ in procesados])
+
+        total = sum(r.procesados for _, r in procesados)
+        fallidos = sum(r.fallidos + r.desbordados + r.rechazados for _, r in procesados)
+        print(f"\n✅ {total} convenios procesados en {len(con_sumario)}/{len(resultados)} días con sumario"
+              + (f" | ⚠️ {fallidos} con problemas" if fallidos else "")
+              + (f" | ❌ {sin_consultar} días sin poder consultar el BOCM" if sin_consultar else ""))
+        logging.info(f"Tráfico bocm.es: {obtener_control().estadisticas()}")
+        logging.info(f"Peticiones HTTP por endpoint: {obtener_resiliencia().metricas()}")
+
+    if not con_sumario and not sin_consultar:
+        return SALIDA_SIN_SUMARIO
+    if fallidos:
+        return SALIDA_PARCIAL
+    return SALIDA_OK
@@ -0,0 +1,95 @@
+"""
+Cliente HTTP único del programa.
+
+Todas las peticiones (búsqueda del sumario, su descarga, verificación y
+descarga de convenios, sondeos del planificador) salen por el mismo
+ClienteHTTP, que:
+
+- mantiene las conexiones abiertas (keep-alive) en un pool de
+  TRAFICO_CONCURRENCIA_MAX por servidor: a partir de la primera petición no
+  se repite el saludo TCP+TLS con bocm.es,
+- aplica un timeout de conexión corto y uno de lectura más largo
+  (HTTP_TIMEOUT_CONEXION, HTTP_TIMEOUT_LECTURA) si la llamada no indica otro,
+- pasa por el control de tráfico y la capa de reintentos (SesionControlada),
+- avisa a las funciones registradas en 'al_medir' con la duración de cada petición.
+
+Se obtiene con obtener_cliente(); las funciones que hacen peticiones aceptan
+otro cliente (o una sesión de requests) para las pruebas y las mediciones:
+
+    cliente = obtener_cliente()
+    cliente.al_medir.append(lambda medicion: print(medicion.url, medicion.segundos))
+"""
+
+import time
+import logging
+import threading
+from typing import Callable, List, NamedTuple, Optional
+
+import requests
+
+from config import TRAFICO_CONCURRENCIA_MAX, HTTP_TIMEOUT_CONEXION, HTTP_TIMEOUT_LECTURA
+from control_trafico import SesionControlada, ControlTrafico
+from resiliencia_http import Resiliencia
+
+USER_AGENT = 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
+
+
+class MedicionHTTP(NamedTuple):
+    metodo: str
+    url: str
+    estado: Optional[int]       # None si la petición acabó en error
+    segundos: float             # total, con esperas de turno y reintentos
+    hasta_cabeceras: Optional[float]
+
+
+class ClienteHTTP(SesionControlada):
+    """Sesión con pool de conexiones, timeouts por defecto y mediciones"""
+
+    def __init__(self, control: Optional[ControlTrafico] = None, resiliencia: Optional[Resiliencia] = None,
+                 conexiones: int = TRAFICO_CONCURRENCIA_MAX,
+                 timeout=(HTTP_TIMEOUT_CONEXION, HTTP_TIMEOUT_LECTURA)):
+        super().__init__(control, resiliencia)
+        self.timeout = timeout
+        self.al_medir: List[Callable[[MedicionHTTP], None]] = []
+        self.headers['User-Agent'] = USER_AGENT
+
+        # Una conexión por cada petición simultánea que permita el control de tráfico.
+        # Sin reintentos de urllib3: los hace resiliencia_http
+        adapter = requests.adapters.HTTPAdapter(pool_connections=conexiones, pool_maxsize=conexiones, max_retries=0)
+        self.mount('http://', adapter)
+        self.mount('https://', adapter)
+
+    def request(self, method, url, *args, **kwargs):
+        kwargs.setdefault('timeout', self.timeout)
+        inicio = time.perf_counter()
+        respuesta = None
+        try:
+            respuesta = super().request(method, url, *args, **kwargs)
+            return respuesta
+        finally:
+            if self.al_medir:
+                self._medir(MedicionHTTP(
+                    method.upper(), url, respuesta.status_code if respuesta is not None else None,
+                    time.perf_counter() - inicio,
+                    respuesta.elapsed.total_seconds() if respuesta is not None else None
+                ))
+
+    def _medir(self, medicion: MedicionHTTP):
+        for al_medir in list(self.al_medir):
+            try:
+                al_medir(medicion)
+            except Exception as e:
+                logging.error(f"Error en la medición de {medicion.url}: {e}")
+
+
+_cliente = None
+_cliente_lock = threading.Lock()
+
+
+def obtener_cliente() -> ClienteHTTP:
+    """Cliente HTTP compartido por todo el programa"""
+    global _cliente
+    with _cliente_lock:
+        if _cliente is None:
+            _cliente = ClienteHTTP()
+    return _cliente
@@ -0,0 +1,231 @@
+"""
+Cola de escritura diferida (write-behind) para los convenios.
+
+El bucle de procesamiento encola cada convenio y sigue descargando y
+extrayendo mientras un hilo los guarda por lotes en la base de datos
+(AlmacenConvenios.ingestar_convenios: convenio, versión e historial).
+
+- La cola está acotada: si la base va más lenta que la descarga, encolar()
+  espera a que haya sitio.
+- Los errores transitorios (conexión caída, base bloqueada...) se reintentan
+  con espera exponencial. Si siguen fallando, el lote se vuelca a disco
+  (COLA_DESBORDE_FILE) y se vuelve a intentar en la siguiente ejecución.
+  Tras un volcado, los lotes siguientes van directos a disco durante
+  COLA_ESPERA_RECONEXION segundos para no frenar el procesamiento.
+- Los convenios que la base rechaza por sus datos (IntegrityError,
+  DataError) no se reintentan: se apartan en COLA_RECHAZADOS_FILE.
+"""
+
+import os
+import json
+import time
+import queue
+import logging
+import threading
+
+from config import (COLA_ESCRITURA_MAX, COLA_TAMANO_LOTE, COLA_INTERVALO, COLA_REINTENTOS,
+                    COLA_ESPERA_RECONEXION, COLA_DESBORDE_FILE, COLA_RECHAZADOS_FILE)
+
+_FIN = object()
+
+
+def _leer_jsonl(ruta):
+    if not os.path.exists(ruta):
+        return []
+    with open(ruta, 'r', encoding='utf-8') as f:
+        return [json.loads(linea) for linea in f if linea.strip()]
+
+
+def _anadir_jsonl(ruta, elementos):
+    """Añade al final del fichero y fuerza la escritura a disco"""
+    with open(ruta, 'a', encoding='utf-8') as f:
+        for elemento in elementos:
+            f.write(json.dumps(elemento, ensure_ascii=False) + '\n')
+        f.flush()
+        os.fsync(f.fileno())
+
+
+class ColaEscritura:
+    """
+    Uso:
+
+        with ColaEscritura(obtener_almacen()) as cola:
+            for convenio in ...:
+                cola.encolar(convenio)
+        # al salir del with se han guardado (o volcado a disco) todos
+    """
+
+    def __init__(self, almacen, tamano_max=COLA_ESCRITURA_MAX, tamano_lote=COLA_TAMANO_LOTE,
+                 intervalo=COLA_INTERVALO, reintentos=COLA_REINTENTOS, espera_reconexion=COLA_ESPERA_RECONEXION,
+                 ruta_desborde=COLA_DESBORDE_FILE, ruta_rechazados=COLA_RECHAZADOS_FILE, al_guardar=None):
+        """
+        Args:
+            almacen: AlmacenConvenios donde se guardan los convenios
+            tamano_max: Convenios pendientes como máximo antes de que encolar() espere
+            tamano_lote: Convenios por escritura
+            intervalo: Segundos que se espera a completar un lote antes de escribirlo
+            reintentos: Reintentos ante errores transitorios antes de volcar a disco
+            espera_reconexion: Segundos tras un volcado sin intentar escribir en la base
+            ruta_desborde: Fichero JSONL con los convenios pendientes si la base no responde
+            ruta_rechazados: Fichero JSONL con los convenios que la base no acepta
+            al_guardar: Se llama (desde el hilo de escritura) con cada lote que ya no
+                        depende de la memoria: guardado, volcado a disco o rechazado
+        """
+        self.almacen = almacen
+        self.tamano_lote = tamano_lote
+        self.intervalo = intervalo
+        self.reintentos = reintentos
+        self.espera_reconexion = espera_reconexion
+        self._base_caida_hasta = 0.0
+        self.ruta_desborde = ruta_desborde
+        self.ruta_rechazados = ruta_rechazados
+        self.al_guardar = al_guardar
+
+        self._cola = queue.Queue(maxsize=tamano_max)
+        self.escritos = 0
+        self.desbordados = 0
+        self.rechazados = 0
+
+        # Lo que quedó pendiente de ejecuciones anteriores se escribe primero
+        self._recuperados = _leer_jsonl(ruta_desborde)
+        self._siguen_pendientes = None
+        if self._recuperados:
+            print(f"💾 {len(self._recuperados)} convenios pendientes de una ejecución anterior")
+
+        self._hilo = threading.Thread(target=self._trabajar, name='cola-escritura', daemon=True)
+        self._hilo.start()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.cerrar()
+
+    def encolar(self, convenio):
+        """Encola un convenio (dict de ingestar_convenios); espera si la cola está llena"""
+        self._cola.put(convenio)
+
+    def cerrar(self):
+        """Escribe lo pendiente y para el hilo"""
+        if self._hilo.is_alive():
+            self._cola.put(_FIN)
+            self._hilo.join()
+
+    def pendientes(self) -> int:
+        return self._cola.qsize()
+
+    def estadisticas(self) -> dict:
+        return {'escritos': self.escritos, 'desbordados': self.desbordados,
+                'rechazados': self.rechazados, 'pendientes': self.pendientes()}
+
+    # --- Hilo de escritura ---
+
+    def _trabajar(self):
+        if self._recuperados:
+            try:
+                self._recuperar()
+            except Exception as e:
+                # El fichero de desborde sigue intacto: se reintenta en la
+                # siguiente ejecución y el hilo atiende la cola igualmente
+                self._siguen_pendientes = None
+                logging.error(f"Error recuperando los convenios pendientes de {self.ruta_desborde}: {e}")
+                print(f"   ❌ No se pudieron recuperar los convenios pendientes: {e}")
+
+        terminar = False
+        while not terminar:
+            lote = [self._cola.get()]
+            if lote[0] is _FIN:
+                break
+
+            # Completar el lote con lo que llegue durante 'intervalo'
+            limite = time.monotonic() + self.intervalo
+            while len(lote) < self.tamano_lote:
+                try:
+                    convenio = self._cola.get(timeout=max(0, limite - time.monotonic()))
+                except queue.Empty:
+                    break
+                if convenio is _FIN:
+                    terminar = True
+                    break
+                lote.append(convenio)
+
+            try:
+                self._escribir(lote)
+            except Exception as e:
+                # Ni siquiera se pudo volcar a disco: se pierde el lote, pero el
+                # hilo sigue vivo para que encolar() no se quede esperando
+                logging.error(f"Error irrecuperable en la cola de escritura: {e}")
+                print(f"   ❌ No se pudieron guardar {len(lote)} convenios: {e}")
+
+    def _recuperar(self):
+        recuperados = self._recuperados
+        self._recuperados = []
+
+        # El fichero no se toca hasta terminar: si el programa se cae a medias
+        # se repiten en la siguiente ejecución (el upsert es idempotente)
+        self._siguen_pendientes = []
+        for inicio in range(0, len(recuperados), self.tamano_lote):
+            self._escribir(recuperados[inicio:inicio + self.tamano_lote])
+        siguen_pendientes, self._siguen_pendientes = self._siguen_pendientes, None
+
+        if siguen_pendientes:
+            temporal = self.ruta_desborde + '.tmp'
+            if os.path.exists(temporal):
+                os.remove(temporal)
+            _anadir_jsonl(temporal, siguen_pendientes)
+            os.replace(temporal, self.ruta_desborde)
+        else:
+            os.remove(self.ruta_desborde)
+
+    def _escribir(self, lote):
+        if time.monotonic() < self._base_caida_hasta:
+            self._desbordar(lote)
+            return
+
+        espera = 0.5
+        for intento in range(self.reintentos + 1):
+            try:
+                self.almacen.ingestar_convenios(lote)
+                self.escritos += len(lote)
+                self._avisar(lote)
+                return
+            except self.almacen.ERRORES_DE_DATOS as e:
+                if len(lote) > 1:
+                    # Escribir uno a uno para apartar solo los que fallan
+                    for convenio in lote:
+                        self._escribir([convenio])
+                    return
+                self._rechazar(lote, e)
+                return
+            except Exception as e:
+                logging.warning(f"Error guardando {len(lote)} convenios (intento {intento + 1}): {e}")
+                if intento < self.reintentos:
+                    time.sleep(espera)
+                    espera *= 2
+
+        self._base_caida_hasta = time.monotonic() + self.espera_reconexion
+        self._desbordar(lote)
+
+    def _avisar(self, lote):
+        if self.al_guardar:
+            try:
+                self.al_guardar(lote)
+            except Exception as e:
+                logging.error(f"Error en al_guardar de la cola de escritura: {e}")
+
+    def _desbordar(self, lote):
+        if self._siguen_pendientes is not None:
+            self._siguen_pendientes.extend(lote)
+        else:
+            _anadir_jsonl(self.ruta_desborde, lote)
+        self.desbordados += len(lote)
+        self._avisar(lote)
+        logging.error(f"Base de datos no disponible: {len(lote)} convenios guardados en {self.ruta_desborde}")
+        print(f"   ⚠️ Base de datos no disponible: {len(lote)} convenios pendientes en {self.ruta_desborde}")
+
+    def _rechazar(self, lote, error):
+        _anadir_jsonl(self.ruta_rechazados, [dict(convenio, error=str(error)) for convenio in lote])
+        self.rechazados += len(lote)
+        self._avisar(lote)
+        logging.error(f"Convenio rechazado por la base de datos: {lote[0].get('nombre_convenio')} - {error}")
+        print(f"   ❌ Convenio rechazado por la base de datos: {lote[0].get('nombre_convenio')}")
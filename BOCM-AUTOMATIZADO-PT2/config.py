@@ -8,10 +8,82 @@ BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 CONVENIOS_DIR = os.path.join(BASE_DIR, "convenios_bocm")
 REFERENCIAS_DIR = os.path.join(BASE_DIR, "convenios_referencia")
 KNOWLEDGE_FILE = os.path.join(BASE_DIR, "codigos_convenios.json")
+REGISTRO_DETECCIONES_FILE = os.path.join(BASE_DIR, "registro_detecciones.jsonl")
 
 # ID de procedencia fijo
 ID_PROCEDENCIA = 3
 
+# Base de datos
+DB_MOTOR = 'mysql'          # 'mysql' (servidor de DB_CONFIG) o 'sqlite' (fichero local SQLITE_RUTA)
+SQLITE_RUTA = os.path.join(BASE_DIR, "convenios.sqlite3")
+DB_CONFIG = {
+    'host': 'localhost',
+    'user': 'root',
+    'password': 'root',
+    'database': 'convenios'
+}
+DB_POOL_SIZE = 5            # Conexiones abiertas como máximo
+DB_POOL_VALIDAR_TRAS = 30   # Segundos de inactividad antes de comprobar una conexión
+DB_TAMANO_LOTE = 500        # Filas por sentencia en las inserciones por lotes
+CACHE_CONVENIOS_MAX = 50000 # Convenios conocidos en memoria para comprobar si existen (0 = sin caché)
+
+# Cola de escritura diferida (cola_escritura.py)
+COLA_ESCRITURA_MAX = 1000   # Convenios pendientes de guardar como máximo
+COLA_TAMANO_LOTE = 100      # Convenios por escritura
+COLA_INTERVALO = 1.0        # Segundos de espera para completar un lote
+COLA_REINTENTOS = 3         # Reintentos ante errores de conexión antes de volcar a disco
+COLA_ESPERA_RECONEXION = 30 # Segundos tras un volcado en los que no se vuelve a intentar
+COLA_DESBORDE_FILE = os.path.join(BASE_DIR, "cola_pendiente.jsonl")
+COLA_RECHAZADOS_FILE = os.path.join(BASE_DIR, "cola_rechazados.jsonl")
+
+# Tráfico hacia bocm.es (control_trafico.py): común a búsqueda del sumario, verificación y descargas
+TRAFICO_PETICIONES_POR_SEGUNDO = 20  # Ritmo medio máximo
+TRAFICO_RAFAGA = 40                  # Peticiones seguidas sin esperar como máximo
+TRAFICO_CONCURRENCIA_INICIAL = 8     # Peticiones simultáneas al empezar (luego se ajusta sola)
+TRAFICO_CONCURRENCIA_MIN = 1
+TRAFICO_CONCURRENCIA_MAX = 50
+TRAFICO_LATENCIA_OBJETIVO = 2.0      # Segundos hasta las cabeceras; por encima se reduce la concurrencia
+
+# Reintentos y cortacircuitos de las peticiones HTTP (resiliencia_http.py)
+HTTP_REINTENTOS = 3          # Reintentos de GET/HEAD ante timeouts, cortes, 429 y 5xx
+HTTP_ESPERA_BASE = 0.5       # Segundos; la espera máxima se dobla en cada reintento (con jitter)
+HTTP_ESPERA_MAX = 30         # Segundos de espera entre reintentos como máximo
+HTTP_CIRCUITO_FALLOS = 5     # Fallos seguidos de un endpoint que abren su circuito
+HTTP_CIRCUITO_ESPERA = 60    # Segundos con el circuito abierto antes de volver a probar
+HTTP_TIMEOUT_CONEXION = 5    # Segundos para abrir la conexión (cliente_http.py, si la llamada no indica otro)
+HTTP_TIMEOUT_LECTURA = 30    # Segundos sin recibir datos de una respuesta
+
+# Procesamiento concurrente de los convenios del día (pipeline_convenios.py)
+PIPELINE_DESCARGAS = 8      # Descargas simultáneas de PDFs
+PIPELINE_PROCESOS = None    # Procesos de extracción (None = uno por CPU, 0 = sin procesos)
+PIPELINE_COLA_MAX = 16      # PDFs descargados en memoria esperando a ser extraídos
+PIPELINE_TIMEOUT = 30       # Segundos por descarga
+
+# Resultados de cada ejecución, un JSON Lines por fecha (resultados_jsonl.py)
+RESULTADOS_DIR = os.path.join(BASE_DIR, "resultados")
+RESULTADOS_FSYNC_CADA = 20  # Convenios escritos entre fsync y fsync
+DIARIO_EJECUCION_FILE = os.path.join(BASE_DIR, "diario_ejecucion.jsonl")  # Para reanudar con --resume
+
+# Modo vigilancia: espera y procesa el BOCM del día (--watch, planificador.py)
+PLANIFICADOR_HORA_INICIO = "07:00"  # Hora a la que se empieza a sondear el sumario
+PLANIFICADOR_HORA_LIMITE = "15:00"  # Si a esta hora no se ha publicado, se pasa al día siguiente
+PLANIFICADOR_INTERVALO_MIN = 30     # Segundos entre sondeos cerca de la hora habitual de publicación
+PLANIFICADOR_INTERVALO_MAX = 600    # Segundos entre sondeos como máximo
+PLANIFICADOR_FACTOR = 2             # Crecimiento del intervalo lejos de la hora habitual
+PLANIFICADOR_MARGEN = 30 * 60       # Segundos alrededor de la hora habitual en que se sondea al mínimo
+PLANIFICADOR_BUSQUEDA_COMPLETA_CADA = 10  # Sondeos entre búsquedas completas (por si falla la previsión)
+PLANIFICADOR_ESTADO_FILE = os.path.join(BASE_DIR, "planificador_estado.json")
+PLANIFICADOR_METRICAS_FILE = os.path.join(BASE_DIR, "planificador_metricas.jsonl")  # Latencia desde la publicación
+
+# Diagnósticos del análisis de sumarios (diagnosticos.py); también con --diagnostics
+DIAGNOSTICOS_ACTIVOS = False
+DIAGNOSTICOS_FILE = os.path.join(BASE_DIR, "diagnosticos.jsonl")
+
+# Consultas de lectura del catálogo (consultas_convenios.py)
+CONSULTAS_TAMANO_PAGINA = 100 # Convenios por página
+CONSULTAS_TTL = 60            # Segundos que se reutiliza un resultado (0 = sin caché)
+CONSULTAS_CACHE_MAX = 256     # Resultados guardados como máximo
+
 # Configuración de logging
 def setup_logging():
     logging.basicConfig(
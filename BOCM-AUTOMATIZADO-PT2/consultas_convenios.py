@@ -0,0 +1,250 @@
+"""
+Consultas de lectura sobre el catálogo de convenios.
+
+Para quien necesita leer el catálogo (informes, la web, exportaciones) sin
+recorrer la tabla entera ni cargarla en memoria:
+
+    consultas = obtener_consultas()
+    pagina = consultas.buscar(prefijo_nombre="Hostel", limite=50)
+    siguiente = consultas.buscar(prefijo_nombre="Hostel", limite=50, despues_de=pagina.siguiente)
+
+    for convenio in consultas.recorrer(id_procedencia=3):   # todas las páginas, de una en una
+        ...
+
+La paginación es por clave (id_convenio > último visto), así que cada
+página cuesta lo mismo aunque se esté al final del catálogo. Los resultados
+se guardan unos segundos (CONSULTAS_TTL) para no repetir la misma consulta.
+"""
+
+import time
+import threading
+from collections import OrderedDict
+from datetime import date, datetime
+from typing import Iterator, List, NamedTuple, Optional
+
+from config import CONSULTAS_TTL, CONSULTAS_CACHE_MAX, CONSULTAS_TAMANO_PAGINA
+
+
+class FilaConvenio(NamedTuple):
+    """Convenio con los datos de su versión actual (None si aún no tiene)"""
+    id_convenio: int
+    nombre_convenio: str
+    codigo_principal: str
+    id_procedencia: Optional[int]
+    id_version_actual: Optional[int]
+    version_num: Optional[int]
+    fecha_publicacion: Optional[date]
+    fecha_inicio_vigencia: Optional[date]
+    fecha_fin_vigencia: Optional[date]
+    etapa_vigencia: Optional[str]
+
+
+class FilaVersion(NamedTuple):
+    id_version: int
+    id_convenio: int
+    version_num: int
+    codigo_publicado: str
+    fecha_publicacion: date
+    fecha_inicio_vigencia: date
+    fecha_fin_vigencia: Optional[date]
+    etapa_vigencia: str
+    resumen: Optional[str]
+    fuente_pdf: Optional[str]
+
+
+class Pagina(NamedTuple):
+    filas: List[FilaConvenio]
+    siguiente: Optional[int]  # valor para 'despues_de' en la página siguiente; None si es la última
+
+
+SELECT_CONVENIOS = """
+    SELECT c.id_convenio, c.nombre_convenio, c.codigo_principal, c.id_procedencia, c.id_version_actual,
+           v.version_num, v.fecha_publicacion, v.fecha_inicio_vigencia, v.fecha_fin_vigencia, v.etapa_vigencia
+    FROM convenios c
+    {union} JOIN convenios_versiones v ON v.id_version = c.id_version_actual
+    WHERE {condiciones}
+    ORDER BY c.id_convenio
+    LIMIT {limite}
+"""
+
+SELECT_VERSIONES = """
+    SELECT id_version, id_convenio, version_num, codigo_publicado, fecha_publicacion,
+           fecha_inicio_vigencia, fecha_fin_vigencia, etapa_vigencia, resumen, fuente_pdf
+    FROM convenios_versiones
+    WHERE {condicion}
+    ORDER BY {orden}
+"""
+
+
+def _fecha(valor):
+    """MySQL devuelve date y SQLite texto ISO: siempre date"""
+    if valor is None or isinstance(valor, date):
+        return valor.date() if isinstance(valor, datetime) else valor
+    return date.fromisoformat(str(valor)[:10])
+
+
+def _fila_convenio(fila) -> FilaConvenio:
+    return FilaConvenio(*fila[:6], _fecha(fila[6]), _fecha(fila[7]), _fecha(fila[8]), fila[9])
+
+
+def _fila_version(fila) -> FilaVersion:
+    return FilaVersion(*fila[:4], _fecha(fila[4]), _fecha(fila[5]), _fecha(fila[6]), *fila[7:])
+
+
+class CacheTTL:
+    """Resultados recientes por (consulta, parámetros); caducan a los 'ttl' segundos"""
+
+    def __init__(self, ttl=CONSULTAS_TTL, tamano_max=CONSULTAS_CACHE_MAX, reloj=time.monotonic):
+        self.ttl = ttl
+        self.tamano_max = tamano_max
+        self.reloj = reloj
+        self._datos = OrderedDict()
+        self._lock = threading.Lock()
+        self.aciertos = 0
+        self.fallos = 0
+
+    def obtener(self, clave):
+        with self._lock:
+            entrada = self._datos.get(clave)
+            if entrada and entrada[0] > self.reloj():
+                self._datos.move_to_end(clave)
+                self.aciertos += 1
+                return entrada[1]
+            self._datos.pop(clave, None)
+            self.fallos += 1
+            return None
+
+    def guardar(self, clave, valor):
+        with self._lock:
+            self._datos[clave] = (self.reloj() + self.ttl, valor)
+            self._datos.move_to_end(clave)
+            while len(self._datos) > self.tamano_max:
+                self._datos.popitem(last=False)
+
+    def invalidar(self):
+        with self._lock:
+            self._datos.clear()
+
+
+class ConsultasConvenios:
+    """Consultas filtradas y paginadas sobre un AlmacenConvenios"""
+
+    def __init__(self, almacen, cache: Optional[CacheTTL] = None):
+        self.almacen = almacen
+        self.cache = cache if cache is not None else CacheTTL()
+
+    def _ejecutar(self, consulta, params, convertir):
+        clave = (consulta, tuple(params))
+        resultado = self.cache.obtener(clave) if self.cache.ttl > 0 else None
+        if resultado is not None:
+            return resultado
+
+        # Todas las consultas están acotadas (una página con LIMIT o las
+        # versiones de un solo convenio): el resultado cabe en memoria y en la caché
+        with self.almacen.conexion() as (conn, cursor):
+            cursor.execute(consulta, params)
+            resultado = [convertir(fila) for fila in cursor.fetchall()]
+
+        if self.cache.ttl > 0:
+            self.cache.guardar(clave, resultado)
+        return resultado
+
+    def buscar(self, codigo: Optional[str] = None, prefijo_nombre: Optional[str] = None,
+               id_procedencia: Optional[int] = None, vigente_desde: Optional[date] = None,
+               vigente_hasta: Optional[date] = None, despues_de: Optional[int] = None,
+               limite: int = CONSULTAS_TAMANO_PAGINA) -> Pagina:
+        """
+        Una página de convenios ordenados por id_convenio.
+
+        Args:
+            codigo: Código principal exacto
+            prefijo_nombre: Comienzo del nombre del convenio
+            id_procedencia: Boletín de origen
+            vigente_desde, vigente_hasta: Convenios cuya versión actual está
+                                          vigente en algún momento del intervalo
+            despues_de: 'siguiente' de la página anterior
+            limite: Convenios por página
+        """
+        m = self.almacen.MARCADOR
+        condiciones, params = [], []
+
+        if despues_de is not None:
+            condiciones.append(f"c.id_convenio > {m}")
+            params.append(despues_de)
+        if codigo is not None:
+            condiciones.append(f"c.codigo_principal = {m}")
+            params.append(codigo)
+        if prefijo_nombre:
+            condicion, valores = self.almacen.condicion_prefijo('c.nombre_convenio', prefijo_nombre)
+            condiciones.append(condicion)
+            params.extend(valores)
+        if id_procedencia is not None:
+            condiciones.append(f"c.id_procedencia = {m}")
+            params.append(id_procedencia)
+        if vigente_hasta is not None:
+            condiciones.append(f"v.fecha_inicio_vigencia <= {m}")
+            params.append(str(vigente_hasta))
+        if vigente_desde is not None:
+            condiciones.append(f"(v.fecha_fin_vigencia IS NULL OR v.fecha_fin_vigencia >= {m})")
+            params.append(str(vigente_desde))
+
+        filtra_vigencia = vigente_desde is not None or vigente_hasta is not None
+        consulta = SELECT_CONVENIOS.format(
+            union='' if filtra_vigencia else 'LEFT',
+            condiciones=' AND '.join(condiciones) or '1 = 1',
+            limite=int(limite)
+        )
+        filas = self._ejecutar(consulta, params, _fila_convenio)
+        siguiente = filas[-1].id_convenio if len(filas) == limite else None
+        return Pagina(filas, siguiente)
+
+    def recorrer(self, tamano_pagina: int = CONSULTAS_TAMANO_PAGINA, **filtros) -> Iterator[FilaConvenio]:
+        """Todos los convenios que cumplen los filtros de buscar(), pidiendo una página cada vez"""
+        despues_de = None
+        while True:
+            pagina = self.buscar(despues_de=despues_de, limite=tamano_pagina, **filtros)
+            yield from pagina.filas
+            if pagina.siguiente is None:
+                return
+            despues_de = pagina.siguiente
+
+    def por_codigo(self, codigo: str) -> Optional[FilaConvenio]:
+        filas = self.buscar(codigo=codigo, limite=1).filas
+        return filas[0] if filas else None
+
+    def versiones(self, id_convenio: int) -> List[FilaVersion]:
+        """Versiones de un convenio, de la primera a la actual"""
+        consulta = SELECT_VERSIONES.format(condicion=f"id_convenio = {self.almacen.MARCADOR}", orden='version_num')
+        return self._ejecutar(consulta, [id_convenio], _fila_version)
+
+    def recorrer_versiones(self, tamano_pagina: int = CONSULTAS_TAMANO_PAGINA) -> Iterator[FilaVersion]:
+        """Todas las versiones de todos los convenios, pidiendo una página cada vez"""
+        consulta = SELECT_VERSIONES.format(condicion=f"id_version > {self.almacen.MARCADOR}",
+                                           orden=f"id_version LIMIT {int(tamano_pagina)}")
+        despues_de = 0
+        while True:
+            filas = self._ejecutar(consulta, [despues_de], _fila_version)
+            yield from filas
+            if len(filas) < tamano_pagina:
+                return
+            despues_de = filas[-1].id_version
+
+    def invalidar(self):
+        """Descarta los resultados guardados (p. ej. tras una ingesta)"""
+        self.cache.invalidar()
+
+
+_consultas = None
+_consultas_lock = threading.Lock()
+
+
+def obtener_consultas() -> ConsultasConvenios:
+    """Consultas sobre el almacén configurado (compartidas por todo el programa)"""
+    global _consultas
+    from insertar_convenios import obtener_almacen
+    almacen = obtener_almacen()
+    with _consultas_lock:
+        # Si se cerró el almacén compartido, las consultas siguen al nuevo
+        if _consultas is None or _consultas.almacen is not almacen:
+            _consultas = ConsultasConvenios(almacen)
+    return _consultas
@@ -0,0 +1,221 @@
+"""
+Control del tráfico hacia bocm.es, compartido por la búsqueda del sumario,
+la verificación de documentos y las descargas.
+
+Dos mecanismos, uno detrás de otro, antes de cada petición:
+
+1. LimitadorTokens (token bucket): como mucho TRAFICO_PETICIONES_POR_SEGUNDO
+   de media, con ráfagas de hasta TRAFICO_RAFAGA. Un Retry-After del servidor
+   detiene todas las peticiones el tiempo indicado.
+2. ConcurrenciaAdaptativa (AIMD): el número de peticiones simultáneas sube
+   de uno en uno mientras el servidor responde rápido y se reduce a la mitad
+   ante un 429/5xx de saturación, un timeout, un error de conexión o una
+   latencia por encima de TRAFICO_LATENCIA_OBJETIVO.
+
+Así una carga histórica va tan rápido como bocm.es aguanta sin que empiece a
+devolver 429 ni a cortar conexiones. Lo normal es usarlo a través de
+SesionControlada:
+
+    session = SesionControlada()
+    session.get(url, timeout=30)          # espera turno si hace falta
+
+y los reintentos y cortacircuitos de resiliencia_http se aplican por encima.
+El programa no la crea directamente: usa el ClienteHTTP compartido (cliente_http.py).
+"""
+
+import time
+import logging
+import threading
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Callable, Dict, Optional
+
+import requests
+
+from resiliencia_http import Resiliencia, obtener_resiliencia
+from config import (TRAFICO_PETICIONES_POR_SEGUNDO, TRAFICO_RAFAGA, TRAFICO_CONCURRENCIA_INICIAL,
+                    TRAFICO_CONCURRENCIA_MIN, TRAFICO_CONCURRENCIA_MAX, TRAFICO_LATENCIA_OBJETIVO)
+
+# Respuestas con las que el servidor indica que va sobrado de carga
+CODIGOS_SATURACION = (429, 502, 503, 504)
+REDUCCION = 0.5
+
+
+def segundos_retry_after(respuesta) -> Optional[float]:
+    """Segundos pedidos en la cabecera Retry-After (número o fecha HTTP), o None"""
+    valor = respuesta.headers.get('Retry-After') if getattr(respuesta, 'headers', None) else None
+    if not valor:
+        return None
+    if valor.strip().isdigit():
+        return float(valor)
+    try:
+        return max((parsedate_to_datetime(valor) - datetime.now(timezone.utc)).total_seconds(), 0)
+    except (TypeError, ValueError):
+        return None
+
+
+class LimitadorTokens:
+    """Token bucket: 'tasa' peticiones por segundo con ráfagas de hasta 'rafaga'"""
+
+    def __init__(self, tasa: float, rafaga: int, reloj: Callable[[], float] = time.monotonic,
+                 dormir: Callable[[float], None] = time.sleep):
+        self.tasa = tasa
+        self.rafaga = rafaga
+        self.reloj = reloj
+        self.dormir = dormir
+        self.tokens = float(rafaga)
+        self._ultimo = reloj()
+        self._pausa_hasta = 0.0
+        self._lock = threading.Lock()
+
+    def adquirir(self) -> float:
+        """Espera a que haya un token y lo consume. Devuelve los segundos esperados."""
+        esperado = 0.0
+        while True:
+            with self._lock:
+                ahora = self.reloj()
+                self.tokens = min(self.rafaga, self.tokens + (ahora - self._ultimo) * self.tasa)
+                self._ultimo = ahora
+                espera = self._pausa_hasta - ahora
+                if espera <= 0:
+                    if self.tokens >= 1:
+                        self.tokens -= 1
+                        return esperado
+                    espera = (1 - self.tokens) / self.tasa
+            self.dormir(espera)
+            esperado += espera
+
+    def pausar(self, segundos: float):
+        """Ninguna petición sale en los próximos 'segundos' (Retry-After)"""
+        with self._lock:
+            self._pausa_hasta = max(self._pausa_hasta, self.reloj() + segundos)
+
+
+class ConcurrenciaAdaptativa:
+    """
+    Límite de peticiones simultáneas con aumento aditivo y reducción multiplicativa.
+
+    Cada respuesta buena suma 1/límite (uno más por cada "ronda" completa);
+    una señal de saturación lo multiplica por REDUCCION, como mucho una vez
+    por ventana de 'latencia_objetivo' segundos, para que una tanda de
+    peticiones que fallan a la vez no lo hunda hasta el mínimo.
+    """
+
+    def __init__(self, inicial: int, minimo: int, maximo: int, latencia_objetivo: float,
+                 reloj: Callable[[], float] = time.monotonic):
+        self.minimo = minimo
+        self.maximo = maximo
+        self.limite = float(min(max(inicial, minimo), maximo))
+        self.latencia_objetivo = latencia_objetivo
+        self.reloj = reloj
+        self.en_curso = 0
+        self._ultima_reduccion = None
+        self._condicion = threading.Condition()
+
+    def entrar(self):
+        with self._condicion:
+            while self.en_curso >= max(int(self.limite), 1):
+                self._condicion.wait()
+            self.en_curso += 1
+
+    def salir(self, latencia: float, saturado: bool):
+        with self._condicion:
+            self.en_curso -= 1
+            if saturado or latencia > self.latencia_objetivo:
+                ahora = self.reloj()
+                if self._ultima_reduccion is None or ahora - self._ultima_reduccion >= self.latencia_objetivo:
+                    anterior = self.limite
+                    self.limite = max(self.minimo, self.limite * REDUCCION)
+                    self._ultima_reduccion = ahora
+                    logging.info(f"Tráfico bocm.es: concurrencia {anterior:.0f} -> {self.limite:.0f} "
+                                 f"({'saturación' if saturado else f'latencia {latencia:.1f} s'})")
+            else:
+                self.limite = min(self.maximo, self.limite + 1 / self.limite)
+            self._condicion.notify_all()
+
+
+class ControlTrafico:
+    """Limitador de ritmo y concurrencia adaptativa para un mismo servidor"""
+
+    def __init__(self, limitador: LimitadorTokens, concurrencia: ConcurrenciaAdaptativa,
+                 reloj: Callable[[], float] = time.monotonic):
+        self.limitador = limitador
+        self.concurrencia = concurrencia
+        self.reloj = reloj
+        self._lock = threading.Lock()
+        self._contadores = {'peticiones': 0, 'saturaciones': 0, 'errores': 0, 'segundos_esperando': 0.0}
+
+    def _contar(self, **incrementos):
+        with self._lock:
+            for clave, valor in incrementos.items():
+                self._contadores[clave] += valor
+
+    def ejecutar(self, peticion: Callable[[], requests.Response]) -> requests.Response:
+        """Hace la petición cuando le toca turno y ajusta el ritmo según cómo responda el servidor"""
+        esperado = self.limitador.adquirir()
+        self.concurrencia.entrar()
+        inicio = self.reloj()
+        latencia = None
+        saturado = False
+        try:
+            respuesta = peticion()
+            # Hasta las cabeceras: lo que tarde en bajar un PDF grande no es saturación
+            elapsed = getattr(respuesta, 'elapsed', None)
+            latencia = elapsed.total_seconds() if elapsed is not None else None
+            saturado = respuesta.status_code in CODIGOS_SATURACION
+            if saturado:
+                pausa = segundos_retry_after(respuesta)
+                if pausa:
+                    logging.warning(f"bocm.es pide esperar {pausa:.0f} s (HTTP {respuesta.status_code})")
+                    self.limitador.pausar(pausa)
+            return respuesta
+        except (requests.Timeout, requests.ConnectionError):
+            saturado = True
+            self._contar(errores=1)
+            raise
+        finally:
+            self.concurrencia.salir(self.reloj() - inicio if latencia is None else latencia, saturado)
+            self._contar(peticiones=1, saturaciones=int(saturado), segundos_esperando=esperado)
+
+    def estadisticas(self) -> Dict:
+        with self._lock:
+            estadisticas = dict(self._contadores)
+        estadisticas.update(concurrencia=int(self.concurrencia.limite), en_curso=self.concurrencia.en_curso)
+        return estadisticas
+
+
+_control = None
+_control_lock = threading.Lock()
+
+
+def obtener_control() -> ControlTrafico:
+    """Control de tráfico de bocm.es (compartido por todo el programa)"""
+    global _control
+    with _control_lock:
+        if _control is None:
+            _control = ControlTrafico(
+                LimitadorTokens(TRAFICO_PETICIONES_POR_SEGUNDO, TRAFICO_RAFAGA),
+                ConcurrenciaAdaptativa(TRAFICO_CONCURRENCIA_INICIAL, TRAFICO_CONCURRENCIA_MIN,
+                                       TRAFICO_CONCURRENCIA_MAX, TRAFICO_LATENCIA_OBJETIVO)
+            )
+    return _control
+
+
+class SesionControlada(requests.Session):
+    """
+    requests.Session cuyas peticiones pasan por el control de tráfico compartido
+    y, por encima, por los reintentos y cortacircuitos de resiliencia_http
+    (cada reintento vuelve a esperar su turno).
+    """
+
+    def __init__(self, control: Optional[ControlTrafico] = None, resiliencia: Optional[Resiliencia] = None):
+        super().__init__()
+        self.control = control or obtener_control()
+        self.resiliencia = resiliencia or obtener_resiliencia()
+
+    def request(self, method, url, *args, **kwargs):
+        # Las redirecciones van por send(): cuentan dentro de la misma petición
+        def intento():
+            return self.control.ejecutar(lambda: super(SesionControlada, self).request(method, url, *args, **kwargs))
+        return self.resiliencia.ejecutar(method, url, intento)
+
@@ -1,22 +1,177 @@
 import os
 import re
+import sys
 import json
+import bisect
+import hashlib
 import logging
 from datetime import datetime
-from typing import List, Dict, Optional, Tuple
+from typing import List, Dict, Optional, Tuple, NamedTuple
 try:
     import PyPDF2
 except ImportError:
     print("PyPDF2 no instalado. Instala con: pip install PyPDF2")
     PyPDF2 = None
 
+from registro_detecciones import obtener_registro, huella_archivo
+from prefiltro_sumario import puede_contener_convenios
+from diagnosticos import diagnosticar_sumario
+
+URL_DOCUMENTO_BOCM = "https://www.bocm.es/boletin/CM_Orden_BOCM/{anio}/{mes}/{dia}/BOCM-{fecha}-{documento}.PDF"
+
+# Los nombres de sección se repiten en cada detección: se guarda una sola copia
+SECCION_ECONOMIA = sys.intern('CONSEJERÍA DE ECONOMÍA, HACIENDA Y EMPLEO')
+
+
+class ConvenioDetectado(NamedTuple):
+    """
+    Convenio con cambio de código detectado en un sumario.
+
+    La descripción no se copia: es el tramo [inicio, fin) del texto del
+    sumario, que comparten todas las detecciones del mismo día. La URL se
+    construye solo cuando se pide.
+    """
+    documento: str
+    codigo: str
+    tipo_cambio: str
+    fecha: str
+    seccion: str
+    empresa: Optional[str]
+    texto: str
+    inicio: int
+    fin: int
+
+    @property
+    def descripcion(self) -> str:
+        return self.texto[self.inicio:self.fin].strip()
+
+    @property
+    def fichero(self) -> str:
+        return f"BOCM-{self.fecha}-{self.documento}.PDF"
+
+    @property
+    def url(self) -> str:
+        return URL_DOCUMENTO_BOCM.format(
+            anio=self.fecha[:4], mes=self.fecha[4:6], dia=self.fecha[6:8],
+            fecha=self.fecha, documento=self.documento
+        )
+
+    def resumen(self, longitud: int = 100) -> str:
+        """Descripción recortada para mostrar por pantalla"""
+        return self.descripcion[:longitud] + "..."
+
+    def __repr__(self) -> str:
+        return f"ConvenioDetectado(documento={self.documento!r}, codigo={self.codigo!r}, tipo_cambio={self.tipo_cambio!r})"
+
+    def a_dict(self) -> Dict:
+        """Representación serializable (sin el texto completo del sumario)"""
+        return {
+            'documento': self.documento,
+            'codigo': self.codigo,
+            'tipo_cambio': self.tipo_cambio,
+            'fecha': self.fecha,
+            'seccion': self.seccion,
+            'empresa': self.empresa,
+            'descripcion': self.descripcion
+        }
+
+    @classmethod
+    def desde_dict(cls, datos: Dict) -> 'ConvenioDetectado':
+        descripcion = datos.get('descripcion', '')
+        return cls(
+            documento=datos['documento'],
+            codigo=datos['codigo'],
+            tipo_cambio=datos['tipo_cambio'],
+            fecha=datos['fecha'],
+            seccion=sys.intern(datos.get('seccion', SECCION_ECONOMIA)),
+            empresa=datos.get('empresa'),
+            texto=descripcion,
+            inicio=0,
+            fin=len(descripcion)
+        )
+
+
+class IndicePosicional:
+    """
+    Posiciones de los códigos de 14 dígitos, números de documento BOCM y
+    palabras clave de un texto, calculadas una sola vez. Permite resolver
+    por búsqueda binaria qué hay alrededor de una posición sin volver a
+    recorrer el texto.
+    """
+    
+    # En el sumario los números BOCM aparecen a veces espaciados: "B O C M - 20250524-1"
+    PATRON_BOCM = r'b ?o ?c ?m ?- ?\d{8}-(\d+)'
+    
+    # Distancia máxima entre un código y el número BOCM que lo cierra
+    DISTANCIA_MAX_DOCUMENTO = 300
+    
+    def __init__(self, texto: str, palabras_clave: List[str]):
+        # Se trabaja sobre el texto en minúsculas sin IGNORECASE, que es
+        # bastante más rápido; solo vale si lower() no cambia las posiciones
+        texto_min = texto.lower()
+        flags = 0
+        if len(texto_min) != len(texto):
+            texto_min, flags = texto, re.IGNORECASE
+        
+        # Códigos tal y como los anuncia el sumario: "(Código número XXXXXXXXXXXXXX)"
+        self.codigos = [m.start(1) for m in re.finditer(r'código\s*número\s*(\d{14})', texto_min, flags)]
+        
+        self.posiciones_bocm = []
+        self.documentos_bocm = []
+        for match in re.finditer(self.PATRON_BOCM, texto_min, flags):
+            self.posiciones_bocm.append(match.start())
+            self.documentos_bocm.append(match.group(1))
+        
+        # Las palabras clave solo se indexan si hace falta consultarlas
+        self._texto_min = texto_min
+        self._flags = flags
+        self._palabras_clave = palabras_clave
+        self.inicios_clave = None
+        self.fines_clave = None
+    
+    def _indexar_palabras_clave(self):
+        patron_claves = '|'.join(re.escape(palabra.lower()) for palabra in self._palabras_clave)
+        self.inicios_clave = []
+        self.fines_clave = []
+        for match in re.finditer(patron_claves, self._texto_min, self._flags):
+            self.inicios_clave.append(match.start())
+            self.fines_clave.append(match.end())
+    
+    def hay_palabra_clave(self, inicio: int, fin: int) -> bool:
+        """Indica si alguna palabra clave cae completa dentro de [inicio, fin)"""
+        if self.inicios_clave is None:
+            self._indexar_palabras_clave()
+        i = bisect.bisect_left(self.inicios_clave, inicio)
+        while i < len(self.inicios_clave) and self.inicios_clave[i] < fin:
+            if self.fines_clave[i] <= fin:
+                return True
+            i += 1
+        return False
+    
+    def documento_tras(self, pos: int) -> Optional[str]:
+        """Número del primer documento BOCM que aparece después de pos"""
+        i = bisect.bisect_left(self.posiciones_bocm, pos)
+        if i < len(self.posiciones_bocm) and self.posiciones_bocm[i] - pos <= self.DISTANCIA_MAX_DOCUMENTO:
+            return self.documentos_bocm[i]
+        return None
+
+
 class DetectorPatronesCambio:
     """
     Detector inteligente de patrones que indican cambios en códigos de convenio
     específicamente en sumarios del BOCM
     """
     
-    def __init__(self):
+    # Subir este número cuando cambie la lógica de detección (no solo los patrones)
+    VERSION_LOGICA = 4
+    
+    # Los patrones de cambio se comprueban solo en este tramo antes de cada código
+    VENTANA_PATRONES = 300
+    
+    def __init__(self, usar_prefiltro: bool = True):
+        # Descartar sin extraer texto los sumarios sin ningún código de 14 dígitos
+        self.usar_prefiltro = usar_prefiltro
+        
         # Patrones específicos que indican CAMBIO de código en el sumario
         self.patrones_cambio_sumario = [
             # Patrones para "registro, depósito y publicación"
@@ -34,6 +189,7 @@ class DetectorPatronesCambio:
             r'código\s*número\s*(\d{14})',
             r'\(código\s*número\s*(\d{14})\)'
         ]
+        self._patrones_compilados = [re.compile(patron, re.IGNORECASE) for patron in self.patrones_cambio_sumario]
         
         # Palabras clave que CONFIRMAN que es un convenio real
         self.palabras_clave_convenio = [
@@ -65,8 +221,20 @@ class DetectorPatronesCambio:
             'convenio específico',
             'plan estratégico'
         ]
+        
+        self.version_patrones = self._calcular_version_patrones()
     
-    def analizar_sumario_dia(self, ruta_sumario: str, fecha_objetivo: str) -> List[Dict]:
+    def _calcular_version_patrones(self) -> str:
+        """Huella del conjunto de patrones y palabras clave en uso"""
+        contenido = json.dumps([
+            self.VERSION_LOGICA,
+            self.patrones_cambio_sumario,
+            self.palabras_clave_convenio,
+            self.palabras_exclusion
+        ], ensure_ascii=False)
+        return hashlib.sha256(contenido.encode('utf-8')).hexdigest()[:16]
+    
+    def analizar_sumario_dia(self, ruta_sumario: str, fecha_objetivo: str) -> List[ConvenioDetectado]:
         """
         Analiza el sumario del día y detecta SOLO convenios con cambios de código
         
@@ -77,23 +245,35 @@ class DetectorPatronesCambio:
         Returns:
             Lista de convenios con cambios detectados
         """
+        convenios_con_cambios = self._analizar(ruta_sumario, fecha_objetivo)
+        return convenios_con_cambios if convenios_con_cambios is not None else []
+    
+    def _analizar(self, ruta_sumario: str, fecha_objetivo: str) -> Optional[List[ConvenioDetectado]]:
+        """Como analizar_sumario_dia, pero devuelve None si el análisis falla"""
         try:
             logging.info(f"Analizando sumario para detectar cambios de código: {ruta_sumario}")
             
+            if self.usar_prefiltro and not puede_contener_convenios(ruta_sumario):
+                logging.info("Prefiltro: el sumario no contiene códigos de convenio - no se extrae el texto")
+                diagnosticar_sumario(fecha_objetivo, None, [], origen='prefiltro')
+                return []
+            
             # Extraer texto del sumario
             texto_sumario = self._extraer_texto_pdf(ruta_sumario)
             if not texto_sumario:
-                return []
+                return None
             
             # Detectar documentos con patrones de cambio
             convenios_con_cambios = self._detectar_cambios_en_texto(texto_sumario, fecha_objetivo)
             
             logging.info(f"Detectados {len(convenios_con_cambios)} convenios con cambios de código")
+            # Con el texto ya extraído: no se vuelve a leer el PDF
+            diagnosticar_sumario(fecha_objetivo, texto_sumario, convenios_con_cambios)
             return convenios_con_cambios
             
         except Exception as e:
             logging.error(f"Error analizando sumario: {e}")
-            return []
+            return None
     
     def _extraer_texto_pdf(self, ruta_pdf: str) -> str:
         """Extrae texto del PDF del sumario con mejor manejo"""
@@ -108,7 +288,7 @@ class DetectorPatronesCambio:
             logging.error(f"Error extrayendo texto del PDF: {e}")
             return ""
 
-    def _detectar_cambios_en_texto(self, texto: str, fecha: str) -> List[Dict]:
+    def _detectar_cambios_en_texto(self, texto: str, fecha: str) -> List[ConvenioDetectado]:
         """
         Detecta convenios con cambios de código analizando el texto del sumario
         VERSIÓN CORREGIDA para el formato real del BOCM
@@ -139,57 +319,87 @@ class DetectorPatronesCambio:
                 empresa_match = re.search(r'empresa\s+([^(]+)\s*\(', descripcion_completa)
                 empresa = empresa_match.group(1).strip() if empresa_match else "No identificada"
                 
-                convenio = {
-                    'id': num_doc,
-                    'descripcion': descripcion_completa.strip(),
-                    'seccion': 'CONSEJERÍA DE ECONOMÍA, HACIENDA Y EMPLEO',
-                    'url': f"https://www.bocm.es/boletin/CM_Orden_BOCM/{fecha[:4]}/{fecha[4:6]}/{fecha[6:8]}/BOCM-{fecha}-{num_doc}.PDF",
-                    'codigo_detectado': codigo_detectado,
-                    'empresa': empresa,
-                    'patron_cambio': True,
-                    'razon_cambio': "Nuevo registro/depósito"  # Ajustar según el texto
-                }
+                convenio = ConvenioDetectado(
+                    documento=num_doc,
+                    codigo=codigo_detectado,
+                    tipo_cambio="Nuevo registro/depósito",  # Ajustar según el texto
+                    fecha=fecha,
+                    seccion=SECCION_ECONOMIA,
+                    empresa=empresa,
+                    texto=texto_normalizado,
+                    inicio=match.start(1),
+                    fin=match.end(1)
+                )
                 
                 convenios_detectados.append(convenio)
                 logging.info(f"CAMBIO DETECTADO: Doc {num_doc} - Código {codigo_detectado} - Empresa: {empresa}")
         
         # Si no encuentra con el patrón anterior, intentar patrón más flexible
         if not convenios_detectados:
-            # Buscar códigos y luego su contexto
-            for patron in self.patrones_cambio_sumario:
-                for match in re.finditer(patron, texto_normalizado, re.IGNORECASE):
+            # Índice de códigos, números BOCM y palabras clave del sumario
+            indice = IndicePosicional(texto_normalizado, self.palabras_clave_convenio)
+            codigos_vistos = set()
+            
+            # Cada código del índice se contrasta con los patrones solo en su
+            # ventana: no se recorre el texto completo una vez por patrón
+            fin_anterior = 0
+            for pos_codigo in indice.codigos:
+                # La ventana no pasa del código anterior: es otra entrada del sumario
+                match = self._buscar_patron_cambio(texto_normalizado, pos_codigo, fin_anterior)
+                fin_anterior = pos_codigo + 14
+                if match:
                     codigo = match.group(1)
                     
+                    # Evitar duplicados
+                    if codigo in codigos_vistos:
+                        continue
+                    
                     # Buscar el contexto alrededor del código
                     pos = match.start()
                     inicio = max(0, pos - 200)
                     fin = min(len(texto_normalizado), pos + 100)
-                    contexto = texto_normalizado[inicio:fin]
                     
                     # Verificar si es un convenio laboral
-                    if any(palabra in contexto.lower() for palabra in self.palabras_clave_convenio):
-                        # Buscar número BOCM
-                        bocm_match = re.search(r'BOCM-\d{8}-(\d+)', contexto)
-                        num_doc = bocm_match.group(1) if bocm_match else str(len(convenios_detectados) + 1)
+                    if indice.hay_palabra_clave(inicio, fin):
+                        # Número BOCM que sigue al código en el sumario
+                        num_doc = indice.documento_tras(match.start(1))
+                        if not num_doc:
+                            num_doc = str(len(convenios_detectados) + 1)
                         
-                        convenio = {
-                            'id': num_doc,
-                            'descripcion': contexto.strip(),
-                            'seccion': 'CONSEJERÍA DE ECONOMÍA, HACIENDA Y EMPLEO',
-                            'url': f"https://www.bocm.es/boletin/CM_Orden_BOCM/{fecha[:4]}/{fecha[4:6]}/{fecha[6:8]}/BOCM-{fecha}-{num_doc}.PDF",
-                            'codigo_detectado': codigo,
-                            'patron_cambio': True,
-                            'razon_cambio': self._identificar_tipo_cambio(contexto)
-                        }
+                        contexto = texto_normalizado[inicio:fin]
+                        convenio = ConvenioDetectado(
+                            documento=num_doc,
+                            codigo=codigo,
+                            tipo_cambio=self._identificar_tipo_cambio(contexto),
+                            fecha=fecha,
+                            seccion=SECCION_ECONOMIA,
+                            empresa=None,
+                            texto=texto_normalizado,
+                            inicio=inicio,
+                            fin=fin
+                        )
                         
-                        # Evitar duplicados
-                        if not any(c['codigo_detectado'] == codigo for c in convenios_detectados):
-                            convenios_detectados.append(convenio)
-                            logging.info(f"CAMBIO DETECTADO: Doc {num_doc} - Código {codigo}")
+                        codigos_vistos.add(codigo)
+                        convenios_detectados.append(convenio)
+                        logging.info(f"CAMBIO DETECTADO: Doc {num_doc} - Código {codigo}")
         
         logging.info(f"Total de convenios detectados: {len(convenios_detectados)}")
         return convenios_detectados   
     
+    def _buscar_patron_cambio(self, texto: str, pos_codigo: int, desde: int = 0) -> Optional[re.Match]:
+        """
+        Primer patrón de cambio (en el orden de patrones_cambio_sumario) que
+        acaba en el código que empieza en pos_codigo, buscado solo en los
+        VENTANA_PATRONES caracteres anteriores (y no antes de 'desde')
+        """
+        inicio_ventana = max(desde, pos_codigo - self.VENTANA_PATRONES)
+        fin_ventana = pos_codigo + 15  # los 14 dígitos y el ')' de cierre
+        for patron in self._patrones_compilados:
+            for match in patron.finditer(texto, inicio_ventana, fin_ventana):
+                if match.start(1) == pos_codigo:
+                    return match
+        return None
+    
     def _es_seccion(self, linea: str) -> bool:
         """Identifica si una línea es una sección (consejería)"""
         return (linea.isupper() and len(linea) > 10 and 
@@ -219,9 +429,36 @@ class ProcesadorInteligenteBOCM:
     Procesador principal que integra la detección inteligente de cambios
     """
     
-    def __init__(self):
+    def __init__(self, usar_registro: bool = True):
         self.detector = DetectorPatronesCambio()
         self.base_conocimiento_file = 'codigos_convenios.json'
+        self.registro = obtener_registro() if usar_registro else None
+    
+    def _detectar_con_registro(self, fecha: str, ruta_sumario: str) -> List[ConvenioDetectado]:
+        """
+        Reutiliza el resultado guardado si ni el sumario ni los patrones han
+        cambiado desde el último análisis de esa fecha. None si el análisis falla.
+        """
+        if not self.registro:
+            return self.detector._analizar(ruta_sumario, fecha)
+        
+        huella_sumario = huella_archivo(ruta_sumario)
+        version = self.detector.version_patrones
+        
+        guardados = self.registro.obtener(fecha, huella_sumario, version)
+        if guardados is not None:
+            logging.info(f"Sumario de {fecha} sin cambios desde el último análisis - se reutiliza el resultado")
+            convenios = [ConvenioDetectado.desde_dict(datos) for datos in guardados]
+            diagnosticar_sumario(fecha, None, convenios, origen='registro')
+            return convenios
+        
+        convenios = self.detector._analizar(ruta_sumario, fecha)
+        if convenios is None:
+            # No se registran los fallos para reintentar en la próxima ejecución
+            return None
+        
+        self.registro.guardar(fecha, huella_sumario, version, [c.a_dict() for c in convenios])
+        return convenios
     
     def procesar_dia(self, fecha: str, ruta_sumario: str) -> Dict:
         """
@@ -232,7 +469,8 @@ class ProcesadorInteligenteBOCM:
             ruta_sumario: Ruta al PDF del sumario
             
         Returns:
-            Resultado del procesamiento
+            Resultado del procesamiento, o None si no se pudo analizar el
+            sumario (no es lo mismo que un día sin convenios)
         """
         resultado = {
             'fecha': fecha,
@@ -246,7 +484,10 @@ class ProcesadorInteligenteBOCM:
         try:
             # 1. Detectar convenios con cambios en el sumario
             logging.info(f"=== PROCESANDO DÍA {fecha} ===")
-            convenios_con_cambios = self.detector.analizar_sumario_dia(ruta_sumario, fecha)
+            convenios_con_cambios = self._detectar_con_registro(fecha, ruta_sumario)
+            if convenios_con_cambios is None:
+                logging.error(f"No se pudo analizar el sumario del día {fecha}")
+                return None
             
             resultado['convenios_detectados'] = len(convenios_con_cambios)
             resultado['convenios_con_cambios'] = len(convenios_con_cambios)
@@ -256,39 +497,34 @@ class ProcesadorInteligenteBOCM:
                 return resultado
             
             # 2. Informar resultados
+            resultado['detalles'] = convenios_con_cambios
             for convenio in convenios_con_cambios:
-                detalle = {
-                    'documento': convenio['id'],
-                    'codigo': convenio['codigo_detectado'],
-                    'tipo_cambio': convenio['razon_cambio'],
-                    'descripcion': convenio['descripcion'][:100] + "..."
-                }
-                resultado['detalles'].append(detalle)
-                
                 logging.info(f"CONVENIO A PROCESAR:")
-                logging.info(f"  - Documento: {convenio['id']}")
-                logging.info(f"  - Código: {convenio['codigo_detectado']}")
-                logging.info(f"  - Tipo: {convenio['razon_cambio']}")
-                logging.info(f"  - URL: {convenio['url']}")
+                logging.info(f"  - Documento: {convenio.documento}")
+                logging.info(f"  - Código: {convenio.codigo}")
+                logging.info(f"  - Tipo: {convenio.tipo_cambio}")
+                logging.info(f"  - URL: {convenio.url}")
             
             return resultado
             
         except Exception as e:
             logging.error(f"Error procesando día {fecha}: {e}")
-            return resultado
+            return None
 
 # Función principal para integrar con el sistema existente
-def procesar_dia_con_detector_inteligente(fecha_str: str, ruta_sumario: str) -> Dict:
+def procesar_dia_con_detector_inteligente(fecha_str: str, ruta_sumario: str, usar_registro: bool = True) -> Dict:
     """
     Función principal que puede ser llamada desde main.py
     
     Args:
         fecha_str: Fecha en formato YYYYMMDD
         ruta_sumario: Ruta al sumario PDF
+        usar_registro: Si es False, se analiza siempre el sumario desde cero
         
     Returns:
-        Diccionario con resultados del procesamiento
+        Diccionario con resultados del procesamiento, o None si no se pudo
+        analizar el sumario
     """
-    procesador = ProcesadorInteligenteBOCM()
+    procesador = ProcesadorInteligenteBOCM(usar_registro=usar_registro)
     return procesador.procesar_dia(fecha_str, ruta_sumario)
 
@@ -0,0 +1,109 @@
+"""
+Diagnósticos opcionales del análisis de sumarios.
+
+Sustituyen a los bloques "DEBUG" que volvían a abrir el sumario con PyPDF2
+antes de analizarlo. Ahora el detector pasa aquí el texto que ya ha
+extraído, así que activarlos no añade ningún análisis del PDF y, desactivados
+(lo normal, DIAGNOSTICOS_ACTIVOS = False), no cuestan nada.
+
+Cada sumario produce un registro en DIAGNOSTICOS_FILE (JSON Lines):
+
+    {"fecha": "20250524", "origen": "analisis", "caracteres": 48211,
+     "menciones_convenio_colectivo": 3, "codigos": ["28001412012025", ...],
+     "total_codigos": 3, "detectados": [...], "muestra": "CONSEJERÍA DE ECONOMÍA ..."}
+
+'origen' indica de dónde salió el resultado: 'analisis' (texto extraído),
+'prefiltro' (descartado sin extraer texto) o 'registro' (reutilizado de
+una ejecución anterior). En los dos últimos no hay texto que describir.
+
+Se activan con --diagnostics en la línea de comandos o con diagnosticos.activar().
+"""
+
+import re
+import json
+import logging
+import threading
+from datetime import datetime
+from typing import Dict, Optional
+
+from config import DIAGNOSTICOS_ACTIVOS, DIAGNOSTICOS_FILE
+
+PATRON_CODIGO = re.compile(r'(?:código)\s*(?:número|numero)?\s*(\d{14})', re.IGNORECASE)
+MAX_CODIGOS = 5
+LONGITUD_MUESTRA = 500
+
+_estado = {'activos': DIAGNOSTICOS_ACTIVOS, 'ruta': DIAGNOSTICOS_FILE, 'mostrar': True}
+_lock = threading.Lock()
+
+
+def activar(ruta: Optional[str] = DIAGNOSTICOS_FILE, mostrar: bool = True):
+    """
+    Args:
+        ruta: Fichero JSONL donde se añaden los registros (None = no se guardan)
+        mostrar: Imprimir además un resumen por pantalla
+    """
+    _estado.update(activos=True, ruta=ruta, mostrar=mostrar)
+
+
+def desactivar():
+    _estado['activos'] = False
+
+
+def activos() -> bool:
+    return _estado['activos']
+
+
+def _muestra(texto: str) -> str:
+    # La sección de Economía es donde aparecen los convenios
+    inicio = max(texto.find('ECONOMÍA'), 0)
+    return ' '.join(texto[inicio:inicio + LONGITUD_MUESTRA].split())
+
+
+def diagnosticar_sumario(fecha: str, texto: Optional[str], detectados, origen: str = 'analisis') -> Optional[Dict]:
+    """
+    Registra el diagnóstico de un sumario ya analizado.
+
+    Args:
+        fecha: Fecha del sumario (YYYYMMDD)
+        texto: Texto extraído por el detector, o None si no se extrajo
+        detectados: ConvenioDetectado resultantes
+        origen: 'analisis', 'prefiltro' o 'registro'
+
+    Returns:
+        El registro emitido, o None si los diagnósticos están desactivados
+    """
+    if not _estado['activos']:
+        return None
+
+    registro = {'fecha': fecha, 'origen': origen, 'momento': datetime.now().isoformat(timespec='seconds')}
+    if texto is not None:
+        codigos = PATRON_CODIGO.findall(texto)
+        registro.update(
+            caracteres=len(texto),
+            menciones_convenio_colectivo=texto.lower().count('convenio colectivo'),
+            codigos=codigos[:MAX_CODIGOS],
+            total_codigos=len(codigos),
+            muestra=_muestra(texto)
+        )
+    registro['detectados'] = [
+        {'documento': d.documento, 'codigo': d.codigo, 'tipo_cambio': d.tipo_cambio} for d in detectados
+    ]
+
+    _emitir(registro)
+    return registro
+
+
+def _emitir(registro: Dict):
+    logging.info(f"Diagnóstico del sumario {registro['fecha']}: {json.dumps(registro, ensure_ascii=False)}")
+    if _estado['ruta']:
+        with _lock, open(_estado['ruta'], 'a', encoding='utf-8') as f:
+            f.write(json.dumps(registro, ensure_ascii=False) + '\n')
+
+    if _estado['mostrar']:
+        print(f"\n🔍 DIAGNÓSTICO {registro['fecha']} ({registro['origen']})")
+        if 'caracteres' in registro:
+            print(f"   Texto extraído: {registro['caracteres']} caracteres")
+            print(f"   Menciones de 'convenio colectivo': {registro['menciones_convenio_colectivo']}")
+            print(f"   Códigos encontrados: {registro['total_codigos']} {registro['codigos']}")
+            print(f"   Muestra: {registro['muestra'][:200]}")
+        print(f"   Convenios con cambios: {len(registro['detectados'])}")
@@ -0,0 +1,132 @@
+# Diario de ejecución para reanudar procesamientos largos (--resume)
+
+import os
+import json
+import logging
+import threading
+from typing import Dict, List, Optional
+
+from config import DIARIO_EJECUCION_FILE
+
+# Etapas de cada documento, en orden
+ETAPAS_DOCUMENTO = ('descargado', 'extraido', 'procesado')
+
+
+def estado_vacio() -> Dict:
+    return {'sumario': None, 'detalles': None, 'documentos': {}, 'completada': False}
+
+
+class DiarioEjecucion:
+    """
+    Anota, según ocurre, lo hecho para cada fecha: si se encontró el
+    sumario, los convenios detectados y la etapa a la que ha llegado cada
+    documento (descargado, extraído, procesado o fallido).
+
+    Es un JSON Lines al que solo se añade: si el programa se cae, lo escrito
+    hasta ese momento sigue valiendo. Al reanudar se lee entero y:
+
+    - las fechas completadas no se vuelven a tocar,
+    - las fechas con detecciones anotadas no vuelven a descargar ni analizar el sumario,
+    - los documentos ya procesados no se vuelven a descargar ni extraer.
+
+    Las fechas sin sumario sí se reintentan: la ausencia pudo deberse a la propia caída.
+    """
+
+    def __init__(self, ruta: Optional[str] = DIARIO_EJECUCION_FILE, reanudar: bool = False):
+        """
+        Args:
+            ruta: Fichero del diario (None = solo en memoria, no se escribe nada)
+            reanudar: Si es False se empieza un diario nuevo (se descarta el anterior)
+        """
+        self.ruta = ruta
+        self.fechas = {}
+        self._lock = threading.Lock()
+        self._fichero = None
+        if ruta is None:
+            return
+        if reanudar:
+            self._cargar()
+        self._fichero = open(ruta, 'a' if reanudar else 'w', encoding='utf-8')
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.cerrar()
+
+    def _cargar(self):
+        if not os.path.exists(self.ruta):
+            return
+        validas = 0
+        with open(self.ruta, 'r', encoding='utf-8') as f:
+            for linea in f:
+                if not linea.endswith('\n'):
+                    break  # última anotación a medias
+                try:
+                    self._aplicar(json.loads(linea))
+                except (ValueError, KeyError) as e:
+                    logging.warning(f"Anotación ilegible en {self.ruta}: {e}")
+                    break
+                validas += len(linea.encode('utf-8'))
+        # Se sigue escribiendo tras la última anotación completa
+        with open(self.ruta, 'r+b') as f:
+            f.truncate(validas)
+
+    def _aplicar(self, anotacion):
+        estado = self.fechas.setdefault(anotacion['fecha'], estado_vacio())
+        evento = anotacion['evento']
+        if evento == 'sumario':
+            estado['sumario'] = anotacion['encontrado']
+        elif evento == 'detecciones':
+            estado['detalles'] = anotacion['detalles']
+        elif evento == 'documento':
+            estado['documentos'][anotacion['fichero']] = anotacion['etapa']
+        elif evento == 'completada':
+            estado['completada'] = True
+
+    def _anotar(self, anotacion, sincronizar=False):
+        with self._lock:
+            self._aplicar(anotacion)
+            if self._fichero is None:
+                return
+            self._fichero.write(json.dumps(anotacion, ensure_ascii=False) + '\n')
+            self._fichero.flush()
+            if sincronizar:
+                os.fsync(self._fichero.fileno())
+
+    # --- Consultas ---
+
+    def estado(self, fecha: str) -> Dict:
+        return self.fechas.get(fecha) or estado_vacio()
+
+    def completada(self, fecha: str) -> bool:
+        return self.estado(fecha)['completada']
+
+    def detecciones(self, fecha: str) -> Optional[List[Dict]]:
+        """Convenios detectados anotados para la fecha (ConvenioDetectado.a_dict), o None"""
+        return self.estado(fecha)['detalles']
+
+    def procesado(self, fecha: str, fichero: str) -> bool:
+        return self.estado(fecha)['documentos'].get(fichero) == 'procesado'
+
+    # --- Anotaciones ---
+
+    def anotar_sumario(self, fecha: str, encontrado: bool):
+        self._anotar({'fecha': fecha, 'evento': 'sumario', 'encontrado': encontrado}, sincronizar=True)
+
+    def anotar_detecciones(self, fecha: str, detalles):
+        self._anotar({'fecha': fecha, 'evento': 'detecciones', 'detalles': [d.a_dict() for d in detalles]},
+                     sincronizar=True)
+
+    def anotar_documento(self, fecha: str, fichero: str, etapa: str):
+        """etapa: una de ETAPAS_DOCUMENTO o 'fallido'"""
+        # 'procesado' es lo que permite saltar el documento al reanudar: a disco ya
+        self._anotar({'fecha': fecha, 'evento': 'documento', 'fichero': fichero, 'etapa': etapa},
+                     sincronizar=etapa == 'procesado')
+
+    def anotar_completada(self, fecha: str):
+        self._anotar({'fecha': fecha, 'evento': 'completada'}, sincronizar=True)
+
+    def cerrar(self):
+        if self._fichero is not None and not self._fichero.closed:
+            self._fichero.close()
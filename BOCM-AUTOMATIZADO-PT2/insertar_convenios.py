@@ -1,160 +1,131 @@
-try:
-    import mysql.connector
-except ImportError:
-    print("mysql-connector-python no instalado. Instala con: pip install mysql-connector-python")
-    mysql = None
-# Verificación de MySQL
-if not mysql:
-    class MockMySQL:
-        class connector:
-            @staticmethod
-            def connect(*args, **kwargs):
-                raise ImportError("mysql-connector-python no disponible. Ejecuta: pip install mysql-connector-python")
-            
-            class Error(Exception):
-                pass
-    
-    mysql = MockMySQL()
-
-import json
+"""
+Punto de entrada a la base de datos de convenios.
 
-#CRUD para la tabla convenios
-def conectar_a_bbdd(silencioso=True):
-    try:
-        
-        conn = mysql.connector.connect(
-            host='localhost',
-            user='root',
-            password='root',
-            database='convenios'
-        )
-        if not silencioso:
-            print("Conexión a la base de datos establecida.")
-        cursor = conn.cursor()
-        return conn, cursor
-    
-    except mysql.connector.Error as err:
-        print(f"Error: {err}")
-        return None, None
-    
-    
-def insertar_convenio(nombre_convenio, id_procedencia, codigo_principal):
-    if nombre_ya_esta(nombre_convenio):
-        trigger_actualizar_convenio(nombre_convenio, id_procedencia, codigo_principal)
-        print(f"El convenio '{nombre_convenio}' ya existe en la base de datos.")
-        return None
-    
-    conn, cursor = conectar_a_bbdd(silencioso=True)
-    query = """
-    INSERT INTO convenios(nombre_convenio, id_procedencia, codigo_principal, codigos_historicos, id_version_actual)
-    VALUES (%s, %s, %s, %s, %s)
+Todas las operaciones pasan por el almacén configurado en config.DB_MOTOR
+(AlmacenMySQL o AlmacenSQLite, ver almacenamiento.py). Las funciones de este
+módulo se mantienen para el código que ya las usaba y delegan en él.
+"""
+
+import threading
+
+from config import DB_MOTOR, DB_TAMANO_LOTE
+from almacenamiento import CAMPOS_VERSION
+from consultas_convenios import obtener_consultas
+
+_almacen = None
+_almacen_lock = threading.Lock()
+
+
+def crear_almacen(motor=None, **kwargs):
     """
-    codigos_historicos = json.dumps([])  # vacío al crear
-    id_version_actual = None  # aún no hay versión
-    params = (nombre_convenio, id_procedencia, codigo_principal, codigos_historicos, id_version_actual)
-    cursor.execute(query, params)
-    conn.commit()
-    print("Convenio insertado correctamente.")
-    return cursor.lastrowid  # devuelve el id_convenio insertado
+    Crea un almacén nuevo del motor indicado ('mysql' o 'sqlite').
 
+    Args:
+        motor: Motor de base de datos; por defecto config.DB_MOTOR
+        **kwargs: Opciones del almacén (config para MySQL, ruta para SQLite, tamano_pool)
+    """
+    motor = motor or DB_MOTOR
+    if motor == 'mysql':
+        from almacen_mysql import AlmacenMySQL
+        return AlmacenMySQL(**kwargs)
+    if motor == 'sqlite':
+        from almacen_sqlite import AlmacenSQLite
+        return AlmacenSQLite(**kwargs)
+    raise ValueError(f"Motor de base de datos desconocido: {motor}")
 
-def nombre_ya_esta(nombre_convenio):
 
-    # Luego verificamos en la base de datos
-    conn, cursor = conectar_a_bbdd(silencioso=True)
-    query = """
-        SELECT 1 FROM convenios 
-        WHERE nombre_convenio = %s
-        LIMIT 1
+def obtener_almacen():
+    """Almacén compartido por todo el programa (se crea al primer uso)"""
+    global _almacen
+    with _almacen_lock:
+        if _almacen is None:
+            _almacen = crear_almacen()
+    return _almacen
+
+
+def cerrar_almacen():
+    """Cierra las conexiones del almacén compartido (al terminar el programa)"""
+    global _almacen
+    with _almacen_lock:
+        if _almacen is not None:
+            _almacen.cerrar()
+            _almacen = None
+
+
+def conexion_bbdd():
+    """
+    Conexión y cursor prestados por el pool del almacén:
+
+        with conexion_bbdd() as (conn, cursor):
+            cursor.execute(...)
+    """
+    return obtener_almacen().conexion()
+
+
+def invalidar_cache_convenios(nombre_convenio=None):
     """
-    cursor.execute(query, (nombre_convenio,))
-    existe = cursor.fetchone() is not None
+    Descarta la caché de convenios conocidos (o solo un convenio) para que se
+    recargue de la base de datos. Llamar cuando otro proceso la haya modificado.
+    """
+    almacen = obtener_almacen()
+    if almacen.cache is not None:
+        almacen.cache.invalidar(nombre_convenio)
+
+
+#CRUD para la tabla convenios
+def insertar_convenio(nombre_convenio, id_procedencia, codigo_principal):
+    return obtener_almacen().insertar_convenio(nombre_convenio, id_procedencia, codigo_principal)
 
-    # Cerramos la conexión
-    cursor.close()
-    conn.close()
 
-    return existe
+def insertar_convenios_lote(convenios, tamano_lote=DB_TAMANO_LOTE):
+    return obtener_almacen().insertar_convenios_lote(convenios, tamano_lote)
+
+
+def ingestar_convenios(convenios, tamano_lote=DB_TAMANO_LOTE):
+    return obtener_almacen().ingestar_convenios(convenios, tamano_lote)
+
+
+def nombre_ya_esta(nombre_convenio):
+    return obtener_almacen().nombre_ya_esta(nombre_convenio)
+
+
+def buscar_convenio(nombre_convenio, codigo_principal=None):
+    return obtener_almacen().buscar_convenio(nombre_convenio, codigo_principal)
 
 
 def trigger_actualizar_convenio(nombre_convenio, id_procedencia, codigo_principal):
-    conn, cursor = conectar_a_bbdd(silencioso=True)
-    # Busca por nombre o por código principal
-    query_select = """
-        SELECT id_convenio FROM convenios
-        WHERE nombre_convenio = %s OR codigo_principal = %s
-        LIMIT 1
-    """
-    cursor.execute(query_select, (nombre_convenio, codigo_principal))
-    row = cursor.fetchone()
-    if row:
-        id_convenio = row[0]
-        # Actualiza los campos que quieras (aquí id_procedencia y codigo_principal)
-        query_update = """
-            UPDATE convenios
-            SET id_procedencia = %s, codigo_principal = %s
-            WHERE id_convenio = %s
-        """
-        cursor.execute(query_update, (id_procedencia, codigo_principal, id_convenio))
-        conn.commit()
-        print(f"Convenio actualizado correctamente (id: {id_convenio}).")
-    else:
-        print("No se encontró convenio para actualizar.")
-    cursor.close()
-    conn.close()
-    
-    
+    return obtener_almacen().trigger_actualizar_convenio(nombre_convenio, id_procedencia, codigo_principal)
+
+
 def insertar_codigo_historico(codigo_principal, nombre_convenio):
-    conn, cursor = conectar_a_bbdd(silencioso=True)
-    
-    # Actualizar el campo codigos_historicos
-    query = """
-    UPDATE convenios
-    SET codigos_historicos = JSON_ARRAY_APPEND(codigos_historicos, '$', %s)
-    WHERE nombre_convenio = %s
-    """
-    
-    params = (codigo_principal, nombre_convenio)
-    
-    cursor.execute(query, params)
-    conn.commit()
-    print("Código histórico insertado correctamente.")
-
-    
+    return obtener_almacen().insertar_codigo_historico(codigo_principal, nombre_convenio)
+
+
 def insertar_convenios_versiones(id_convenio, version_num, codigo_publicado, fecha_publicacion, fecha_inicio_vigencia, fecha_fin_vigencia, etapa_vigencia, resumen, fuente_pdf):
-    conn, cursor = conectar_a_bbdd(silencioso=True)
-    query = """
-    INSERT INTO convenios_versiones (
-        id_convenio, version_num, codigo_publicado, fecha_publicacion, fecha_inicio_vigencia, fecha_fin_vigencia, etapa_vigencia, resumen, fuente_pdf
+    return obtener_almacen().insertar_convenios_versiones(
+        id_convenio, version_num, codigo_publicado, fecha_publicacion, fecha_inicio_vigencia,
+        fecha_fin_vigencia, etapa_vigencia, resumen, fuente_pdf
     )
-    VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s)
-    """
-    params = (id_convenio, version_num, codigo_publicado, fecha_publicacion, fecha_inicio_vigencia, fecha_fin_vigencia, etapa_vigencia, resumen, fuente_pdf)
-    cursor.execute(query, params)
-    conn.commit()
-    print("Convenio_version insertado correctamente.")
-    return cursor.lastrowid  # devuelve el id_version insertado
+
+
+def insertar_convenios_versiones_lote(versiones, tamano_lote=DB_TAMANO_LOTE):
+    return obtener_almacen().insertar_convenios_versiones_lote(versiones, tamano_lote)
+
+
+def guardar_tablas_salariales(id_version, filas):
+    return obtener_almacen().guardar_tablas_salariales(id_version, filas)
+
 
 def actualizar_id_version_actual(id_convenio, id_version):
-    conn, cursor = conectar_a_bbdd(silencioso=True)
-    query = "UPDATE convenios SET id_version_actual = %s WHERE id_convenio = %s"
-    cursor.execute(query, (id_version, id_convenio))
-    conn.commit()
-    print("id_version_actual actualizado correctamente.")
-    
+    return obtener_almacen().actualizar_id_version_actual(id_convenio, id_version)
+
 
 def leer_convenios_versiones():
-    conn, cursor = conectar_a_bbdd(silencioso=True)
-    cursor.execute("SELECT * FROM convenios_versiones;")
-    for fila in cursor.fetchall():
+    # Por páginas: no se carga la tabla entera en memoria
+    for fila in obtener_consultas().recorrer_versiones():
         print(fila)
-        
+
+
 def leer_convenios():
-    conn, cursor = conectar_a_bbdd(silencioso=True)
-    cursor.execute("SELECT * FROM convenios;")
-    for fila in cursor.fetchall():
-        print(fila)        
-        
-    
-
-    
\ No newline at end of file
+    for fila in obtener_consultas().recorrer():
+        print(fila)
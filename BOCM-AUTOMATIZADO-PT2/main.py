@@ -3,9 +3,6 @@ import sys
 from datetime import datetime
 import logging
 import json
-import io
-import re
-import requests
 
 
 # Importar módulos del proyecto
@@ -13,8 +10,24 @@ from config import setup_logging, CONVENIOS_DIR
 from bocm_scraper import BOCMScraper, download_sumario_temp
 from detector_patrones_cambio import procesar_dia_con_detector_inteligente
 from utils import limpiar_archivos_temporales
-from insertar_convenios import insertar_convenio
-import PyPDF2  
+from pipeline_convenios import procesar_convenios
+from resultados_jsonl import SalidaJSONL
+
+
+def procesar_y_mostrar(fecha_str, detalles, scraper):
+    """Procesa los convenios detectados y muestra el resumen y el JSON de salida"""
+    # Cada convenio queda además en resultados/convenios-<fecha>.jsonl según se procesa
+    with SalidaJSONL() as salida:
+        salida.abrir_fecha(fecha_str)
+        resultado = procesar_convenios(fecha_str, detalles, session=scraper.session, al_procesar=salida.escribir)
+    print(f"   💾 Guardados: {resultado.escritos} | "
+          f"Pendientes en disco: {resultado.desbordados} | Rechazados: {resultado.rechazados}")
+    
+    print('\n=== JSON ===')
+    print(json.dumps(resultado.convenios, ensure_ascii=False))
+    
+    print(f"\n✅ Procesados {len(resultado.convenios)} convenios en {resultado.segundos:.1f} s")
+    return resultado
 
 def main():
     """
@@ -48,16 +61,13 @@ def main():
             return
         
         print(f"✅ Sumario descargado: {ruta_sumario_temp}")
-        print("\n🔍 DEBUG: Extrayendo texto del sumario para verificar...")
-        with open(ruta_sumario_temp, 'rb') as f:
-            lector = PyPDF2.PdfReader(f)
-            texto_sample = lector.pages[0].extract_text()[:1000]
-            print("Primeros 1000 caracteres del sumario:")
-            print(texto_sample)
-            print("\n¿Se ven códigos de convenio? Buscar '(Código número XXXXXXXXXXXXXX)'")
         # 2. ANÁLISIS INTELIGENTE - Detectar patrones de cambio
         print("\n🧠 Analizando sumario con detector inteligente...")
         resultado = procesar_dia_con_detector_inteligente(fecha_str, ruta_sumario_temp)
+        if resultado is None:
+            print("❌ No se pudo analizar el sumario del BOCM de hoy.")
+            limpiar_archivos_temporales(ruta_sumario_temp)
+            return
         
         # 3. Mostrar resultados del análisis
         print(f"\n📊 RESULTADOS DEL ANÁLISIS:")
@@ -73,10 +83,10 @@ def main():
         # 4. Mostrar detalles de los cambios detectados
         print(f"\n🎯 CONVENIOS CON CAMBIOS DETECTADOS:")
         for i, detalle in enumerate(resultado.get('detalles', []), 1):
-            print(f"   {i}. Documento: {detalle['documento']}")
-            print(f"      Código: {detalle['codigo']}")
-            print(f"      Tipo: {detalle['tipo_cambio']}")
-            print(f"      Descripción: {detalle['descripcion']}")
+            print(f"   {i}. Documento: {detalle.documento}")
+            print(f"      Código: {detalle.codigo}")
+            print(f"      Tipo: {detalle.tipo_cambio}")
+            print(f"      Descripción: {detalle.resumen()}")
             print()
         
         # 5. Confirmar procesamiento 
@@ -86,69 +96,7 @@ def main():
             if respuesta == 's' or respuesta == 'si':
                 print("\n⬇️ Procesando convenios...")
                 
-                # Lista para el JSON de salida
-                convenios_para_json = []
-                
-                # Procesar cada convenio detectado
-                for detalle in resultado.get('detalles', []):
-                    try:
-                        # 1. Construir URL del PDF individual
-                        year = fecha_hoy.year
-                        month = fecha_hoy.month
-                        day = fecha_hoy.day
-                        
-                        url_pdf = f"https://www.bocm.es/boletin/CM_Orden_BOCM/{year}/{month:02d}/{day:02d}/BOCM-{fecha_str}-{detalle['documento']}.PDF"
-                        
-                        print(f"\n📥 Descargando convenio {detalle['codigo']}...")
-                        
-                        # 2. Descargar PDF
-                        response = requests.get(url_pdf, timeout=30)
-                        if response.status_code != 200:
-                            print(f"   ❌ Error descargando PDF")
-                            continue
-                            
-                        # 3. Extraer nombre del convenio
-                        pdf_file = io.BytesIO(response.content)
-                        reader = PyPDF2.PdfReader(pdf_file)
-                        
-                        # Buscar nombre en las primeras páginas
-                        texto = ""
-                        for i in range(min(3, len(reader.pages))):
-                            texto += reader.pages[i].extract_text()
-                        
-                        # Buscar patrón de nombre
-                        match = re.search(r"convenio colectivo de(?:\s+la)?\s+empresa\s+([^(,\n]+)", texto, re.IGNORECASE)
-                        
-                        if match:
-                            nombre_convenio = match.group(1).strip().replace('\n', ' ')[:200]
-                        else:
-                            nombre_convenio = f"Convenio {detalle['codigo']}"
-                        
-                        # 4. Preparar datos
-                        codigo_principal = detalle['codigo']
-                        id_procedencia = 3  # BOCM
-                        
-                        # 5. Agregar a lista para JSON
-                        convenios_para_json.append({
-                            "fichero": f"BOCM-{fecha_str}-{detalle['documento']}.PDF",
-                            "nombre_convenio": nombre_convenio,
-                            "codigo_principal": codigo_principal,
-                            "id_procedencia": id_procedencia
-                        })
-                        
-                        # 6. Insertar en base de datos
-                        print(f"   📝 Insertando: {nombre_convenio}")
-                        insertar_convenio(nombre_convenio, id_procedencia, codigo_principal)
-                        
-                    except Exception as e:
-                        print(f"   ❌ Error procesando convenio: {e}")
-                        continue
-                
-                # 7. Imprimir JSON
-                print('\n=== JSON ===')
-                print(json.dumps(convenios_para_json, ensure_ascii=False))
-                
-                print(f"\n✅ Procesados {len(convenios_para_json)} convenios")
+                procesar_y_mostrar(fecha_str, resultado.get('detalles', []), scraper)
             else:
                 print("❌ Procesamiento cancelado por el usuario.")
         
@@ -194,52 +142,12 @@ def modo_fecha_especifica():
                 print(f"❌ No se encontró sumario para {fecha_obj.strftime('%d/%m/%Y')}")
                 continue
             
-            # === AÑADIR ESTE DEBUG ===
-            print("\n🔍 DEBUG: Verificando contenido del sumario...")
-            try:
-                import PyPDF2
-                with open(ruta_sumario_temp, 'rb') as f:
-                    lector = PyPDF2.PdfReader(f)
-                    print(f"   Páginas en el PDF: {len(lector.pages)}")
-                    
-                    # Extraer texto de las primeras páginas
-                    texto_completo = ""
-                    for i in range(min(3, len(lector.pages))):
-                        texto_pagina = lector.pages[i].extract_text()
-                        texto_completo += texto_pagina
-                    
-                    # Buscar convenios colectivos
-                    print(f"\n   Buscando 'convenio colectivo' en el texto...")
-                    convenios_encontrados = texto_completo.lower().count('convenio colectivo')
-                    print(f"   Encontradas {convenios_encontrados} menciones de 'convenio colectivo'")
-                    
-                    # Buscar códigos
-                    print(f"\n   Buscando códigos de convenio...")
-                    import re
-                    codigos = re.findall(r'(?:código|Código)\s*(?:número|numero)?\s*(\d{14})', texto_completo, re.IGNORECASE)
-                    print(f"   Códigos encontrados: {len(codigos)}")
-                    if codigos:
-                        for i, codigo in enumerate(codigos[:5], 1):
-                            print(f"      {i}. {codigo}")
-                    
-                    # Mostrar muestra del texto
-                    print(f"\n   MUESTRA DEL TEXTO EXTRAÍDO:")
-                    print("   " + "="*50)
-                    # Buscar sección de Economía
-                    if 'ECONOMÍA' in texto_completo:
-                        indice = texto_completo.find('ECONOMÍA')
-                        muestra = texto_completo[indice:indice+1000].replace('\n', ' ')
-                        print(f"   {muestra}")
-                    else:
-                        print(f"   {texto_completo[:1000].replace(chr(10), ' ')}")
-                    print("   " + "="*50)
-                    
-            except Exception as e:
-                print(f"   Error en debug: {e}")
-            # === FIN DEL DEBUG ===
-            
-            # Procesar con detector inteligente
+            # Procesar con detector inteligente (con DIAGNOSTICOS_ACTIVOS muestra además el texto analizado)
             resultado = procesar_dia_con_detector_inteligente(fecha_input, ruta_sumario_temp)
+            if resultado is None:
+                print(f"❌ No se pudo analizar el sumario del {fecha_obj.strftime('%d/%m/%Y')}")
+                limpiar_archivos_temporales(ruta_sumario_temp)
+                continue
             
             # Mostrar resultados
             print(f"\n📊 RESULTADOS PARA {fecha_obj.strftime('%d/%m/%Y')}:")
@@ -248,7 +156,7 @@ def modo_fecha_especifica():
             if resultado.get('detalles'):
                 print(f"\n📋 DETALLES:")
                 for detalle in resultado['detalles']:
-                    print(f"   - Doc {detalle['documento']}: {detalle['tipo_cambio']} (Código: {detalle['codigo']})")
+                    print(f"   - Doc {detalle.documento}: {detalle.tipo_cambio} (Código: {detalle.codigo})")
             
             # Preguntar si desea procesar los convenios detectados
             if resultado['convenios_con_cambios'] > 0:
@@ -259,82 +167,7 @@ def modo_fecha_especifica():
                 if respuesta == 's' or respuesta == 'si':
                     print("\n⬇️ Procesando convenios...")
                     
-                    # Lista para el JSON de salida
-                    convenios_para_json = []
-                    
-                    # Procesar cada convenio detectado
-                    for detalle in resultado.get('detalles', []):
-                        try:
-                            # 1. Construir URL del PDF individual
-                            fecha_obj = datetime.strptime(fecha_input, '%Y%m%d')
-                            year = fecha_obj.year
-                            month = fecha_obj.month
-                            day = fecha_obj.day
-                            
-                            url_pdf = f"https://www.bocm.es/boletin/CM_Orden_BOCM/{year}/{month:02d}/{day:02d}/BOCM-{fecha_input}-{detalle['documento']}.PDF"
-                            
-                            print(f"\n📥 Descargando convenio {detalle['codigo']}...")
-                            
-                            # 2. Descargar PDF
-                            response = requests.get(url_pdf, timeout=30)
-                            if response.status_code != 200:
-                                print(f"   ❌ Error descargando PDF")
-                                continue
-
-                            nombre_archivo_pdf = f"BOCM-{fecha_input}-{detalle['documento']}.PDF"
-                            ruta_pdf = os.path.join(CONVENIOS_DIR, nombre_archivo_pdf)
-
-                            if not os.path.exists(CONVENIOS_DIR):
-                                os.makedirs(CONVENIOS_DIR)
-
-                            # Guardar el PDF
-                            with open(ruta_pdf, 'wb') as f:
-                                f.write(response.content)
-                            print(f"   💾 PDF guardado en: {ruta_pdf}")
-
-                            # 3. Extraer nombre del convenio
-                            pdf_file = io.BytesIO(response.content)
-                            reader = PyPDF2.PdfReader(pdf_file)
-                            
-                            # Buscar nombre en las primeras páginas
-                            texto = ""
-                            for i in range(min(3, len(reader.pages))):
-                                texto += reader.pages[i].extract_text()
-                            
-                            # Buscar patrón de nombre
-                            import re
-                            match = re.search(r"convenio colectivo de(?:\s+la)?\s+empresa\s+([^(,\n]+)", texto, re.IGNORECASE)
-                            
-                            if match:
-                                nombre_convenio = match.group(1).strip().replace('\n', ' ')[:200]
-                            else:
-                                nombre_convenio = f"Convenio {detalle['codigo']}"
-                            
-                            # 4. Preparar datos
-                            codigo_principal = detalle['codigo']
-                            id_procedencia = 3  # BOCM
-                            
-                            # 5. Agregar a lista para JSON
-                            convenios_para_json.append({
-                                "fichero": f"BOCM-{fecha_input}-{detalle['documento']}.PDF",
-                                "nombre_convenio": nombre_convenio,
-                                "codigo_principal": codigo_principal,
-                                "id_procedencia": id_procedencia
-                            })
-                            
-                            # 6. Insertar en base de datos
-                            print(f"   📝 Insertando: {nombre_convenio}")
-                            insertar_convenio(nombre_convenio, id_procedencia, codigo_principal)
-                            
-                        except Exception as e:
-                            print(f"   ❌ Error procesando convenio: {e}")
-                            continue
-                    
-                    # 7. Imprimir JSON (como hace tu compañero)
-                    print('\n=== JSON ===')
-                    print(json.dumps(convenios_para_json, ensure_ascii=False))
-                    
-                    print(f"\n✅ Procesados {len(convenios_para_json)} convenios")
+                    procesar_y_mostrar(fecha_input, resultado.get('detalles', []), scraper)
                 else:
                     print("❌ Procesamiento cancelado")
             
@@ -350,6 +183,11 @@ def modo_fecha_especifica():
 
 
 if __name__ == "__main__":
+    # Con argumentos (--date, --yes, ...) se ejecuta sin menú: ver cli.py
+    if len(sys.argv) > 1:
+        import cli
+        sys.exit(cli.main(sys.argv[1:]))
+    
     print("🤖 BOCM AUTOMATIZADO - DETECTOR INTELIGENTE")
     print("=" * 50)
     print("1. Procesar HOY")
@@ -0,0 +1,317 @@
+"""
+Procesamiento de los convenios detectados en un día.
+
+procesar_convenios(fecha, detalles) es el único camino para descargar,
+extraer y guardar convenios: lo usan main() y modo_fecha_especifica() y
+cualquier modo por lotes que se añada.
+
+Tres etapas unidas por colas acotadas, para que un día con muchos convenios
+tarde lo que el documento más lento y no la suma de todos:
+
+1. Descarga: PIPELINE_DESCARGAS hilos con una sesión HTTP compartida
+   (las conexiones a bocm.es se reutilizan y el control de tráfico
+   común reparte el ritmo con el resto de peticiones).
+2. Extracción: nombre y tablas salariales del PDF en un pool de procesos
+   (PyPDF2 y las expresiones regulares son CPU y no se reparten bien entre hilos).
+3. Guardado: ColaEscritura, que escribe por lotes en segundo plano.
+
+Si la descarga va más rápida que la extracción, los hilos esperan a que haya
+sitio en la cola (PIPELINE_COLA_MAX PDFs en memoria como máximo). Los
+convenios se guardan y se devuelven en el orden del sumario. Los PDFs ya
+descargados en directorio_pdfs no se vuelven a pedir.
+"""
+
+import io
+import os
+import re
+import time
+import queue
+import logging
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, wait, FIRST_COMPLETED
+from typing import Callable, Dict, List, NamedTuple, Optional
+
+import requests
+
+from config import (CONVENIOS_DIR, ID_PROCEDENCIA, PIPELINE_DESCARGAS, PIPELINE_PROCESOS,
+                    PIPELINE_COLA_MAX, PIPELINE_TIMEOUT)
+from tablas_salariales import extraer_tablas_salariales
+from cola_escritura import ColaEscritura
+from insertar_convenios import obtener_almacen
+from cliente_http import obtener_cliente
+
+try:
+    import PyPDF2
+except ImportError:
+    PyPDF2 = None
+
+PATRON_NOMBRE = re.compile(r"convenio colectivo de(?:\s+la)?\s+empresa\s+([^(,\n]+)", re.IGNORECASE)
+
+
+def extraer_convenio(contenido: bytes, codigo: str, ejercicio: int) -> Dict:
+    """
+    Nombre y tablas salariales de un PDF de convenio.
+
+    Se ejecuta en los procesos del pool: recibe y devuelve solo datos
+    serializables.
+    """
+    lector = PyPDF2.PdfReader(io.BytesIO(contenido))
+    paginas = [pagina.extract_text() or '' for pagina in lector.pages]
+
+    # El nombre está en las primeras páginas; las tablas suelen ir en los anexos del final
+    texto = ''.join(paginas[:3])
+    match = PATRON_NOMBRE.search(texto)
+    if match:
+        nombre_convenio = match.group(1).strip().replace('\n', ' ')[:200]
+    else:
+        nombre_convenio = f"Convenio {codigo}"
+
+    filas = extraer_tablas_salariales('\n'.join([texto] + paginas[3:]), ejercicio)
+    return {'nombre_convenio': nombre_convenio, 'tablas_salariales': [fila.a_dict() for fila in filas]}
+
+
+def _ejecutor_extraccion(procesos):
+    # procesos=0: en un hilo del propio proceso (depuración, entornos sin multiprocessing)
+    if procesos == 0:
+        return ThreadPoolExecutor(max_workers=1)
+    return ProcessPoolExecutor(max_workers=procesos)
+
+
+class ResultadoProceso(NamedTuple):
+    """Resumen de procesar_convenios()"""
+    convenios: List[Dict]   # para el JSON de salida, en el orden del sumario (vacía si conservar_convenios=False)
+    procesados: int
+    fallidos: int           # no se pudieron descargar, leer o entregar
+    escritos: int           # guardados en la base de datos
+    desbordados: int        # pendientes en disco (base no disponible)
+    rechazados: int         # la base no los acepta
+    segundos: float
+
+
+def procesar_convenios(fecha: str, detalles, session: Optional[requests.Session] = None,
+                       descargas: int = PIPELINE_DESCARGAS, procesos: Optional[int] = PIPELINE_PROCESOS,
+                       directorio_pdfs: Optional[str] = CONVENIOS_DIR, persistir: bool = True, almacen=None,
+                       al_procesar: Optional[Callable[[Dict], None]] = None,
+                       conservar_convenios: bool = True,
+                       al_etapa: Optional[Callable[[object, str], None]] = None) -> ResultadoProceso:
+    """
+    Descarga, extrae y guarda los convenios detectados en el sumario de un día.
+
+    Args:
+        fecha: Fecha del sumario (YYYYMMDD)
+        detalles: ConvenioDetectado del día
+        session: Sesión HTTP a reutilizar (p. ej. BOCMScraper().session)
+        descargas: Descargas simultáneas
+        procesos: Procesos de extracción (None = uno por CPU, 0 = sin procesos)
+        directorio_pdfs: Donde se guarda (y se reutiliza) cada PDF; None = no se guardan
+        persistir: Si es False no se escribe en la base de datos
+        almacen: AlmacenConvenios donde guardar (por defecto el de config.DB_MOTOR)
+        al_procesar: Se llama con cada convenio (con su versión y tablas
+                     salariales) en el orden del sumario
+        conservar_convenios: Si es False el resultado no guarda la lista de
+                             convenios (ejecuciones largas que ya los reciben en al_procesar)
+        al_etapa: Se llama con (detalle, etapa) cuando un documento queda
+                  'descargado', 'extraido', 'procesado' o 'fallido'
+
+    Returns:
+        ResultadoProceso
+    """
+    inicio = time.monotonic()
+    detalles = list(detalles)
+    por_fichero = {detalle.fichero: detalle for detalle in detalles}
+
+    def al_guardar(lote):
+        # Con base de datos, un documento está 'procesado' cuando la cola ya no lo tiene solo en memoria
+        for convenio in lote:
+            if al_etapa and convenio.get('fichero') in por_fichero:
+                al_etapa(por_fichero[convenio['fichero']], 'procesado')
+
+    destinos = [al_procesar] if al_procesar else []
+    cola = ColaEscritura(almacen or obtener_almacen(), al_guardar=al_guardar) if persistir else None
+    if cola:
+        destinos.append(cola.encolar)
+
+    try:
+        logging.info(f"Procesando {len(detalles)} convenios del {fecha}")
+        convenios, procesados = _procesar_etapas(detalles, destinos, session, descargas, procesos, directorio_pdfs,
+                                                 conservar_convenios, al_etapa if not persistir else None,
+                                                 al_etapa)
+    finally:
+        if cola:
+            # Esperar a que la cola termine de guardar en la base de datos
+            if cola.pendientes():
+                print(f"\n💾 Terminando de guardar {cola.pendientes()} convenios en la base de datos...")
+            cola.cerrar()
+
+    estadisticas = cola.estadisticas() if cola else {}
+    return ResultadoProceso(
+        convenios=convenios,
+        procesados=procesados,
+        fallidos=len(detalles) - procesados,
+        escritos=estadisticas.get('escritos', 0),
+        desbordados=estadisticas.get('desbordados', 0),
+        rechazados=estadisticas.get('rechazados', 0),
+        segundos=time.monotonic() - inicio
+    )
+
+
+def _leer_pdf_guardado(directorio_pdfs, detalle):
+    if not directorio_pdfs:
+        return None
+    ruta_pdf = os.path.join(directorio_pdfs, detalle.fichero)
+    if not os.path.exists(ruta_pdf) or os.path.getsize(ruta_pdf) == 0:
+        return None
+    with open(ruta_pdf, 'rb') as f:
+        return f.read()
+
+
+def _procesar_etapas(detalles, destinos, session, descargas, procesos, directorio_pdfs, conservar_convenios,
+                     al_entregar, al_etapa):
+    session = session or obtener_cliente()
+
+    def anotar(detalle, etapa, aviso=None):
+        aviso = aviso or al_etapa
+        if aviso:
+            try:
+                aviso(detalle, etapa)
+            except Exception as e:
+                logging.error(f"Error anotando {detalle.fichero} como {etapa}: {e}")
+
+    descargados = queue.Queue(maxsize=PIPELINE_COLA_MAX)
+    if directorio_pdfs:
+        os.makedirs(directorio_pdfs, exist_ok=True)
+
+    def descargar(indice, detalle):
+        contenido = None
+        try:
+            try:
+                contenido = _leer_pdf_guardado(directorio_pdfs, detalle)
+            except OSError as e:
+                logging.warning(f"No se puede leer el PDF guardado de {detalle.fichero}, se descarga de nuevo: {e}")
+            if contenido is not None:
+                print(f"\n📂 Convenio {detalle.codigo} ya descargado")
+                return
+            print(f"\n📥 Descargando convenio {detalle.codigo}...")
+            response = session.get(detalle.url, timeout=PIPELINE_TIMEOUT)
+            if response.status_code != 200:
+                print(f"   ❌ Error descargando PDF {detalle.fichero}")
+            else:
+                contenido = response.content
+                if directorio_pdfs:
+                    # Escritura atómica: un PDF a medias no se reutilizaría bien después
+                    ruta_pdf = os.path.join(directorio_pdfs, detalle.fichero)
+                    with open(ruta_pdf + '.tmp', 'wb') as f:
+                        f.write(contenido)
+                    os.replace(ruta_pdf + '.tmp', ruta_pdf)
+                    print(f"   💾 PDF guardado en: {ruta_pdf}")
+        except Exception as e:
+            logging.error(f"Error descargando {detalle.url}: {e}")
+            print(f"   ❌ Error descargando {detalle.fichero}: {e}")
+        finally:
+            # Siempre una entrada por documento: el bucle principal cuenta con recibirlas todas
+            anotar(detalle, 'fallido' if contenido is None else 'descargado')
+            # Espera si la extracción va por detrás
+            descargados.put((indice, contenido))
+
+    procesados = {}  # indice -> convenio para el JSON, o None si falló
+    siguiente = 0
+    resultado = []
+    entregados = 0
+
+    def entregar():
+        # Se encola en el orden del sumario: dos cambios del mismo convenio el
+        # mismo día deben guardarse en orden
+        nonlocal siguiente, entregados
+        while siguiente in procesados:
+            entrada = procesados.pop(siguiente)
+            if entrada is not None:
+                convenio, extra = entrada
+                # Un destino que falla no debe parar el bucle: las descargas esperan a que se vacíe la cola
+                entregado = True
+                for destino in destinos:
+                    try:
+                        destino(dict(convenio, **extra))
+                    except Exception as e:
+                        entregado = False
+                        logging.error(f"Error entregando {convenio['fichero']}: {e}")
+                        print(f"   ❌ Error guardando convenio {convenio['codigo_principal']}: {e}")
+                if entregado:
+                    entregados += 1
+                    if conservar_convenios:
+                        resultado.append(convenio)
+                if not entregado:
+                    anotar(detalles[siguiente], 'fallido')
+                elif al_entregar:
+                    anotar(detalles[siguiente], 'procesado', al_entregar)
+            siguiente += 1
+
+    with ThreadPoolExecutor(max_workers=descargas, thread_name_prefix='descarga') as hilos, \
+            _ejecutor_extraccion(procesos) as extraccion:
+        en_descarga = [hilos.submit(descargar, indice, detalle) for indice, detalle in enumerate(detalles)]
+        try:
+            _consumir(detalles, descargados, extraccion, procesados, entregar, anotar)
+        except BaseException:
+            # Sin nadie que lea la cola, los hilos que esperan sitio en ella no
+            # terminarían y el cierre del ThreadPoolExecutor se quedaría colgado
+            hilos.shutdown(wait=False, cancel_futures=True)
+            while not all(futuro.done() for futuro in en_descarga):
+                try:
+                    descargados.get(timeout=0.05)
+                except queue.Empty:
+                    pass
+            raise
+
+    return resultado, entregados
+
+
+def _consumir(detalles, descargados, extraccion, procesados, entregar, anotar):
+    # Recibe las descargas, las manda a extraer y entrega lo que ya está listo
+    en_extraccion = {}
+    recibidos = 0
+    while recibidos < len(detalles) or en_extraccion:
+        if recibidos < len(detalles):
+            try:
+                indice, contenido = descargados.get(timeout=0.05)
+                recibidos += 1
+                if contenido is None:
+                    procesados[indice] = None
+                else:
+                    detalle = detalles[indice]
+                    futuro = extraccion.submit(extraer_convenio, contenido, detalle.codigo, int(detalle.fecha[:4]))
+                    en_extraccion[futuro] = indice
+            except queue.Empty:
+                pass
+        elif en_extraccion:
+            wait(en_extraccion, return_when=FIRST_COMPLETED)
+
+        for futuro in [f for f in en_extraccion if f.done()]:
+            indice = en_extraccion.pop(futuro)
+            detalle = detalles[indice]
+            try:
+                extraido = futuro.result()
+            except Exception as e:
+                logging.error(f"Error extrayendo {detalle.fichero}: {e}")
+                print(f"   ❌ Error procesando convenio {detalle.codigo}: {e}")
+                anotar(detalle, 'fallido')
+                procesados[indice] = None
+                continue
+
+            anotar(detalle, 'extraido')
+            if extraido['tablas_salariales']:
+                print(f"   💶 Tablas salariales de {detalle.codigo}: {len(extraido['tablas_salariales'])} importes")
+            print(f"   📝 Preparado: {extraido['nombre_convenio']}")
+            convenio = {
+                "fichero": detalle.fichero,
+                "nombre_convenio": extraido['nombre_convenio'],
+                "codigo_principal": detalle.codigo,
+                "id_procedencia": ID_PROCEDENCIA
+            }
+            # Los destinos reciben además la versión: fecha, tipo de cambio, documento y tablas salariales
+            procesados[indice] = (convenio, {
+                'fecha_publicacion': detalle.fecha,
+                'tipo_cambio': detalle.tipo_cambio,
+                'resumen': detalle.resumen(),
+                'fuente_pdf': detalle.url,
+                'tablas_salariales': extraido['tablas_salariales'],
+            })
+
+        entregar()
@@ -0,0 +1,264 @@
+"""
+Modo vigilancia: espera a que se publique el BOCM del día y lo procesa en cuanto aparece.
+
+    python main.py --watch
+
+Empieza a sondear a PLANIFICADOR_HORA_INICIO. Cada sondeo es barato: solo
+se piden (HEAD) las URLs del boletín que toca, deducido del número del
+último sumario localizado; la búsqueda completa de get_sumario_url queda
+para cuando no hay número de referencia y, como red de seguridad, cada
+PLANIFICADOR_BUSQUEDA_COMPLETA_CADA sondeos.
+
+El intervalo entre sondeos es el mínimo cerca de la hora habitual de
+publicación (la mediana de las últimas registradas) y crece de forma
+exponencial lejos de ella, hasta PLANIFICADOR_INTERVALO_MAX.
+
+Por cada día se añade una línea a PLANIFICADOR_METRICAS_FILE:
+
+    {"fecha": "20250524", "publicado": "2025-05-24T07:41:10", "publicado_estimado": false,
+     "detectado": "2025-05-24T07:41:52", "procesado": "2025-05-24T07:43:05",
+     "latencia_deteccion": 42.0, "latencia_total": 115.0, "sondeos": 9, "convenios": 3}
+
+'publicado' es la cabecera Last-Modified del sumario; si el servidor no la
+envía se toma el último sondeo sin sumario ('publicado_estimado'), con lo
+que la latencia queda acotada por arriba.
+"""
+
+import os
+import json
+import time
+import logging
+import statistics
+from datetime import datetime, timedelta
+from email.utils import parsedate_to_datetime
+from typing import Callable, Dict, List, Optional, Tuple
+
+import requests
+
+from config import (
+    PLANIFICADOR_HORA_INICIO, PLANIFICADOR_HORA_LIMITE, PLANIFICADOR_INTERVALO_MIN,
+    PLANIFICADOR_INTERVALO_MAX, PLANIFICADOR_FACTOR, PLANIFICADOR_MARGEN,
+    PLANIFICADOR_BUSQUEDA_COMPLETA_CADA, PLANIFICADOR_ESTADO_FILE, PLANIFICADOR_METRICAS_FILE
+)
+from bocm_scraper import ScraperError, urls_sumario, url_sumario_fin_de_semana
+
+HISTORIAL_HORAS = 20        # Horas de publicación recordadas para calcular la habitual
+MAX_DIAS_PREVISION = 7      # Con una referencia más antigua se hace la búsqueda completa
+TIMEOUT_SONDEO = 5
+
+
+def _a_hora(fecha: datetime, hora: str) -> datetime:
+    horas, minutos = hora.split(':')
+    return fecha.replace(hour=int(horas), minute=int(minutos), second=0, microsecond=0)
+
+
+def _segundos(desde: Optional[datetime], hasta: datetime) -> Optional[float]:
+    return round((hasta - desde).total_seconds(), 1) if desde else None
+
+
+class Planificador:
+    """
+    Sondea el sumario del día y lanza el procesamiento al encontrarlo.
+
+    'procesar' recibe la fecha (datetime) y devuelve lo mismo que
+    cli.procesar_fecha. 'ahora' y 'dormir' se pueden sustituir (pruebas).
+    """
+
+    def __init__(self, scraper, procesar: Callable, ruta_estado: Optional[str] = PLANIFICADOR_ESTADO_FILE,
+                 ruta_metricas: Optional[str] = PLANIFICADOR_METRICAS_FILE,
+                 ahora: Callable[[], datetime] = datetime.now, dormir: Callable[[float], None] = time.sleep):
+        self.scraper = scraper
+        self.procesar = procesar
+        self.ruta_estado = ruta_estado
+        self.ruta_metricas = ruta_metricas
+        self.ahora = ahora
+        self.dormir = dormir
+        self.estado = self._cargar_estado()
+
+    # --- Estado entre ejecuciones: último boletín y horas de publicación ---
+
+    def _cargar_estado(self) -> Dict:
+        if self.ruta_estado and os.path.exists(self.ruta_estado):
+            try:
+                with open(self.ruta_estado, 'r', encoding='utf-8') as f:
+                    return json.load(f)
+            except Exception as e:
+                logging.error(f"Error al cargar el estado del planificador: {e}")
+        return {'ultimo': None, 'horas_publicacion': []}
+
+    def _guardar_estado(self):
+        if not self.ruta_estado:
+            return
+        ruta_temporal = self.ruta_estado + '.tmp'
+        try:
+            with open(ruta_temporal, 'w', encoding='utf-8') as f:
+                json.dump(self.estado, f, ensure_ascii=False, indent=2)
+            os.replace(ruta_temporal, self.ruta_estado)
+        except Exception as e:
+            logging.error(f"Error al guardar el estado del planificador: {e}")
+
+    def hora_habitual(self, fecha: datetime) -> datetime:
+        """Mediana de las últimas horas de publicación (sin historial, la hora de inicio)"""
+        minutos = [int(h[:2]) * 60 + int(h[3:]) for h in self.estado['horas_publicacion']]
+        if not minutos:
+            return _a_hora(fecha, PLANIFICADOR_HORA_INICIO)
+        mediana = int(statistics.median(minutos))
+        return fecha.replace(hour=mediana // 60, minute=mediana % 60, second=0, microsecond=0)
+
+    def urls_previstas(self, fecha: datetime) -> List[Tuple[str, int]]:
+        """URLs (con su número de boletín) que puede tener el sumario de la fecha, o [] sin referencia"""
+        ultimo = self.estado['ultimo']
+        if not ultimo:
+            return []
+        fecha_ultimo = datetime.strptime(ultimo['fecha'], '%Y%m%d')
+        dias = (fecha.date() - fecha_ultimo.date()).days
+        if not 0 < dias <= MAX_DIAS_PREVISION:
+            return []
+        # La numeración empieza de nuevo cada año; un boletín extraordinario adelanta uno más
+        primero = 1 if fecha.year != fecha_ultimo.year else ultimo['numero'] + 1
+        ultimo_posible = (fecha - datetime(fecha.year, 1, 1)).days + 1 if primero == 1 else ultimo['numero'] + dias + 1
+        previstas = []
+        for numero in range(primero, ultimo_posible + 1):
+            if fecha.weekday() >= 5:
+                previstas.append((url_sumario_fin_de_semana(fecha, numero), numero))
+            previstas.extend((url, numero) for url in urls_sumario(fecha, numero))
+        return previstas
+
+    # --- Sondeo ---
+
+    def _sondeo_barato(self, fecha: datetime) -> Optional[Tuple[str, int, Optional[datetime]]]:
+        for url, numero in self.urls_previstas(fecha):
+            try:
+                respuesta = self.scraper.session.head(url, timeout=TIMEOUT_SONDEO, allow_redirects=True)
+            except Exception as e:
+                logging.debug(f"Sondeo fallido de {url}: {e}")
+                continue
+            if respuesta.status_code == 200:
+                return url, numero, self._ultima_modificacion(respuesta)
+        return None
+
+    def _ultima_modificacion(self, respuesta) -> Optional[datetime]:
+        cabecera = respuesta.headers.get('Last-Modified')
+        if not cabecera:
+            return None
+        try:
+            return parsedate_to_datetime(cabecera).astimezone().replace(tzinfo=None)
+        except (TypeError, ValueError):
+            return None
+
+    def _busqueda_completa(self, fecha: datetime) -> Optional[Tuple[str, int, Optional[datetime]]]:
+        try:
+            url = self.scraper.get_sumario_url(fecha)
+        except ScraperError:
+            return None
+        except requests.RequestException as e:
+            # bocm.es no responde: se vuelve a intentar en el siguiente sondeo
+            logging.warning(f"Búsqueda del sumario del {fecha.strftime('%Y%m%d')} interrumpida: {e}")
+            return None
+        return url, self.scraper.sumarios[fecha.strftime('%Y%m%d')][1], None
+
+    def _cerca_de_la_hora_habitual(self, momento: datetime) -> bool:
+        return abs((momento - self.hora_habitual(momento)).total_seconds()) <= PLANIFICADOR_MARGEN
+
+    def _dormir_hasta(self, momento: datetime):
+        espera = (momento - self.ahora()).total_seconds()
+        if espera > 0:
+            self.dormir(espera)
+
+    def esperar_sumario(self, fecha: datetime) -> Optional[Dict]:
+        """
+        Sondea hasta que aparece el sumario de la fecha o se llega a la hora límite.
+
+        Returns:
+            {'url', 'numero', 'publicado', 'publicado_estimado', 'detectado', 'sondeos'}, o None
+        """
+        self._dormir_hasta(_a_hora(fecha, PLANIFICADOR_HORA_INICIO))
+        limite = _a_hora(fecha, PLANIFICADOR_HORA_LIMITE)
+        sondeos = fallos_lejos = 0
+        ultimo_sin_sumario = None
+
+        while True:
+            sondeos += 1
+            previstas = bool(self.urls_previstas(fecha))
+            encontrado = self._sondeo_barato(fecha) if previstas else None
+            if not encontrado and (not previstas or sondeos % PLANIFICADOR_BUSQUEDA_COMPLETA_CADA == 0):
+                encontrado = self._busqueda_completa(fecha)
+            momento = self.ahora()
+
+            if encontrado:
+                url, numero, publicado = encontrado
+                logging.info(f"Sumario del {fecha.strftime('%Y%m%d')} localizado en el sondeo {sondeos}: {url}")
+                return {'url': url, 'numero': numero, 'publicado': publicado or ultimo_sin_sumario,
+                        'publicado_estimado': publicado is None, 'detectado': momento, 'sondeos': sondeos}
+
+            ultimo_sin_sumario = momento
+            if momento >= limite:
+                logging.info(f"Sin sumario del {fecha.strftime('%Y%m%d')} a la hora límite tras {sondeos} sondeos")
+                return None
+            if self._cerca_de_la_hora_habitual(momento):
+                fallos_lejos = 0
+                intervalo = PLANIFICADOR_INTERVALO_MIN
+            else:
+                fallos_lejos += 1
+                intervalo = min(PLANIFICADOR_INTERVALO_MAX, PLANIFICADOR_INTERVALO_MIN * PLANIFICADOR_FACTOR ** fallos_lejos)
+            self.dormir(min(intervalo, max((limite - momento).total_seconds(), 0)))
+
+    # --- Un día completo ---
+
+    def procesar_dia(self, fecha: datetime) -> Optional[Dict]:
+        """Espera el sumario, lo procesa y registra la métrica de latencia. None si no se publicó."""
+        fecha_str = fecha.strftime('%Y%m%d')
+        print(f"\n⏰ Esperando el BOCM del {fecha.strftime('%d/%m/%Y')} (desde las {PLANIFICADOR_HORA_INICIO})")
+        sumario = self.esperar_sumario(fecha)
+        if sumario is None:
+            print(f"   ℹ️  No se ha publicado BOCM el {fecha.strftime('%d/%m/%Y')} antes de las {PLANIFICADOR_HORA_LIMITE}")
+            return None
+
+        # El procesamiento usa la URL ya localizada en lugar de buscarla de nuevo
+        self.scraper.sumarios[fecha_str] = (sumario['url'], sumario['numero'])
+        self.estado['ultimo'] = {'fecha': fecha_str, 'numero': sumario['numero']}
+        if sumario['publicado'] and not sumario['publicado_estimado']:
+            horas = self.estado['horas_publicacion'] + [sumario['publicado'].strftime('%H:%M')]
+            self.estado['horas_publicacion'] = horas[-HISTORIAL_HORAS:]
+        self._guardar_estado()
+
+        resultado = self.procesar(fecha)
+        procesado = self.ahora()
+
+        metrica = {
+            'fecha': fecha_str,
+            'publicado': sumario['publicado'].isoformat(timespec='seconds') if sumario['publicado'] else None,
+            'publicado_estimado': sumario['publicado_estimado'],
+            'detectado': sumario['detectado'].isoformat(timespec='seconds'),
+            'procesado': procesado.isoformat(timespec='seconds'),
+            'latencia_deteccion': _segundos(sumario['publicado'], sumario['detectado']),
+            'latencia_total': _segundos(sumario['publicado'], procesado),
+            'sondeos': sumario['sondeos'],
+            'convenios': resultado.procesados if resultado else 0
+        }
+        self._registrar_metrica(metrica)
+        return metrica
+
+    def _registrar_metrica(self, metrica: Dict):
+        logging.info(f"Latencia desde la publicación: {json.dumps(metrica, ensure_ascii=False)}")
+        if self.ruta_metricas:
+            with open(self.ruta_metricas, 'a', encoding='utf-8') as f:
+                f.write(json.dumps(metrica, ensure_ascii=False) + '\n')
+        if metrica['latencia_deteccion'] is not None:
+            cota = "≤ " if metrica['publicado_estimado'] else ""
+            print(f"   ⏱️ Detectado {cota}{metrica['latencia_deteccion']:.0f} s tras la publicación, "
+                  f"procesado {cota}{metrica['latencia_total']:.0f} s tras ella ({metrica['sondeos']} sondeos)")
+
+    def vigilar(self, dias: Optional[int] = None):
+        """Procesa un día tras otro, empezando por hoy ('dias' = cuántos; None = sin fin)"""
+        fecha = self.ahora().replace(hour=0, minute=0, second=0, microsecond=0)
+        hechos = 0
+        while dias is None or hechos < dias:
+            try:
+                self.procesar_dia(fecha)
+            except Exception as e:
+                # Un día con problemas no detiene la vigilancia; --resume lo completa después
+                logging.error(f"Error procesando el BOCM del {fecha.strftime('%Y%m%d')}: {e}")
+                print(f"❌ Error procesando el {fecha.strftime('%d/%m/%Y')}: {e}")
+            hechos += 1
+            fecha += timedelta(days=1)
@@ -0,0 +1,152 @@
+# Pool de conexiones a la base de datos
+
+import time
+import logging
+import threading
+from contextlib import contextmanager
+
+
+class PoolAgotadoError(Exception):
+    """No se liberó ninguna conexión en el tiempo de espera"""
+    pass
+
+
+class PoolConexiones:
+    """
+    Pool de conexiones reutilizables.
+
+    Las conexiones se crean bajo demanda hasta 'tamano' y se devuelven al
+    pool al salir del bloque 'with', aunque haya excepciones, y siempre sin
+    transacción abierta. Antes de entregar una conexión que lleva más de
+    'validar_tras' segundos sin usarse se comprueba con 'validar'; si no
+    responde se descarta y se abre otra.
+    """
+
+    def __init__(self, fabrica, tamano=5, validar=None, validar_tras=30.0, espera_max=30.0):
+        """
+        Args:
+            fabrica: Función sin argumentos que abre una conexión nueva
+            tamano: Número máximo de conexiones abiertas a la vez
+            validar: Función conexión -> bool para comprobar que sigue viva
+            validar_tras: Segundos de inactividad a partir de los que se valida
+            espera_max: Segundos a esperar por una conexión libre
+        """
+        self.fabrica = fabrica
+        self.tamano = tamano
+        self.validar = validar
+        self.validar_tras = validar_tras
+        self.espera_max = espera_max
+
+        # LIFO: se reutiliza primero la conexión usada más recientemente.
+        # Las libres y las abiertas van bajo la misma condición para que quien
+        # espera despierte tanto al devolverse una conexión como al descartarse
+        # una (queda un hueco para abrir otra)
+        self._libres = []
+        self._abiertas = 0
+        self._condicion = threading.Condition()
+        self._cerrado = False
+
+    def _descartar(self, conn):
+        with self._condicion:
+            self._abiertas -= 1
+            self._condicion.notify()
+        try:
+            conn.close()
+        except Exception:
+            pass
+
+    def _esta_viva(self, conn, ultimo_uso) -> bool:
+        if not self.validar or time.monotonic() - ultimo_uso < self.validar_tras:
+            return True
+        try:
+            return self.validar(conn)
+        except Exception:
+            return False
+
+    def _reservar(self):
+        """(conexión libre, último uso), o (None, None) si hay hueco para abrir una nueva"""
+        limite = time.monotonic() + self.espera_max
+        with self._condicion:
+            while True:
+                if self._cerrado:
+                    raise PoolAgotadoError("El pool de conexiones está cerrado")
+                if self._libres:
+                    return self._libres.pop()
+                if self._abiertas < self.tamano:
+                    self._abiertas += 1
+                    return None, None
+                restante = limite - time.monotonic()
+                if restante <= 0:
+                    raise PoolAgotadoError(f"Sin conexiones libres tras {self.espera_max}s (tamaño {self.tamano})")
+                self._condicion.wait(restante)
+
+    def _obtener(self):
+        while True:
+            conn, ultimo_uso = self._reservar()
+            if conn is None:
+                try:
+                    return self.fabrica()
+                except Exception:
+                    with self._condicion:
+                        self._abiertas -= 1
+                        self._condicion.notify()
+                    raise
+
+            if self._esta_viva(conn, ultimo_uso):
+                return conn
+
+            logging.warning("Conexión inactiva sin respuesta - se descarta y se abre otra")
+            self._descartar(conn)
+
+    def _devolver(self, conn):
+        with self._condicion:
+            if not self._cerrado:
+                self._libres.append((conn, time.monotonic()))
+                self._condicion.notify()
+                return
+        self._descartar(conn)
+
+    @contextmanager
+    def conexion(self):
+        """
+        Presta una conexión y un cursor durante el bloque 'with'.
+
+        Al salir, con o sin excepción, se hace rollback de lo no confirmado:
+        sin autocommit, una conexión devuelta con la transacción abierta haría
+        que el siguiente que la use lea una instantánea antigua (REPEATABLE
+        READ en MySQL). Si ni siquiera el rollback funciona, se descarta.
+        """
+        conn = self._obtener()
+        cursor = None
+        reutilizable = True
+        try:
+            cursor = conn.cursor()
+            yield conn, cursor
+        finally:
+            if cursor is not None:
+                try:
+                    cursor.close()
+                except Exception:
+                    reutilizable = False
+            try:
+                conn.rollback()
+            except Exception:
+                reutilizable = False
+            if reutilizable:
+                self._devolver(conn)
+            else:
+                self._descartar(conn)
+
+    def cerrar(self):
+        """Cierra todas las conexiones libres; las prestadas se cierran al devolverse"""
+        with self._condicion:
+            self._cerrado = True
+            libres, self._libres = self._libres, []
+            # Quien espera una conexión recibe PoolAgotadoError en vez de esperar en vano
+            self._condicion.notify_all()
+        for conn, _ in libres:
+            self._descartar(conn)
+
+    def estadisticas(self) -> dict:
+        with self._condicion:
+            return {'abiertas': self._abiertas, 'libres': len(self._libres), 'tamano': self.tamano}
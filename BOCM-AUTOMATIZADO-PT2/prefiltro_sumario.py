@@ -0,0 +1,115 @@
+"""
+Prefiltro barato para sumarios del BOCM.
+
+La mayoría de días no hay convenios con código, así que antes de extraer el
+texto completo (lo más caro del análisis) se buscan directamente en los
+content streams de cada página los literales de texto de los operadores
+Tj/TJ. Si ninguno forma un número de 14 dígitos, el sumario no puede tener
+convenios con código y se descarta.
+
+Solo responde "seguro que no" cuando ha podido leer el texto. Ante cualquier
+duda (fuentes CID, cadenas hexadecimales, páginas sin texto, errores) dice
+que puede haber convenios y se hace el análisis completo.
+"""
+
+import re
+import logging
+
+try:
+    import PyPDF2
+except ImportError:
+    PyPDF2 = None
+
+# Operadores de texto: [(..) -250 (..)] TJ  y  (..) Tj
+PATRON_OPERADOR_TEXTO = re.compile(rb'\[((?:[^\]\\]|\\.)*)\]\s*TJ|\(((?:[^()\\]|\\.)*)\)\s*Tj', re.S)
+PATRON_PIEZA_TJ = re.compile(rb'\(((?:[^()\\]|\\.)*)\)|(-?\d*\.?\d+)')
+PATRON_ESCAPE = re.compile(rb'\\([0-7]{1,3}|.)', re.S)
+
+# 14 dígitos, admitiendo un espacio entre ellos por si el PDF los separa
+PATRON_CODIGO = re.compile(rb'\d(?: ?\d){13}')
+
+# Un desplazamiento mayor que este (en milésimas de em) equivale a un espacio
+DESPLAZAMIENTO_ESPACIO = 100
+
+# Por debajo de esta cantidad de texto se asume que el sumario es una imagen
+MIN_BYTES_TEXTO = 200
+
+
+def _desescapar(literal: bytes) -> bytes:
+    def reemplazar(match):
+        escape = match.group(1)
+        if escape[:1].isdigit():
+            return bytes([int(escape, 8) & 0xFF])
+        return escape
+    return PATRON_ESCAPE.sub(reemplazar, literal)
+
+
+def _texto_de_contenido(contenido: bytes) -> bytes:
+    """Concatena los literales de texto de un content stream"""
+    partes = []
+    for match in PATRON_OPERADOR_TEXTO.finditer(contenido):
+        if match.group(1) is not None:
+            for pieza in PATRON_PIEZA_TJ.finditer(match.group(1)):
+                if pieza.group(1) is not None:
+                    partes.append(_desescapar(pieza.group(1)))
+                elif abs(float(pieza.group(2))) > DESPLAZAMIENTO_ESPACIO:
+                    partes.append(b' ')
+        else:
+            partes.append(_desescapar(match.group(2)))
+        partes.append(b' ')
+    return b''.join(partes)
+
+
+def _usa_fuentes_cid(pagina) -> bool:
+    """Las fuentes Type0/Identity codifican glifos, no caracteres legibles"""
+    try:
+        fuentes = pagina['/Resources'].get_object().get('/Font')
+        if not fuentes:
+            return False
+        for fuente in fuentes.get_object().values():
+            fuente = fuente.get_object()
+            if fuente.get('/Subtype') == '/Type0' or str(fuente.get('/Encoding', '')).startswith('/Identity'):
+                return True
+    except Exception:
+        return True
+    return False
+
+
+def puede_contener_convenios(ruta_pdf: str) -> bool:
+    """
+    Devuelve False solo si es seguro que el sumario no contiene ningún
+    código de convenio de 14 dígitos. En cualquier otro caso, True.
+    """
+    if PyPDF2 is None:
+        return True
+
+    try:
+        lector = PyPDF2.PdfReader(ruta_pdf)
+        total_texto = 0
+
+        for pagina in lector.pages:
+            if _usa_fuentes_cid(pagina):
+                return True
+
+            contenido = pagina.get_contents()
+            if contenido is None:
+                continue
+            datos = contenido.get_data()
+
+            # Cadenas hexadecimales <...> dentro de operadores de texto: no legibles
+            if re.search(rb'<[0-9A-Fa-f\s]+>\s*Tj|\[[^\]]*<[0-9A-Fa-f\s]+>[^\]]*\]\s*TJ', datos):
+                return True
+
+            texto = _texto_de_contenido(datos)
+            if PATRON_CODIGO.search(texto):
+                return True
+            total_texto += len(texto)
+
+        if total_texto < MIN_BYTES_TEXTO:
+            return True
+
+        return False
+
+    except Exception as e:
+        logging.debug(f"Prefiltro no concluyente para {ruta_pdf}: {e}")
+        return True
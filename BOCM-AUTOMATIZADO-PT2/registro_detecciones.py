@@ -0,0 +1,123 @@
+# Registro incremental de detecciones por fecha
+
+import os
+import json
+import hashlib
+import logging
+import tempfile
+import threading
+from typing import List, Dict, Optional
+
+from config import REGISTRO_DETECCIONES_FILE
+
+
+def huella_archivo(ruta_archivo: str) -> str:
+    """Calcula la huella SHA-256 del contenido de un archivo"""
+    huella = hashlib.sha256()
+    with open(ruta_archivo, 'rb') as f:
+        for bloque in iter(lambda: f.read(65536), b''):
+            huella.update(bloque)
+    return huella.hexdigest()
+
+
+class RegistroDetecciones:
+    """
+    Guarda, para cada fecha, la huella del sumario y la versión de patrones
+    del detector junto con los convenios detectados. Si ninguna de las dos
+    cambia en una ejecución posterior, se reutiliza el resultado guardado
+    en lugar de volver a analizar el sumario.
+
+    Es un JSON Lines al que cada análisis añade una línea (la última de cada
+    fecha es la que vale): guardar no reescribe el registro entero. Al
+    cargarlo, si sobran líneas de análisis repetidos, se compacta.
+    """
+
+    def __init__(self, ruta_registro: str = REGISTRO_DETECCIONES_FILE):
+        self.ruta_registro = ruta_registro
+        self._lock = threading.Lock()
+        self.entradas = self._cargar()
+
+    def _cargar(self) -> Dict:
+        if not os.path.exists(self.ruta_registro):
+            return {}
+        entradas = {}
+        lineas = 0
+        try:
+            with open(self.ruta_registro, 'r', encoding='utf-8') as f:
+                for linea in f:
+                    lineas += 1
+                    try:
+                        entrada = json.loads(linea)
+                        entradas[entrada.pop('fecha')] = entrada
+                    except (ValueError, KeyError, AttributeError):
+                        # Línea a medias de una ejecución que se cayó: esa fecha se vuelve a analizar
+                        logging.warning(f"Línea ilegible en {self.ruta_registro} - se ignora")
+        except Exception as e:
+            logging.error(f"Error al cargar registro de detecciones: {e}")
+            return {}
+        if lineas > len(entradas):
+            self._compactar(entradas)
+        return entradas
+
+    def _compactar(self, entradas: Dict):
+        # Escritura atómica en un temporal propio: un fallo a mitad no deja el
+        # registro corrupto y dos ejecuciones a la vez no comparten temporal
+        directorio = os.path.dirname(os.path.abspath(self.ruta_registro))
+        temporal = None
+        try:
+            with tempfile.NamedTemporaryFile('w', encoding='utf-8', dir=directorio, suffix='.tmp',
+                                             delete=False) as f:
+                temporal = f.name
+                for fecha, entrada in entradas.items():
+                    f.write(json.dumps({'fecha': fecha, **entrada}, ensure_ascii=False) + '\n')
+            os.replace(temporal, self.ruta_registro)
+        except Exception as e:
+            logging.error(f"Error al compactar registro de detecciones: {e}")
+            if temporal and os.path.exists(temporal):
+                os.remove(temporal)
+
+    def obtener(self, fecha: str, huella_sumario: str, version_patrones: str) -> Optional[List[Dict]]:
+        """
+        Devuelve los convenios guardados para la fecha si la huella del
+        sumario y la versión de patrones coinciden, o None si hay que analizar
+        """
+        entrada = self.entradas.get(fecha)
+        if not entrada:
+            return None
+        if entrada.get('huella_sumario') != huella_sumario:
+            logging.info(f"Sumario de {fecha} republicado - se vuelve a analizar")
+            return None
+        if entrada.get('version_patrones') != version_patrones:
+            logging.info(f"Patrones del detector modificados - se vuelve a analizar {fecha}")
+            return None
+        return entrada.get('convenios', [])
+
+    def guardar(self, fecha: str, huella_sumario: str, version_patrones: str, convenios: List[Dict]):
+        """Registra el resultado del análisis de una fecha y lo añade al registro en disco"""
+        entrada = {
+            'huella_sumario': huella_sumario,
+            'version_patrones': version_patrones,
+            'convenios': convenios
+        }
+        linea = json.dumps({'fecha': fecha, **entrada}, ensure_ascii=False) + '\n'
+        with self._lock:
+            self.entradas[fecha] = entrada
+            try:
+                # Una sola escritura en modo 'a': las líneas de ejecuciones simultáneas no se mezclan
+                with open(self.ruta_registro, 'a', encoding='utf-8') as f:
+                    f.write(linea)
+            except Exception as e:
+                logging.error(f"Error al guardar registro de detecciones: {e}")
+
+
+_registro = None
+_registro_lock = threading.Lock()
+
+
+def obtener_registro() -> RegistroDetecciones:
+    """Registro compartido por todo el proceso: se carga de disco una sola vez"""
+    global _registro
+    with _registro_lock:
+        if _registro is None:
+            _registro = RegistroDetecciones()
+    return _registro
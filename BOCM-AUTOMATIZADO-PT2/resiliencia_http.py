@@ -0,0 +1,232 @@
+"""
+Reintentos y cortacircuitos para las peticiones HTTP del proyecto.
+
+Un error pasajero de bocm.es (timeout, conexión cortada, 429, 5xx) ya no
+se convierte en un convenio perdido: las peticiones idempotentes (GET,
+HEAD...) se repiten hasta HTTP_REINTENTOS veces, esperando un tiempo
+aleatorio entre 0 y HTTP_ESPERA_BASE * 2^intento (como mucho HTTP_ESPERA_MAX)
+para que los hilos que fallaron a la vez no vuelvan a la vez.
+
+Cada endpoint (servidor + dos primeros tramos de la ruta, p. ej.
+www.bocm.es/boletin/CM_Orden_BOCM) tiene su cortacircuitos: tras
+HTTP_CIRCUITO_FALLOS intentos fallidos seguidos se abre y las peticiones a ese
+endpoint fallan al momento con CircuitoAbierto durante HTTP_CIRCUITO_ESPERA
+segundos; después se deja pasar una sola de prueba, que lo cierra si va bien.
+Un 404 es una respuesta normal (la búsqueda del sumario vive de ellos).
+
+Las métricas por endpoint (peticiones, reintentos, fallos, aperturas y
+latencias) se consultan con obtener_resiliencia().metricas().
+"""
+
+import time
+import random
+import logging
+import threading
+from collections import deque
+from typing import Callable, Dict
+from urllib.parse import urlsplit
+
+import requests
+
+from config import (HTTP_REINTENTOS, HTTP_ESPERA_BASE, HTTP_ESPERA_MAX,
+                    HTTP_CIRCUITO_FALLOS, HTTP_CIRCUITO_ESPERA)
+
+METODOS_IDEMPOTENTES = ('GET', 'HEAD', 'OPTIONS', 'PUT', 'DELETE', 'TRACE')
+CODIGOS_REINTENTABLES = (429, 500, 502, 503, 504)
+MUESTRAS_LATENCIA = 1000    # Latencias recientes por endpoint para los percentiles
+
+
+class CircuitoAbierto(requests.ConnectionError):
+    """El endpoint ha fallado demasiadas veces seguidas: no se intenta hasta que pase la espera"""
+    pass
+
+
+def endpoint_de(url: str) -> str:
+    partes = urlsplit(url)
+    tramos = [tramo for tramo in partes.path.split('/') if tramo][:2]
+    return '/'.join([partes.netloc] + tramos)
+
+
+class Cortacircuitos:
+    """Cerrado -> abierto tras 'umbral' fallos seguidos -> semiabierto (una prueba) tras 'espera' segundos"""
+
+    def __init__(self, umbral: int, espera: float, reloj: Callable[[], float] = time.monotonic):
+        self.umbral = umbral
+        self.espera = espera
+        self.reloj = reloj
+        self.fallos = 0
+        self.abierto_desde = None
+        self.probando = False
+        self._lock = threading.Lock()
+
+    @property
+    def estado(self) -> str:
+        if self.abierto_desde is None:
+            return 'cerrado'
+        return 'semiabierto' if self.reloj() - self.abierto_desde >= self.espera else 'abierto'
+
+    def permitir(self) -> bool:
+        with self._lock:
+            estado = self.estado
+            if estado == 'cerrado':
+                return True
+            if estado == 'semiabierto' and not self.probando:
+                self.probando = True
+                return True
+            return False
+
+    def exito(self):
+        with self._lock:
+            self.fallos = 0
+            self.abierto_desde = None
+            self.probando = False
+
+    def cancelar_prueba(self):
+        """La petición de prueba no llegó a decir nada del servidor (error propio): puede salir otra"""
+        with self._lock:
+            self.probando = False
+
+    def fallo(self) -> bool:
+        """Anota un fallo. Devuelve True si con él se abre el circuito."""
+        with self._lock:
+            self.fallos += 1
+            reabierto = self.probando
+            self.probando = False
+            if reabierto or (self.abierto_desde is None and self.fallos >= self.umbral):
+                self.abierto_desde = self.reloj()
+                return True
+            return False
+
+
+class MetricasEndpoint:
+    def __init__(self):
+        self.peticiones = 0
+        self.reintentos = 0
+        self.fallos = 0
+        self.rechazadas = 0     # por circuito abierto
+        self.aperturas = 0
+        self.latencias = deque(maxlen=MUESTRAS_LATENCIA)
+
+    def a_dict(self) -> Dict:
+        latencias = sorted(self.latencias)
+
+        def percentil(p):
+            return round(latencias[min(int(len(latencias) * p), len(latencias) - 1)], 3) if latencias else None
+
+        return {
+            'peticiones': self.peticiones, 'reintentos': self.reintentos, 'fallos': self.fallos,
+            'rechazadas': self.rechazadas, 'aperturas': self.aperturas,
+            'latencia_p50': percentil(0.5), 'latencia_p95': percentil(0.95),
+            'latencia_max': round(latencias[-1], 3) if latencias else None
+        }
+
+
+class Resiliencia:
+    """Aplica reintentos con jitter, cortacircuitos por endpoint y métricas a cada petición"""
+
+    def __init__(self, reintentos: int = HTTP_REINTENTOS, espera_base: float = HTTP_ESPERA_BASE,
+                 espera_max: float = HTTP_ESPERA_MAX, umbral_circuito: int = HTTP_CIRCUITO_FALLOS,
+                 espera_circuito: float = HTTP_CIRCUITO_ESPERA, reloj: Callable[[], float] = time.monotonic,
+                 dormir: Callable[[float], None] = time.sleep, azar: Callable[[float, float], float] = random.uniform):
+        self.reintentos = reintentos
+        self.espera_base = espera_base
+        self.espera_max = espera_max
+        self.umbral_circuito = umbral_circuito
+        self.espera_circuito = espera_circuito
+        self.reloj = reloj
+        self.dormir = dormir
+        self.azar = azar
+        self._circuitos = {}
+        self._metricas = {}
+        self._lock = threading.Lock()
+
+    def _endpoint(self, url: str):
+        endpoint = endpoint_de(url)
+        with self._lock:
+            if endpoint not in self._circuitos:
+                self._circuitos[endpoint] = Cortacircuitos(self.umbral_circuito, self.espera_circuito, self.reloj)
+                self._metricas[endpoint] = MetricasEndpoint()
+            return endpoint, self._circuitos[endpoint], self._metricas[endpoint]
+
+    def _anotar(self, metricas: MetricasEndpoint, **incrementos):
+        with self._lock:
+            for campo, valor in incrementos.items():
+                setattr(metricas, campo, getattr(metricas, campo) + valor)
+
+    def espera(self, intento: int) -> float:
+        """Segundos antes del reintento número 'intento' (desde 0): full jitter exponencial"""
+        return self.azar(0, min(self.espera_max, self.espera_base * 2 ** intento))
+
+    def ejecutar(self, metodo: str, url: str, peticion: Callable[[], requests.Response]) -> requests.Response:
+        """
+        Hace la petición con reintentos si el método es idempotente.
+
+        Devuelve la última respuesta (aunque sea un 503 tras agotar los
+        reintentos) o propaga el último error de conexión o timeout.
+
+        Raises:
+            CircuitoAbierto: si el endpoint tiene el circuito abierto
+        """
+        endpoint, circuito, metricas = self._endpoint(url)
+        intentos = 1 + (self.reintentos if metodo.upper() in METODOS_IDEMPOTENTES else 0)
+
+        for intento in range(intentos):
+            if not circuito.permitir():
+                self._anotar(metricas, rechazadas=1)
+                raise CircuitoAbierto(f"Circuito abierto para {endpoint}: no se pide {url}")
+
+            inicio = self.reloj()
+            error = respuesta = None
+            try:
+                respuesta = peticion()
+            except (requests.Timeout, requests.ConnectionError) as e:
+                error = e
+            except Exception:
+                circuito.cancelar_prueba()
+                raise
+            # Hasta las cabeceras si se sabe (sin la espera de turno del control de tráfico)
+            elapsed = getattr(respuesta, 'elapsed', None)
+            with self._lock:
+                metricas.peticiones += 1
+                metricas.latencias.append(elapsed.total_seconds() if elapsed is not None else self.reloj() - inicio)
+
+            if error is None and respuesta.status_code not in CODIGOS_REINTENTABLES:
+                circuito.exito()
+                return respuesta
+
+            self._anotar(metricas, fallos=1)
+            if circuito.fallo():
+                self._anotar(metricas, aperturas=1)
+                logging.warning(f"Circuito abierto para {endpoint} durante {self.espera_circuito:.0f} s")
+
+            motivo = error or f"HTTP {respuesta.status_code}"
+            if intento + 1 == intentos:
+                logging.warning(f"{metodo} {url} sin éxito tras {intentos} intentos: {motivo}")
+                if error is not None:
+                    raise error
+                return respuesta
+
+            espera = self.espera(intento)
+            logging.info(f"Reintento {intento + 1}/{intentos - 1} de {metodo} {url} en {espera:.1f} s ({motivo})")
+            self._anotar(metricas, reintentos=1)
+            if respuesta is not None:
+                respuesta.close()
+            self.dormir(espera)
+
+    def metricas(self) -> Dict[str, Dict]:
+        with self._lock:
+            return {endpoint: {**metricas.a_dict(), 'circuito': self._circuitos[endpoint].estado}
+                    for endpoint, metricas in self._metricas.items()}
+
+
+_resiliencia = None
+_resiliencia_lock = threading.Lock()
+
+
+def obtener_resiliencia() -> Resiliencia:
+    """Reintentos, cortacircuitos y métricas compartidos por todo el programa"""
+    global _resiliencia
+    with _resiliencia_lock:
+        if _resiliencia is None:
+            _resiliencia = Resiliencia()
+    return _resiliencia
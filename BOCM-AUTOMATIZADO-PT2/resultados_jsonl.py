@@ -0,0 +1,155 @@
+"""
+Resultados de cada ejecución en ficheros JSON Lines, uno por fecha.
+
+Cada convenio procesado se añade como una línea en cuanto sale del
+pipeline, así que un fallo a mitad de ejecución no pierde lo ya hecho y la
+memoria no crece con el número de días:
+
+    with SalidaJSONL() as salida:
+        salida.abrir_fecha("20250524")
+        procesar_convenios("20250524", detalles, al_procesar=salida.escribir)
+        salida.cerrar_fecha()          # resultados/convenios-20250524.jsonl
+
+    for registro in leer_resultados(desde="20250501", hasta="20250531"):
+        ...
+
+Mientras se escribe, la fecha está en '<fichero>.parcial'. Al cerrarla se
+renombra de forma atómica al nombre definitivo (sustituyendo el de una
+ejecución anterior de la misma fecha). El fsync se hace cada
+RESULTADOS_FSYNC_CADA registros y al cerrar, no en cada línea.
+"""
+
+import os
+import re
+import json
+import glob
+import shutil
+import logging
+from typing import Dict, Iterator, Optional
+
+from config import RESULTADOS_DIR, RESULTADOS_FSYNC_CADA
+
+PATRON_FICHERO = re.compile(r'convenios-(\d{8})\.jsonl(\.parcial)?$')
+
+
+def ruta_resultados(fecha: str, directorio: str = RESULTADOS_DIR) -> str:
+    return os.path.join(directorio, f"convenios-{fecha}.jsonl")
+
+
+class SalidaJSONL:
+    """Escribe los convenios procesados en el fichero de su fecha"""
+
+    def __init__(self, directorio: str = RESULTADOS_DIR, fsync_cada: int = RESULTADOS_FSYNC_CADA):
+        self.directorio = directorio
+        self.fsync_cada = fsync_cada
+        self.fecha = None
+        self.escritos = 0
+        self._fichero = None
+        self._sin_fsync = 0
+        os.makedirs(directorio, exist_ok=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, tipo, *exc):
+        if tipo is None:
+            self.cerrar()
+        else:
+            # Con error se deja en disco como '.parcial': no sustituye a un resultado completo
+            self.abandonar_fecha()
+
+    def abrir_fecha(self, fecha: str, continuar: bool = False):
+        """
+        Empieza los resultados de una fecha (cierra la anterior si seguía abierta).
+
+        Con continuar=True se añade a lo que ya hubiera de esa fecha (al
+        reanudar una ejecución); si no, se empieza de cero.
+        """
+        self.cerrar_fecha()
+        self.fecha = fecha
+        ruta = ruta_resultados(fecha, self.directorio)
+        parcial = ruta + '.parcial'
+        if not continuar:
+            self._fichero = open(parcial, 'w', encoding='utf-8')
+            return
+
+        if not os.path.exists(parcial) and os.path.exists(ruta):
+            shutil.copyfile(ruta, parcial)
+        # Una última línea a medias se descarta antes de seguir escribiendo
+        with open(parcial, 'a+b') as f:
+            f.seek(0)
+            contenido = f.read()
+            f.truncate(contenido.rfind(b'\n') + 1)
+        self._fichero = open(parcial, 'a', encoding='utf-8')
+
+    def escribir(self, registro: Dict):
+        """Añade un convenio (se puede pasar como al_procesar de procesar_convenios)"""
+        if self._fichero is None:
+            raise RuntimeError("SalidaJSONL: llama a abrir_fecha() antes de escribir")
+        self._fichero.write(json.dumps(registro, ensure_ascii=False) + '\n')
+        # Al sistema operativo en cada línea (sobrevive a una caída del programa); a disco cada fsync_cada
+        self._fichero.flush()
+        self.escritos += 1
+        self._sin_fsync += 1
+        if self._sin_fsync >= self.fsync_cada:
+            self._sincronizar()
+
+    def _sincronizar(self):
+        self._fichero.flush()
+        os.fsync(self._fichero.fileno())
+        self._sin_fsync = 0
+
+    def cerrar_fecha(self) -> Optional[str]:
+        """Vuelca la fecha abierta a disco y la publica con su nombre definitivo"""
+        if self._fichero is None:
+            return None
+        self._sincronizar()
+        self._fichero.close()
+        self._fichero = None
+
+        ruta = ruta_resultados(self.fecha, self.directorio)
+        os.replace(ruta + '.parcial', ruta)
+        logging.info(f"Resultados del {self.fecha} en {ruta}")
+        return ruta
+
+    def abandonar_fecha(self):
+        """Vuelca a disco lo escrito pero deja la fecha como '.parcial'"""
+        if self._fichero is not None:
+            self._sincronizar()
+            self._fichero.close()
+            self._fichero = None
+
+    def cerrar(self):
+        self.cerrar_fecha()
+
+
+def leer_resultados(directorio: str = RESULTADOS_DIR, desde: Optional[str] = None, hasta: Optional[str] = None,
+                    incluir_parciales: bool = True) -> Iterator[Dict]:
+    """
+    Registros de todas las fechas del intervalo, por orden de fecha.
+
+    Se leen línea a línea. De una fecha sin cerrar (ejecución interrumpida)
+    se devuelve lo que llegó a escribirse, salvo con incluir_parciales=False.
+    Una última línea a medias se ignora.
+    """
+    ficheros = {}
+    for ruta in glob.glob(os.path.join(directorio, 'convenios-*.jsonl*')):
+        match = PATRON_FICHERO.search(os.path.basename(ruta))
+        if not match:
+            continue
+        fecha, parcial = match.group(1), bool(match.group(2))
+        if (desde and fecha < desde) or (hasta and fecha > hasta) or (parcial and not incluir_parciales):
+            continue
+        # Si están los dos, el definitivo es el de la última ejecución completa
+        if parcial and fecha in ficheros:
+            continue
+        ficheros[fecha] = ruta
+
+    for fecha in sorted(ficheros):
+        with open(ficheros[fecha], 'r', encoding='utf-8') as f:
+            for linea in f:
+                if not linea.endswith('\n'):
+                    logging.warning(f"Línea incompleta al final de {ficheros[fecha]}")
+                    break
+                if linea.strip():
+                    yield json.loads(linea)
@@ -0,0 +1,158 @@
+"""
+Extracción de tablas salariales de los PDFs de convenios.
+
+Las tablas del BOCM llegan como texto plano tras extract_text(): un título
+("TABLA SALARIAL AÑO 2025"), una cabecera con los conceptos y una línea por
+categoría terminada en importes con formato español (1.234,56). Cada importe
+se convierte en una fila de tablas_salariales.
+
+    ANEXO I - TABLAS SALARIALES 2025
+    Categoría profesional   Salario base   Plus convenio   Total anual
+    Oficial de primera      1.520,10       95,50           22.618,40
+
+Si la cabecera son años (2024 2025 2026) cada columna es un ejercicio.
+"""
+
+import re
+from decimal import Decimal
+from typing import List, NamedTuple, Optional
+
+PATRON_TITULO = re.compile(r'tablas?\s+salarial(?:es)?|tablas?\s+de\s+retribuciones|retribuciones\s+salariales', re.IGNORECASE)
+PATRON_FIN_TABLA = re.compile(r'^\s*(?:art[íi]culo|cap[íi]tulo|disposici[óo]n|anexo)\b', re.IGNORECASE)
+PATRON_ANIO = re.compile(r'\b(20\d{2})\b')
+PATRON_IMPORTE = re.compile(r'(?<![\d.,])(\d{1,3}(?:\.\d{3})*|\d+),(\d{2})(?![\d,])\s*€?')
+PATRON_LETRA = re.compile(r'[A-Za-zÁÉÍÓÚÑáéíóúñ]')
+
+# Conceptos habituales en las cabeceras; los más largos primero
+CONCEPTOS = sorted([
+    'salario base', 'plus convenio', 'plus de convenio', 'plus transporte', 'plus de transporte',
+    'plus actividad', 'plus de actividad', 'plus de asistencia', 'antigüedad', 'pagas extraordinarias',
+    'paga extraordinaria', 'total anual', 'total mensual', 'salario anual', 'salario mensual',
+    'salario bruto anual', 'salario hora', 'salario día', 'salario diario', 'total',
+], key=len, reverse=True)
+PATRON_CONCEPTO = re.compile('|'.join(re.escape(c) for c in CONCEPTOS), re.IGNORECASE)
+
+# Líneas seguidas sin importes que cierran una tabla ya empezada
+MAX_LINEAS_SIN_IMPORTES = 6
+
+
+class FilaSalarial(NamedTuple):
+    """Un importe de una tabla salarial (una fila de tablas_salariales)"""
+    ejercicio: int
+    categoria_profesional: str
+    concepto_retributivo: str
+    importe: Decimal
+    # Las tablas no suelen indicar desde cuándo rige cada importe: sin fecha en lugar de inventarla
+    fecha_entrada_vigor: Optional[str] = None
+    fecha_fin_vigor: Optional[str] = None
+
+    def a_dict(self) -> dict:
+        """Diccionario serializable a JSON (el importe como texto, sin perder decimales)"""
+        datos = self._asdict()
+        datos['importe'] = str(self.importe)
+        return datos
+
+
+def _importe(entero: str, decimales: str) -> Decimal:
+    return Decimal(f"{entero.replace('.', '')}.{decimales}")
+
+
+def _columnas(cabecera: str):
+    """Conceptos (o ejercicios) de la cabecera, en orden"""
+    conceptos = [c.group(0).capitalize() for c in PATRON_CONCEPTO.finditer(cabecera)]
+    anios = [int(a) for a in PATRON_ANIO.findall(cabecera)]
+    if len(anios) >= 2 and len(conceptos) <= 1:
+        return {'anios': anios, 'concepto': conceptos[0] if conceptos else 'Salario'}
+    return {'conceptos': conceptos}
+
+
+def _partir_fila(linea):
+    """
+    (categoría, importes) si la línea es una fila de tabla: un texto con
+    alguna letra seguido solo de importes; None si no lo es.
+
+    Se recorre la línea una sola vez con PATRON_IMPORTE: una expresión para
+    la fila entera puede tardar un tiempo exponencial en descartar una línea
+    larga llena de números que no acaba en importe.
+    """
+    importes = list(PATRON_IMPORTE.finditer(linea))
+    if not importes or importes[-1].end() != len(linea):
+        return None
+    # Los importes seguidos del final de la línea, separados solo por espacios
+    primero = len(importes) - 1
+    while primero > 0 and not linea[importes[primero - 1].end():importes[primero].start()].strip():
+        primero -= 1
+    categoria = linea[:importes[primero].start()]
+    if not categoria or categoria[-1] not in ' .:€-' or not PATRON_LETRA.search(categoria):
+        return None
+    return categoria.strip(' .:€-')[:200], [_importe(*m.groups()) for m in importes[primero:]]
+
+
+def _filas_de_linea(categoria, importes, columnas, ejercicio):
+    if columnas.get('anios') and len(columnas['anios']) == len(importes):
+        return [(anio, categoria, columnas['concepto'], importe) for anio, importe in zip(columnas['anios'], importes)]
+
+    conceptos = columnas.get('conceptos') or []
+    if len(conceptos) != len(importes):
+        conceptos = ['Importe'] if len(importes) == 1 else [f"Importe {n}" for n in range(1, len(importes) + 1)]
+    return [(ejercicio, categoria, concepto, importe) for concepto, importe in zip(conceptos, importes)]
+
+
+def extraer_tablas_salariales(texto: str, ejercicio_por_defecto: Optional[int] = None) -> List[FilaSalarial]:
+    """
+    Extrae las filas de todas las tablas salariales del texto de un convenio.
+
+    Args:
+        texto: Texto completo del convenio
+        ejercicio_por_defecto: Año a usar si el título de la tabla no lo indica
+                               (normalmente el de publicación)
+
+    Returns:
+        Lista de FilaSalarial; vacía si el convenio no trae tablas
+    """
+    filas = []
+    vistas = set()
+    en_tabla = False
+    ejercicio = ejercicio_por_defecto
+    columnas = {}
+    sin_importes = 0
+    lineas = texto.splitlines()
+
+    for n, linea in enumerate(lineas):
+        linea = ' '.join(linea.split())
+        if not linea:
+            continue
+
+        if PATRON_TITULO.search(linea):
+            en_tabla = True
+            columnas = _columnas(linea)
+            sin_importes = 0
+            # El año suele ir en el título o en la línea siguiente
+            anio = PATRON_ANIO.search(' '.join([linea] + lineas[n + 1:n + 2]))
+            ejercicio = int(anio.group(1)) if anio else ejercicio_por_defecto
+            continue
+
+        if not en_tabla:
+            continue
+
+        fila = _partir_fila(linea)
+        if not fila:
+            sin_importes += 1
+            if PATRON_FIN_TABLA.match(linea) or sin_importes > MAX_LINEAS_SIN_IMPORTES:
+                en_tabla = False
+            elif PATRON_CONCEPTO.search(linea) or len(PATRON_ANIO.findall(linea)) >= 2:
+                columnas = _columnas(linea)
+            continue
+
+        sin_importes = 0
+        if ejercicio is None:
+            continue
+        categoria, importes = fila
+        for anio, categoria, concepto, importe in _filas_de_linea(categoria, importes, columnas, ejercicio):
+            clave = (anio, categoria, concepto)
+            if clave in vistas:
+                continue  # la misma tabla repetida (p. ej. en dos anexos): se queda la primera
+            vistas.add(clave)
+            filas.append(FilaSalarial(anio, categoria, concepto[:200], importe))
+
+    return filas
@@ -0,0 +1,130 @@
+"""
+Benchmark del cliente HTTP compartido contra un servidor local de prueba.
+
+Compara N descargas de un PDF de prueba hechas como antes, con requests.get
+suelto (una conexión nueva por petición), y con ClienteHTTP (conexiones
+reutilizadas). El servidor cuenta las conexiones
+que acepta: cada una de más es un saludo TCP (y, contra https://www.bocm.es,
+además uno TLS) que el cliente compartido se ahorra.
+
+Uso:
+    python test_dias/benchmark_cliente_http.py [peticiones] [hilos]
+"""
+
+import os
+import sys
+import gzip
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+DIRECTORIO_TESTS = os.path.dirname(os.path.abspath(__file__))
+
+# Los módulos del proyecto están en el directorio padre
+sys.path.insert(0, os.path.dirname(DIRECTORIO_TESTS))
+
+import requests
+
+from cliente_http import ClienteHTTP
+from control_trafico import ControlTrafico, LimitadorTokens, ConcurrenciaAdaptativa
+from resiliencia_http import Resiliencia
+
+# Un PDF de texto comprime bien, como los del BOCM
+CONTENIDO_PDF = b"%PDF-1.4\n" + b"BT (Convenio colectivo de la empresa Limpiezas, S.L.) Tj ET\n" * 2000
+
+
+class ServidorPrueba:
+    """Servidor HTTP/1.1 local que sirve CONTENIDO_PDF y cuenta conexiones y bytes enviados"""
+
+    def __init__(self):
+        servidor = self
+
+        class Manejador(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'   # keep-alive
+            # Las cabeceras y el cuerpo salen en dos escrituras: con Nagle y el ACK
+            # retardado del cliente cada petición por una conexión reutilizada
+            # esperaría ~40 ms al segundo paquete (TCP_NODELAY)
+            disable_nagle_algorithm = True
+
+            def setup(self):
+                super().setup()
+                with servidor.lock:
+                    servidor.conexiones += 1
+
+            def do_GET(self):
+                cuerpo = CONTENIDO_PDF
+                comprimido = 'gzip' in self.headers.get('Accept-Encoding', '')
+                if comprimido:
+                    cuerpo = gzip.compress(cuerpo)
+                self.send_response(200)
+                self.send_header('Content-Type', 'application/pdf')
+                if comprimido:
+                    self.send_header('Content-Encoding', 'gzip')
+                self.send_header('Content-Length', str(len(cuerpo)))
+                self.end_headers()
+                self.wfile.write(cuerpo)
+                with servidor.lock:
+                    servidor.peticiones += 1
+                    servidor.bytes_enviados += len(cuerpo)
+
+            def log_message(self, *args):
+                pass
+
+        self.lock = threading.Lock()
+        self.conexiones = self.peticiones = self.bytes_enviados = 0
+        self.httpd = ThreadingHTTPServer(('127.0.0.1', 0), Manejador)
+        self.httpd.daemon_threads = True
+        self.url = f"http://127.0.0.1:{self.httpd.server_address[1]}/boletin/CM_Orden_BOCM/BOCM-20250524-1.PDF"
+
+    def __enter__(self):
+        threading.Thread(target=self.httpd.serve_forever, daemon=True).start()
+        return self
+
+    def __exit__(self, *exc):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def reiniciar_contadores(self):
+        with self.lock:
+            self.conexiones = self.peticiones = self.bytes_enviados = 0
+
+
+def cliente_sin_limites(**opciones) -> ClienteHTTP:
+    """ClienteHTTP con su propio control de tráfico sin límites, para medir solo las conexiones"""
+    control = ControlTrafico(LimitadorTokens(1e6, 1e6), ConcurrenciaAdaptativa(64, 1, 64, 60))
+    return ClienteHTTP(control=control, resiliencia=Resiliencia(), **opciones)
+
+
+def medir(nombre, descargar, servidor, peticiones, hilos):
+    servidor.reiniciar_contadores()
+    inicio = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=hilos) as executor:
+        contenidos = list(executor.map(lambda _: descargar(servidor.url).content, range(peticiones)))
+    segundos = time.perf_counter() - inicio
+    assert all(contenido == CONTENIDO_PDF for contenido in contenidos)
+    return {'nombre': nombre, 'segundos': segundos, 'conexiones': servidor.conexiones,
+            'kb_enviados': servidor.bytes_enviados / 1024}
+
+
+def ejecutar_benchmark(peticiones: int = 200, hilos: int = 8):
+    cliente = cliente_sin_limites()
+    with ServidorPrueba() as servidor:
+        resultados = [
+            medir("requests.get suelto", lambda url: requests.get(url, timeout=10), servidor, peticiones, hilos),
+            medir("ClienteHTTP compartido", cliente.get, servidor, peticiones, hilos),
+        ]
+
+    print(f"📊 {peticiones} descargas con {hilos} hilos contra un servidor local\n")
+    print(f"   {'Cliente':<24} {'Tiempo':>9} {'Conexiones':>11} {'KB enviados':>12}")
+    for r in resultados:
+        print(f"   {r['nombre']:<24} {r['segundos']:>8.2f}s {r['conexiones']:>11} {r['kb_enviados']:>12.0f}")
+    suelto, compartido = resultados
+    print(f"\n🤝 Saludos de conexión ahorrados: {suelto['conexiones'] - compartido['conexiones']} "
+          f"({suelto['conexiones']} -> {compartido['conexiones']})")
+    return resultados
+
+
+if __name__ == "__main__":
+    argumentos = [int(a) for a in sys.argv[1:3]]
+    ejecutar_benchmark(*argumentos)
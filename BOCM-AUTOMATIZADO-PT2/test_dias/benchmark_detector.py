@@ -0,0 +1,284 @@
+"""
+Benchmark offline del detector de patrones de cambio.
+
+Ejecuta DetectorPatronesCambio sobre los sumarios guardados en fixtures/ y
+compara con las detecciones esperadas de corpus_detector.json. Informa de
+precisión/recall por código, de la tasa de falsos negativos del prefiltro
+y de los tiempos de cada etapa (descarga, prefiltro, extracción y detección).
+
+También compara la búsqueda de patrones de cambio por ventanas alrededor de
+cada código con la anterior, que recorría el texto completo una vez por
+patrón, sobre los sumarios del corpus y sobre un sumario largo hecho con
+varias copias de ellos.
+
+Uso:
+    python test_dias/benchmark_detector.py [repeticiones]
+"""
+
+import os
+import re
+import sys
+import json
+import time
+import shutil
+import tempfile
+from typing import Dict, List, Optional
+
+DIRECTORIO_TESTS = os.path.dirname(os.path.abspath(__file__))
+DIRECTORIO_FIXTURES = os.path.join(DIRECTORIO_TESTS, 'fixtures')
+CORPUS_FILE = os.path.join(DIRECTORIO_TESTS, 'corpus_detector.json')
+
+# Los módulos del proyecto están en el directorio padre
+sys.path.insert(0, os.path.dirname(DIRECTORIO_TESTS))
+
+import PyPDF2
+from detector_patrones_cambio import DetectorPatronesCambio, IndicePosicional
+from prefiltro_sumario import puede_contener_convenios
+
+ETAPAS = ('descarga', 'prefiltro', 'extraccion', 'deteccion')
+
+
+def cargar_corpus(ruta_corpus: str = CORPUS_FILE) -> List[Dict]:
+    """Carga los casos etiquetados del corpus"""
+    with open(ruta_corpus, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def nombre_caso(caso: Dict) -> str:
+    """Nombre legible de un caso del corpus"""
+    if caso.get('paginas'):
+        paginas = ','.join(str(p) for p in caso['paginas'])
+        return f"{caso['fecha']} (págs. {paginas})"
+    return caso['fecha']
+
+
+def preparar_sumario(caso: Dict, ruta_destino: str):
+    """
+    Etapa de "descarga" offline: deja el sumario del caso en un archivo
+    temporal, igual que download_sumario_temp. Si el caso indica páginas,
+    solo se copian esas (numeradas desde 1).
+    """
+    ruta_fixture = os.path.join(DIRECTORIO_FIXTURES, caso['fixture'])
+
+    if not caso.get('paginas'):
+        shutil.copyfile(ruta_fixture, ruta_destino)
+        return
+
+    lector = PyPDF2.PdfReader(ruta_fixture)
+    escritor = PyPDF2.PdfWriter()
+    for num_pagina in caso['paginas']:
+        escritor.add_page(lector.pages[num_pagina - 1])
+    with open(ruta_destino, 'wb') as f:
+        escritor.write(f)
+
+
+def ejecutar_caso(detector: DetectorPatronesCambio, caso: Dict) -> Dict:
+    """
+    Ejecuta las etapas sobre un caso y devuelve detecciones y tiempos. La
+    extracción y detección se ejecutan aunque el prefiltro descarte el
+    sumario, para poder medir ambos por separado.
+    """
+    tiempos = {}
+
+    temp_file = tempfile.NamedTemporaryFile(delete=False, suffix='.pdf')
+    ruta_sumario = temp_file.name
+    temp_file.close()
+
+    try:
+        inicio = time.perf_counter()
+        preparar_sumario(caso, ruta_sumario)
+        tiempos['descarga'] = time.perf_counter() - inicio
+
+        inicio = time.perf_counter()
+        descartado = not puede_contener_convenios(ruta_sumario)
+        tiempos['prefiltro'] = time.perf_counter() - inicio
+
+        inicio = time.perf_counter()
+        texto = detector._extraer_texto_pdf(ruta_sumario)
+        tiempos['extraccion'] = time.perf_counter() - inicio
+
+        inicio = time.perf_counter()
+        convenios = detector._detectar_cambios_en_texto(texto, caso['fecha'])
+        tiempos['deteccion'] = time.perf_counter() - inicio
+    finally:
+        os.remove(ruta_sumario)
+
+    detectados = [{'documento': c.documento, 'codigo': c.codigo} for c in convenios]
+    return {'detectados': detectados, 'descartado': descartado, 'tiempos': tiempos}
+
+
+def evaluar(esperados: List[Dict], detectados: List[Dict]) -> Dict:
+    """Cuenta aciertos por código y cuántos aciertos tienen bien el documento"""
+    documento_esperado = {e['codigo']: e['documento'] for e in esperados}
+    codigos_detectados = {d['codigo'] for d in detectados}
+
+    verdaderos_positivos = codigos_detectados & set(documento_esperado)
+    documentos_correctos = sum(
+        1 for d in detectados
+        if documento_esperado.get(d['codigo']) == d['documento']
+    )
+
+    return {
+        'verdaderos_positivos': len(verdaderos_positivos),
+        'falsos_positivos': len(codigos_detectados - set(documento_esperado)),
+        'falsos_negativos': len(set(documento_esperado) - codigos_detectados),
+        'documentos_correctos': documentos_correctos
+    }
+
+
+def ejecutar_benchmark(repeticiones: int = 1, detector: Optional[DetectorPatronesCambio] = None) -> Dict:
+    """
+    Ejecuta el corpus completo y agrega métricas.
+
+    Returns:
+        Diccionario con 'casos' (resultado por caso), 'precision', 'recall',
+        'exactitud_documento', 'prefiltro' (descartes y falsos negativos) y
+        'tiempos' (media por etapa en segundos)
+    """
+    detector = detector or DetectorPatronesCambio()
+    corpus = cargar_corpus()
+
+    casos = []
+    totales = {'verdaderos_positivos': 0, 'falsos_positivos': 0, 'falsos_negativos': 0, 'documentos_correctos': 0}
+    tiempos_totales = {etapa: 0.0 for etapa in ETAPAS}
+    prefiltro = {'descartados': 0, 'falsos_negativos': 0, 'casos_positivos': 0}
+
+    for caso in corpus:
+        for _ in range(repeticiones):
+            resultado = ejecutar_caso(detector, caso)
+            for etapa in ETAPAS:
+                tiempos_totales[etapa] += resultado['tiempos'][etapa]
+
+        metricas = evaluar(caso['esperados'], resultado['detectados'])
+        for clave in totales:
+            totales[clave] += metricas[clave]
+
+        if resultado['descartado']:
+            prefiltro['descartados'] += 1
+        if caso['esperados']:
+            prefiltro['casos_positivos'] += 1
+            if resultado['descartado']:
+                prefiltro['falsos_negativos'] += 1
+
+        casos.append({
+            'caso': nombre_caso(caso),
+            'esperados': caso['esperados'],
+            'detectados': resultado['detectados'],
+            'descartado_prefiltro': resultado['descartado'],
+            'metricas': metricas
+        })
+
+    vp = totales['verdaderos_positivos']
+    detectados_total = vp + totales['falsos_positivos']
+    esperados_total = vp + totales['falsos_negativos']
+    ejecuciones = len(corpus) * repeticiones
+    positivos = prefiltro['casos_positivos']
+    prefiltro['tasa_falsos_negativos'] = prefiltro['falsos_negativos'] / positivos if positivos else 0.0
+
+    return {
+        'casos': casos,
+        'precision': vp / detectados_total if detectados_total else 1.0,
+        'recall': vp / esperados_total if esperados_total else 1.0,
+        'exactitud_documento': totales['documentos_correctos'] / vp if vp else 1.0,
+        'prefiltro': prefiltro,
+        'tiempos': {etapa: tiempos_totales[etapa] / ejecuciones for etapa in ETAPAS}
+    }
+
+
+def buscar_en_texto_completo(detector: DetectorPatronesCambio, texto: str) -> set:
+    """Búsqueda anterior, como referencia: cada patrón recorre el texto completo"""
+    codigos = set()
+    for patron in detector.patrones_cambio_sumario:
+        for match in re.finditer(patron, texto, re.IGNORECASE):
+            codigos.add(match.group(1))
+    return codigos
+
+
+def buscar_en_ventanas(detector: DetectorPatronesCambio, texto: str) -> set:
+    """Búsqueda actual: los patrones solo se prueban en la ventana de cada código del índice"""
+    codigos = set()
+    fin_anterior = 0
+    for pos_codigo in IndicePosicional(texto, detector.palabras_clave_convenio).codigos:
+        match = detector._buscar_patron_cambio(texto, pos_codigo, fin_anterior)
+        fin_anterior = pos_codigo + 14
+        if match:
+            codigos.add(match.group(1))
+    return codigos
+
+
+def comparar_busqueda_patrones(repeticiones: int = 1, copias: int = 20,
+                               detector: Optional[DetectorPatronesCambio] = None) -> List[Dict]:
+    """
+    Tiempo medio de las dos búsquedas de patrones sobre el texto normalizado
+    de todo el corpus y sobre un sumario 'copias' veces más largo.
+
+    Returns:
+        Una entrada por texto con 'texto', 'caracteres', 'codigos',
+        'mismos_codigos' (las dos búsquedas encuentran los mismos),
+        'texto_completo' y 'ventanas' (segundos)
+    """
+    detector = detector or DetectorPatronesCambio()
+    textos = []
+    for caso in cargar_corpus():
+        temp_file = tempfile.NamedTemporaryFile(delete=False, suffix='.pdf')
+        temp_file.close()
+        try:
+            preparar_sumario(caso, temp_file.name)
+            textos.append(re.sub(r'\s+', ' ', detector._extraer_texto_pdf(temp_file.name)))
+        finally:
+            os.remove(temp_file.name)
+    corpus = ' '.join(textos)
+
+    comparacion = []
+    for nombre, texto in (("corpus", corpus), (f"corpus x{copias}", ' '.join([corpus] * copias))):
+        tiempos, codigos = {}, {}
+        for busqueda, buscar in (('texto_completo', buscar_en_texto_completo), ('ventanas', buscar_en_ventanas)):
+            inicio = time.perf_counter()
+            for _ in range(repeticiones):
+                codigos[busqueda] = buscar(detector, texto)
+            tiempos[busqueda] = (time.perf_counter() - inicio) / repeticiones
+        comparacion.append(dict(texto=nombre, caracteres=len(texto), codigos=len(codigos['ventanas']),
+                                mismos_codigos=codigos['ventanas'] == codigos['texto_completo'], **tiempos))
+    return comparacion
+
+
+def imprimir_informe(informe: Dict):
+    """Muestra el informe del benchmark por consola"""
+    print("🧪 BENCHMARK DEL DETECTOR DE PATRONES")
+    print("=" * 60)
+
+    for caso in informe['casos']:
+        metricas = caso['metricas']
+        estado = "✅" if metricas['falsos_positivos'] == 0 and metricas['falsos_negativos'] == 0 else "❌"
+        print(f"\n{estado} {caso['caso']}")
+        print(f"   Esperados: {len(caso['esperados'])} | Detectados: {len(caso['detectados'])}")
+        print(f"   VP: {metricas['verdaderos_positivos']}  FP: {metricas['falsos_positivos']}  "
+              f"FN: {metricas['falsos_negativos']}  Documento correcto: {metricas['documentos_correctos']}")
+        print(f"   Prefiltro: {'descartado' if caso['descartado_prefiltro'] else 'análisis completo'}")
+
+    print("\n" + "-" * 60)
+    print(f"📊 Precisión: {informe['precision']:.2%}")
+    print(f"📊 Recall: {informe['recall']:.2%}")
+    print(f"📊 Exactitud del nº de documento: {informe['exactitud_documento']:.2%}")
+    prefiltro = informe['prefiltro']
+    print(f"📊 Prefiltro: {prefiltro['descartados']}/{len(informe['casos'])} sumarios descartados, "
+          f"falsos negativos {prefiltro['falsos_negativos']} ({prefiltro['tasa_falsos_negativos']:.2%})")
+    print(f"\n⏱️  Tiempo medio por sumario:")
+    for etapa in ETAPAS:
+        print(f"   {etapa:<11} {informe['tiempos'][etapa] * 1000:8.2f} ms")
+
+
+def imprimir_comparacion(comparacion: List[Dict]):
+    """Muestra la comparación de las dos búsquedas de patrones"""
+    print(f"\n🔎 Búsqueda de patrones de cambio:")
+    print(f"   {'Texto':<12} {'Caracteres':>10} {'Códigos':>8} {'Texto completo':>15} {'Ventanas':>10} {'Mejora':>7}")
+    for fila in comparacion:
+        print(f"   {fila['texto']:<12} {fila['caracteres']:>10} {fila['codigos']:>8} "
+              f"{fila['texto_completo'] * 1000:>12.2f} ms {fila['ventanas'] * 1000:>7.2f} ms "
+              f"{fila['texto_completo'] / fila['ventanas']:>6.1f}x")
+
+
+if __name__ == "__main__":
+    repeticiones = int(sys.argv[1]) if len(sys.argv) > 1 else 3
+    imprimir_informe(ejecutar_benchmark(repeticiones))
+    imprimir_comparacion(comparar_busqueda_patrones(repeticiones))
@@ -0,0 +1,130 @@
+import os
+import sys
+import json
+
+import pytest
+
+# Los módulos del proyecto están en el directorio padre
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from almacen_sqlite import AlmacenSQLite
+
+ID_BOCM = 3
+
+
+@pytest.fixture
+def almacen(tmp_path):
+    almacen = AlmacenSQLite(ruta=str(tmp_path / 'convenios.sqlite3'), tamano_pool=2)
+    yield almacen
+    almacen.cerrar()
+
+
+def fila_convenio(almacen, id_convenio):
+    with almacen.conexion() as (conn, cursor):
+        cursor.execute("SELECT codigo_principal, codigos_historicos, id_version_actual FROM convenios WHERE id_convenio = ?", (id_convenio,))
+        codigo, historicos, id_version = cursor.fetchone()
+    return codigo, json.loads(historicos), id_version
+
+
+def test_modo_wal_y_claves_foraneas(almacen):
+    with almacen.conexion() as (conn, cursor):
+        cursor.execute("PRAGMA journal_mode")
+        assert cursor.fetchone()[0] == 'wal'
+        cursor.execute("PRAGMA foreign_keys")
+        assert cursor.fetchone()[0] == 1
+
+
+def test_upsert_guarda_el_codigo_anterior(almacen):
+    id_convenio = almacen.insertar_convenio("Convenio de oficinas", ID_BOCM, "28001412011985")
+    assert almacen.nombre_ya_esta("Convenio de oficinas")
+
+    assert almacen.insertar_convenio("Convenio de oficinas", ID_BOCM, "28001412012025") == id_convenio
+    assert almacen.insertar_convenio("Convenio de oficinas", ID_BOCM, "28001412012025") == id_convenio
+
+    codigo, historicos, _ = fila_convenio(almacen, id_convenio)
+    assert codigo == "28001412012025"
+    assert historicos == ["28001412011985"]
+    assert len(almacen.leer_convenios()) == 1
+
+
+def test_lotes_de_convenios_y_versiones(almacen):
+    convenios = [
+        {'nombre_convenio': f"Convenio {i}", 'id_procedencia': ID_BOCM, 'codigo_principal': f"2800{i:010d}"}
+        for i in range(5)
+    ]
+    ids = almacen.insertar_convenios_lote(convenios, tamano_lote=2)
+    assert len(set(ids)) == 5 and None not in ids
+
+    versiones = [{
+        'id_convenio': id_convenio, 'version_num': 1, 'codigo_publicado': c['codigo_principal'],
+        'fecha_publicacion': '2025-05-24', 'fecha_inicio_vigencia': '2025-01-01', 'fecha_fin_vigencia': None,
+        'etapa_vigencia': 'Vigente', 'resumen': None, 'fuente_pdf': None
+    } for id_convenio, c in zip(ids, convenios)]
+    ids_version = almacen.insertar_convenios_versiones_lote(versiones, tamano_lote=2)
+    assert len(set(ids_version)) == 5 and None not in ids_version
+
+    almacen.actualizar_id_version_actual(ids[0], ids_version[0])
+    assert fila_convenio(almacen, ids[0])[2] == ids_version[0]
+
+
+def test_actualizar_busca_por_nombre_o_codigo(almacen):
+    id_convenio = almacen.insertar_convenio("Convenio de hostelería", ID_BOCM, "28100000000001")
+
+    # Otro nombre, mismo código: se actualiza el convenio existente
+    almacen.trigger_actualizar_convenio("Hostelería de Madrid", ID_BOCM, "28100000000001")
+    almacen.insertar_codigo_historico("28100000000001", "Convenio de hostelería")
+
+    assert fila_convenio(almacen, id_convenio)[1] == ["28100000000001"]
+
+
+def detectado(nombre, codigo, fecha, tipo="Modificación de código"):
+    return {'nombre_convenio': nombre, 'id_procedencia': ID_BOCM, 'codigo_principal': codigo,
+            'fecha_publicacion': fecha, 'tipo_cambio': tipo, 'fichero': f"BOCM-{fecha}-1.PDF"}
+
+
+def test_ingesta_crea_versiones_e_historial(almacen):
+    assert almacen.ingestar_convenios([detectado("Oficinas", "28001412011985", "20230228")]) == \
+        {'versiones': 1, 'historial': 0, 'sin_cambios': 0, 'importes': 0}
+    # Repetir la misma publicación no crea otra versión
+    assert almacen.ingestar_convenios([detectado("Oficinas", "28001412011985", "20230228")])['sin_cambios'] == 1
+
+    # Dos cambios del mismo convenio en el mismo lote se encadenan
+    resumen = almacen.ingestar_convenios([
+        detectado("Oficinas", "28001412012024", "20240115"),
+        detectado("Limpieza", "28100000000002", "20240115"),
+        detectado("Oficinas", "28001412012025", "20250524", tipo="Prórroga/Extensión"),
+    ])
+    assert resumen == {'versiones': 3, 'historial': 2, 'sin_cambios': 0, 'importes': 0}
+
+    id_convenio = almacen.buscar_convenio("Oficinas")
+    codigo, historicos, id_version_actual = fila_convenio(almacen, id_convenio)
+    assert codigo == "28001412012025"
+    assert historicos == ["28001412011985", "28001412012024"]
+
+    with almacen.conexion() as (conn, cursor):
+        cursor.execute("SELECT id_version, version_num, codigo_publicado FROM convenios_versiones WHERE id_convenio = ? ORDER BY version_num", (id_convenio,))
+        versiones = cursor.fetchall()
+        cursor.execute("SELECT id_version_nueva, id_version_antigua, tipo_cambio, diff_json FROM historial_convenios ORDER BY id_historial_conv")
+        historial = cursor.fetchall()
+
+    assert [v[1:] for v in versiones] == [(1, "28001412011985"), (2, "28001412012024"), (3, "28001412012025")]
+    assert id_version_actual == versiones[-1][0]
+    assert [(h[0], h[1], h[2]) for h in historial] == [(versiones[1][0], versiones[0][0], 'Otro'), (versiones[2][0], versiones[1][0], 'Vigencia')]
+    assert json.loads(historial[1][3])['codigo_principal'] == {'antes': "28001412012024", 'despues': "28001412012025"}
+
+
+def test_ingesta_no_depende_del_numero_de_convenios(tmp_path):
+    almacen = AlmacenSQLite(ruta=str(tmp_path / 'convenios.sqlite3'), tamano_pool=1)
+
+    def sentencias(desde, hasta):
+        ejecutadas = []
+        with almacen.conexion() as (conn, cursor):
+            conn.set_trace_callback(ejecutadas.append)
+        almacen.ingestar_convenios([detectado(f"Convenio {i}", f"28{i:012d}", "20250524") for i in range(desde, hasta)])
+        with almacen.conexion() as (conn, cursor):
+            conn.set_trace_callback(None)
+        # executemany se traza una vez por fila: se cuentan sentencias distintas
+        return len({sentencia.split('VALUES')[0] for sentencia in ejecutadas})
+
+    assert sentencias(0, 3) == sentencias(3, 33)
+    almacen.cerrar()
@@ -0,0 +1,60 @@
+import os
+import sys
+
+# Añadir el directorio de tests al path para importar el benchmark
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from benchmark_detector import ejecutar_benchmark, evaluar, comparar_busqueda_patrones
+
+
+def test_detector_sin_perdidas_en_corpus():
+    """El detector debe encontrar exactamente los códigos etiquetados"""
+    informe = ejecutar_benchmark()
+
+    for caso in informe['casos']:
+        metricas = caso['metricas']
+        assert metricas['falsos_negativos'] == 0, f"Convenios perdidos en {caso['caso']}: {caso['detectados']}"
+        assert metricas['falsos_positivos'] == 0, f"Detecciones de más en {caso['caso']}: {caso['detectados']}"
+
+    assert informe['precision'] == 1.0
+    assert informe['recall'] == 1.0
+
+
+def test_detector_asocia_cada_codigo_a_su_documento():
+    """Cada código debe ir con el número BOCM que lo sigue en el sumario"""
+    informe = ejecutar_benchmark()
+
+    assert informe['exactitud_documento'] == 1.0, [c['detectados'] for c in informe['casos']]
+
+
+def test_prefiltro_no_descarta_sumarios_con_convenios():
+    """El prefiltro puede dejar pasar días vacíos, pero nunca descartar uno con convenios"""
+    informe = ejecutar_benchmark()
+
+    assert informe['prefiltro']['falsos_negativos'] == 0
+    for caso in informe['casos']:
+        if not caso['esperados']:
+            assert caso['descartado_prefiltro'], f"El prefiltro no descartó {caso['caso']}"
+
+
+def test_busqueda_por_ventanas_encuentra_los_mismos_codigos():
+    """Buscar solo alrededor de cada código no pierde ninguno de los que encontraba el texto completo"""
+    for fila in comparar_busqueda_patrones(copias=2):
+        assert fila['mismos_codigos'], fila['texto']
+        assert fila['codigos'] == 4
+
+
+def test_evaluar_cuenta_aciertos_y_errores():
+    esperados = [{'documento': '1', 'codigo': '28001412011985'},
+                 {'documento': '2', 'codigo': '28102172012018'}]
+    detectados = [{'documento': '1', 'codigo': '28001412011985'},
+                  {'documento': '9', 'codigo': '28999999999999'}]
+
+    metricas = evaluar(esperados, detectados)
+
+    assert metricas == {
+        'verdaderos_positivos': 1,
+        'falsos_positivos': 1,
+        'falsos_negativos': 1,
+        'documentos_correctos': 1
+    }
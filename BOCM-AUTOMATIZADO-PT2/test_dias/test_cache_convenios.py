@@ -0,0 +1,81 @@
+import os
+import sys
+
+# Los módulos del proyecto están en el directorio padre
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from cache_convenios import CacheConvenios
+
+
+class BaseFalsa:
+    """Tabla convenios en memoria que cuenta las consultas"""
+
+    def __init__(self, filas):
+        self.filas = list(filas)
+        self.cargas = 0
+        self.busquedas = 0
+
+    def cargar(self):
+        self.cargas += 1
+        return list(self.filas)
+
+    def buscar(self, nombre, codigo):
+        self.busquedas += 1
+        for fila in self.filas:
+            if fila[0] == nombre:
+                return fila
+        for fila in self.filas:
+            if fila[1] == codigo:
+                return fila
+        return None
+
+
+FILAS = [("Oficinas", "28001412011985", 1), ("Hostelería", "28100000000001", 2), ("Limpieza", "28100000000002", 3)]
+
+
+def test_completa_responde_sin_consultar():
+    base = BaseFalsa(FILAS)
+    cache = CacheConvenios(base.cargar, base.buscar, tamano_max=10)
+
+    assert cache.buscar("Oficinas") == 1
+    assert cache.buscar("Otro nombre", "28100000000001") == 2
+    assert not cache.existe("No existe")
+    assert base.cargas == 1 and base.busquedas == 0
+
+
+def test_escrituras_del_proceso_la_mantienen_al_dia():
+    base = BaseFalsa(FILAS)
+    cache = CacheConvenios(base.cargar, base.buscar, tamano_max=10)
+    cache.existe("Oficinas")
+
+    cache.registrar("Oficinas", "28001412012025", 1)
+    cache.registrar("Nuevo", "28999999999999", 4)
+
+    assert cache.buscar("Nuevo") == 4
+    assert cache.buscar("x", "28001412012025") == 1
+    assert cache.buscar("x", "28001412011985") is None
+    assert base.busquedas == 0
+
+
+def test_limitada_consulta_los_fallos_a_la_base():
+    base = BaseFalsa(FILAS)
+    cache = CacheConvenios(base.cargar, base.buscar, tamano_max=2)
+
+    assert cache.buscar("Limpieza") == 3
+    assert base.busquedas == 1
+    assert cache.estadisticas()['convenios'] == 2
+
+    assert cache.buscar("Limpieza") == 3
+    assert base.busquedas == 1
+
+
+def test_invalidar_recarga_en_el_siguiente_uso():
+    base = BaseFalsa(FILAS)
+    cache = CacheConvenios(base.cargar, base.buscar, tamano_max=10)
+    assert not cache.existe("De otro proceso")
+
+    base.filas.append(("De otro proceso", "28888888888888", 9))
+    cache.invalidar()
+
+    assert cache.buscar("De otro proceso") == 9
+    assert base.cargas == 2
@@ -0,0 +1,193 @@
+import os
+import sys
+import json
+import functools
+import threading
+
+import pytest
+
+# Los módulos del proyecto están en el directorio padre
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import cli
+from detector_patrones_cambio import ConvenioDetectado
+from pipeline_convenios import procesar_convenios
+from resultados_jsonl import leer_resultados
+from bocm_scraper import BOCMScraper
+from diario_ejecucion import DiarioEjecucion
+from resiliencia_http import CircuitoAbierto
+from test_pipeline_convenios import Respuesta, detectado, pdf_con_texto
+
+
+@pytest.fixture(autouse=True)
+def ficheros_temporales(monkeypatch, tmp_path):
+    # El diario y los resultados de las pruebas no van a los del proyecto
+    monkeypatch.setattr(cli, 'DIARIO_EJECUCION_FILE', str(tmp_path / 'diario.jsonl'))
+    monkeypatch.setattr(cli, 'RESULTADOS_DIR', str(tmp_path / 'resultados'))
+
+
+@pytest.mark.parametrize('argumentos', [
+    ['--date', '2025-05-24'],
+    ['--to', '20250524'],
+    ['--from', '20250525', '--to', '20250524'],
+    ['--date', '20250524', '--yes', '--jobs', '0'],
+])
+def test_argumentos_incorrectos(argumentos):
+    with pytest.raises(SystemExit) as salida:
+        cli.main(argumentos)
+    assert salida.value.code == cli.SALIDA_USO
+
+
+def test_sin_sumario_en_ninguna_fecha(monkeypatch):
+    monkeypatch.setattr(cli, 'download_sumario_temp', lambda fecha, scraper: None)
+    assert cli.main(['--from', '20250524', '--to', '20250525', '--yes']) == cli.SALIDA_SIN_SUMARIO
+
+
+def test_dry_run_jsonl_solo_datos_en_la_salida(monkeypatch, capsys, tmp_path):
+    sumario = tmp_path / 'sumario.pdf'
+    sumario.write_bytes(b'')
+    detalles = [ConvenioDetectado('10', '28001412012025', 'Nuevo', '20250524', 'ECONOMIA', None, 'Convenio', 0, 8)]
+    monkeypatch.setattr(cli, 'download_sumario_temp', lambda fecha, scraper: str(sumario))
+    monkeypatch.setattr(cli, 'procesar_dia_con_detector_inteligente', lambda fecha, ruta: {'detalles': detalles})
+
+    assert cli.main(['--date', '20250524', '--dry-run', '--output', 'jsonl']) == cli.SALIDA_OK
+
+    salida = capsys.readouterr()
+    assert [json.loads(linea)['codigo'] for linea in salida.out.splitlines()] == ['28001412012025']
+    assert 'Convenios con cambios: 1' in salida.err
+    assert not sumario.exists()
+
+
+class Scraper:
+    """Sesión que anota las URLs pedidas; las de 'caidos' devuelven 503"""
+
+    def __init__(self):
+        self.session = self
+        self.pedidas = []
+        self.caidos = set()
+
+    def get(self, url, timeout):
+        self.pedidas.append(url)
+        documento = url.rsplit('-', 1)[1].split('.')[0]
+        if documento in self.caidos:
+            return Respuesta(503)
+        return Respuesta(200, pdf_con_texto([f"Convenio colectivo de la empresa Limpiezas {documento}, S.L."]))
+
+
+def test_resume_solo_repite_lo_pendiente(monkeypatch, tmp_path):
+    scraper = Scraper()
+    sumario = tmp_path / 'sumario.pdf'
+    detalles = [detectado(str(n), f"28{n:012d}") for n in (1, 2, 3)]
+    analisis = []
+
+    def descargar_sumario(fecha, _):
+        sumario.write_bytes(b'')
+        return str(sumario)
+
+    def detectar(fecha, ruta):
+        analisis.append(fecha)
+        return {'detalles': detalles}
+
+    monkeypatch.setattr(cli, 'BOCMScraper', lambda: scraper)
+    monkeypatch.setattr(cli, 'download_sumario_temp', descargar_sumario)
+    monkeypatch.setattr(cli, 'procesar_dia_con_detector_inteligente', detectar)
+    monkeypatch.setattr(cli, 'procesar_convenios',
+                        functools.partial(procesar_convenios, procesos=0, directorio_pdfs=None, persistir=False))
+
+    scraper.caidos = {'2'}
+    assert cli.main(['--date', '20250524', '--yes']) == cli.SALIDA_PARCIAL
+
+    # Al reanudar no se vuelve a analizar el sumario ni a descargar lo ya procesado
+    scraper.caidos, scraper.pedidas = set(), []
+    assert cli.main(['--date', '20250524', '--yes', '--resume']) == cli.SALIDA_OK
+    assert analisis == ['20250524']
+    assert [url.rsplit('-', 1)[1] for url in scraper.pedidas] == ['2.PDF']
+    assert [r['fichero'] for r in leer_resultados(cli.RESULTADOS_DIR)] == \
+        ["BOCM-20250524-1.PDF", "BOCM-20250524-3.PDF", "BOCM-20250524-2.PDF"]
+
+    scraper.pedidas = []
+    assert cli.main(['--date', '20250524', '--yes', '--resume']) == cli.SALIDA_OK
+    assert scraper.pedidas == []
+
+
+def test_resume_json_incluye_las_fechas_ya_completadas(monkeypatch, capsys, tmp_path):
+    sumario = tmp_path / 'sumario.pdf'
+
+    def descargar_sumario(fecha, _):
+        sumario.write_bytes(b'')
+        return str(sumario)
+
+    def detectar(fecha, ruta):
+        return {'detalles': [ConvenioDetectado('1', f"2800000000{fecha[-4:]}", 'Nuevo', fecha, 'ECONOMIA', None,
+                                               'Convenio', 0, 8)]}
+
+    monkeypatch.setattr(cli, 'BOCMScraper', Scraper)
+    monkeypatch.setattr(cli, 'download_sumario_temp', descargar_sumario)
+    monkeypatch.setattr(cli, 'procesar_dia_con_detector_inteligente', detectar)
+    monkeypatch.setattr(cli, 'procesar_convenios',
+                        functools.partial(procesar_convenios, procesos=0, directorio_pdfs=None, persistir=False))
+
+    assert cli.main(['--date', '20250524', '--yes']) == cli.SALIDA_OK
+    capsys.readouterr()
+
+    # El 24 ya está completado: no se repite, pero sus convenios siguen en el JSON
+    assert cli.main(['--from', '20250524', '--to', '20250525', '--yes', '--resume']) == cli.SALIDA_OK
+    salida = capsys.readouterr().out
+    convenios = json.loads(salida.split('=== JSON ===\n')[1].splitlines()[0])
+    assert [c['fichero'] for c in convenios] == ["BOCM-20250524-1.PDF", "BOCM-20250525-1.PDF"]
+    assert "2 convenios procesados en 2/2 días con sumario" in salida
+
+
+class SesionQueSeCorta:
+    """Responde 404 a las primeras 'respuestas' peticiones; después el cortacircuitos está abierto"""
+
+    def __init__(self, respuestas):
+        self.respuestas = respuestas
+        self.lock = threading.Lock()
+
+    def head(self, url, timeout, allow_redirects):
+        with self.lock:
+            self.respuestas -= 1
+            if self.respuestas < 0:
+                raise CircuitoAbierto(f"Cortacircuitos abierto para {url}")
+        return Respuesta(404)
+
+
+def test_circuito_abierto_no_es_un_dia_sin_sumario(monkeypatch, capsys):
+    sesion = SesionQueSeCorta(respuestas=50)
+    monkeypatch.setattr(cli, 'BOCMScraper', lambda: BOCMScraper(cliente=sesion))
+
+    assert cli.main(['--from', '20250526', '--to', '20250527', '--yes']) == cli.SALIDA_PARCIAL
+    salida = capsys.readouterr().out
+    assert "No se encontró sumario" not in salida
+    assert "2 días sin poder consultar el BOCM" in salida
+
+    # El diario no da por buscado el sumario: al reanudar se vuelve a buscar
+    with DiarioEjecucion(cli.DIARIO_EJECUCION_FILE, reanudar=True) as diario:
+        assert diario.estado('20250526')['sumario'] is None
+        assert not diario.completada('20250526')
+
+
+def test_fallo_del_analisis_no_completa_la_fecha(monkeypatch, tmp_path):
+    scraper = Scraper()
+    sumario = tmp_path / 'sumario.pdf'
+    respuestas = [None, {'detalles': [detectado('1', "28000000000001")]}]
+
+    def descargar_sumario(fecha, _):
+        sumario.write_bytes(b'')
+        return str(sumario)
+
+    monkeypatch.setattr(cli, 'BOCMScraper', lambda: scraper)
+    monkeypatch.setattr(cli, 'download_sumario_temp', descargar_sumario)
+    monkeypatch.setattr(cli, 'procesar_dia_con_detector_inteligente', lambda fecha, ruta: respuestas.pop(0))
+    monkeypatch.setattr(cli, 'procesar_convenios',
+                        functools.partial(procesar_convenios, procesos=0, directorio_pdfs=None, persistir=False))
+
+    assert cli.main(['--date', '20250524', '--yes']) == cli.SALIDA_PARCIAL
+    with DiarioEjecucion(cli.DIARIO_EJECUCION_FILE, reanudar=True) as diario:
+        assert diario.detecciones('20250524') is None
+        assert not diario.completada('20250524')
+
+    # Al reanudar se vuelve a analizar el sumario y se procesa el convenio
+    assert cli.main(['--date', '20250524', '--yes', '--resume']) == cli.SALIDA_OK
+    assert [r['fichero'] for r in leer_resultados(cli.RESULTADOS_DIR)] == ["BOCM-20250524-1.PDF"]
@@ -0,0 +1,23 @@
+import os
+import sys
+
+# Los módulos del proyecto están en el directorio padre
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmark_cliente_http import ServidorPrueba, CONTENIDO_PDF, cliente_sin_limites
+
+
+def test_reutiliza_la_conexion_comprime_y_mide():
+    cliente = cliente_sin_limites()
+    mediciones = []
+    cliente.al_medir.append(mediciones.append)
+
+    with ServidorPrueba() as servidor:
+        for _ in range(10):
+            respuesta = cliente.get(servidor.url)
+            assert respuesta.content == CONTENIDO_PDF
+
+    assert (servidor.peticiones, servidor.conexiones) == (10, 1)
+    assert servidor.bytes_enviados < len(CONTENIDO_PDF)     # las 10 respuestas juntas, comprimidas
+    assert [(m.metodo, m.estado) for m in mediciones] == [('GET', 200)] * 10
+    assert all(m.segundos >= m.hasta_cabeceras for m in mediciones)
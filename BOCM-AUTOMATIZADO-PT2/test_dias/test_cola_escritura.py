@@ -0,0 +1,97 @@
+import os
+import sys
+import json
+
+# Los módulos del proyecto están en el directorio padre
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from almacen_sqlite import AlmacenSQLite
+from cola_escritura import ColaEscritura
+
+
+def convenio(i):
+    return {'fichero': f"BOCM-20250524-{i}.PDF", 'nombre_convenio': f"Convenio {i}",
+            'codigo_principal': f"2800{i:010d}", 'id_procedencia': 3}
+
+
+class AlmacenCaido:
+    ERRORES_DE_DATOS = (KeyError,)
+
+    def __init__(self):
+        self.intentos = 0
+
+    def ingestar_convenios(self, convenios):
+        self.intentos += 1
+        raise ConnectionError("Can't connect to MySQL server")
+
+
+def crear_cola(almacen, tmp_path, **kwargs):
+    return ColaEscritura(almacen, intervalo=0.01, ruta_desborde=str(tmp_path / 'pendiente.jsonl'),
+                         ruta_rechazados=str(tmp_path / 'rechazados.jsonl'), **kwargs)
+
+
+def test_guarda_por_lotes_en_segundo_plano(tmp_path):
+    almacen = AlmacenSQLite(ruta=str(tmp_path / 'convenios.sqlite3'))
+    guardados = []
+    with crear_cola(almacen, tmp_path, tamano_lote=4, al_guardar=guardados.extend) as cola:
+        for i in range(10):
+            cola.encolar(convenio(i))
+
+    assert cola.estadisticas() == {'escritos': 10, 'desbordados': 0, 'rechazados': 0, 'pendientes': 0}
+    assert sorted(c['nombre_convenio'] for c in guardados) == sorted(convenio(i)['nombre_convenio'] for i in range(10))
+    assert len(almacen.leer_convenios()) == 10
+    almacen.cerrar()
+
+
+def test_base_caida_vuelca_a_disco_y_se_recupera_despues(tmp_path):
+    caido = AlmacenCaido()
+    with crear_cola(caido, tmp_path, tamano_lote=2, reintentos=1) as cola:
+        for i in range(5):
+            cola.encolar(convenio(i))
+
+    assert cola.desbordados == 5
+    # Tras el primer volcado no se insiste: el resto va directo a disco
+    assert caido.intentos == 2
+    with open(tmp_path / 'pendiente.jsonl', encoding='utf-8') as f:
+        assert len(f.readlines()) == 5
+
+    almacen = AlmacenSQLite(ruta=str(tmp_path / 'convenios.sqlite3'))
+    with crear_cola(almacen, tmp_path) as cola:
+        cola.encolar(convenio(5))
+
+    assert cola.escritos == 6
+    assert len(almacen.leer_convenios()) == 6
+    assert not os.path.exists(tmp_path / 'pendiente.jsonl')
+    almacen.cerrar()
+
+
+def test_aparta_solo_los_convenios_con_datos_invalidos(tmp_path):
+    almacen = AlmacenSQLite(ruta=str(tmp_path / 'convenios.sqlite3'))
+    invalido = dict(convenio(1), id_procedencia=999)  # procedencia inexistente: falla la clave foránea
+
+    with crear_cola(almacen, tmp_path, tamano_lote=3) as cola:
+        for c in (convenio(0), invalido, convenio(2)):
+            cola.encolar(c)
+
+    assert cola.escritos == 2 and cola.rechazados == 1
+    with open(tmp_path / 'rechazados.jsonl', encoding='utf-8') as f:
+        rechazado = json.loads(f.readline())
+    assert rechazado['nombre_convenio'] == "Convenio 1" and 'FOREIGN KEY' in rechazado['error']
+    almacen.cerrar()
+
+
+def test_si_falla_la_recuperacion_conserva_el_desborde_y_sigue_guardando(tmp_path):
+    pendiente = dict(convenio(1), id_procedencia=999)   # la base lo rechaza...
+    with open(tmp_path / 'pendiente.jsonl', 'w', encoding='utf-8') as f:
+        f.write(json.dumps(pendiente) + '\n')
+    os.makedirs(tmp_path / 'rechazados.jsonl')          # ...y no se puede apartar
+
+    almacen = AlmacenSQLite(ruta=str(tmp_path / 'convenios.sqlite3'))
+    with crear_cola(almacen, tmp_path) as cola:
+        cola.encolar(convenio(2))
+
+    assert cola.escritos == 1
+    assert len(almacen.leer_convenios()) == 1
+    with open(tmp_path / 'pendiente.jsonl', encoding='utf-8') as f:
+        assert [json.loads(linea) for linea in f] == [pendiente]
+    almacen.cerrar()
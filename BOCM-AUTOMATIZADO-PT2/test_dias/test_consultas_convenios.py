@@ -0,0 +1,86 @@
+import os
+import sys
+from datetime import date
+
+import pytest
+
+# Los módulos del proyecto están en el directorio padre
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from almacen_sqlite import AlmacenSQLite
+from consultas_convenios import CacheTTL, ConsultasConvenios, SELECT_CONVENIOS
+
+
+def detectado(nombre, codigo, fecha):
+    return {'nombre_convenio': nombre, 'id_procedencia': 3, 'codigo_principal': codigo,
+            'fecha_publicacion': fecha, 'tipo_cambio': 'Nuevo', 'fichero': f"BOCM-{fecha}-1.PDF"}
+
+
+@pytest.fixture
+def almacen(tmp_path):
+    almacen = AlmacenSQLite(ruta=str(tmp_path / 'convenios.sqlite3'), tamano_pool=1)
+    almacen.ingestar_convenios(
+        [detectado(f"Hostelería {i:02d}", f"28{i:012d}", "20240115") for i in range(7)] +
+        [detectado(f"Limpieza {i:02d}", f"28{100 + i:012d}", "20250524") for i in range(3)]
+    )
+    yield almacen
+    almacen.cerrar()
+
+
+def test_paginas_por_clave_sin_repetidos(almacen):
+    consultas = ConsultasConvenios(almacen, cache=CacheTTL(ttl=0))
+
+    pagina = consultas.buscar(prefijo_nombre="Hostelería", limite=3)
+    nombres = [f.nombre_convenio for f in pagina.filas]
+    while pagina.siguiente is not None:
+        pagina = consultas.buscar(prefijo_nombre="Hostelería", limite=3, despues_de=pagina.siguiente)
+        nombres += [f.nombre_convenio for f in pagina.filas]
+
+    assert nombres == [f"Hostelería {i:02d}" for i in range(7)]
+    assert len(list(consultas.recorrer(tamano_pagina=4))) == 10
+    assert consultas.recorrer_versiones(tamano_pagina=3).__next__().version_num == 1
+
+
+def test_filtros_y_filas_con_tipo(almacen):
+    consultas = ConsultasConvenios(almacen, cache=CacheTTL(ttl=0))
+
+    convenio = consultas.por_codigo("28000000000101")
+    assert convenio.nombre_convenio == "Limpieza 01"
+    assert convenio.fecha_publicacion == date(2025, 5, 24)
+    assert consultas.versiones(convenio.id_convenio)[0].codigo_publicado == "28000000000101"
+
+    # Sin fecha de fin, una versión sigue vigente: en 2024 solo estaban los de hostelería
+    vigentes_2024 = list(consultas.recorrer(vigente_desde=date(2024, 6, 1), vigente_hasta=date(2024, 6, 30)))
+    assert {f.nombre_convenio[:10] for f in vigentes_2024} == {"Hostelería"}
+    assert len(list(consultas.recorrer(vigente_desde=date(2025, 6, 1)))) == 10
+    assert list(consultas.recorrer(id_procedencia=999)) == []
+    assert consultas.buscar(prefijo_nombre="Hostelería_").filas == []
+
+
+def test_resultados_caducan_tras_el_ttl(almacen):
+    ahora = [0.0]
+    consultas = ConsultasConvenios(almacen, cache=CacheTTL(ttl=10, reloj=lambda: ahora[0]))
+
+    assert consultas.por_codigo("28000000000001").nombre_convenio == "Hostelería 01"
+    almacen.ingestar_convenios([detectado("Hostelería 01", "28000000000099", "20250601")])
+    assert consultas.por_codigo("28000000000001") is not None  # aún en caché
+    assert consultas.cache.aciertos == 1
+
+    ahora[0] = 11.0
+    assert consultas.por_codigo("28000000000001") is None
+
+
+def test_consultas_usan_indice(almacen):
+    condiciones = [
+        ("c.codigo_principal = ?", ["28000000000001"]),
+        almacen.condicion_prefijo('c.nombre_convenio', "Limp"),
+        ("c.id_convenio > ?", [5]),
+    ]
+    for condicion, params in condiciones:
+        consulta = SELECT_CONVENIOS.format(union='LEFT', condiciones=condicion, limite=10)
+        with almacen.conexion() as (conn, cursor):
+            cursor.execute("EXPLAIN QUERY PLAN " + consulta, params)
+            detalles = [fila[3] for fila in cursor.fetchall()]
+        # SEARCH = búsqueda por índice; SCAN c = recorrido completo de convenios
+        assert any(d.startswith('SEARCH c ') for d in detalles), detalles
+        assert not any(d.startswith('SCAN c') for d in detalles), detalles
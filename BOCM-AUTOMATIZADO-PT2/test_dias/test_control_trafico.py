@@ -0,0 +1,89 @@
+import os
+import sys
+import time
+import threading
+from datetime import timedelta
+
+import pytest
+import requests
+
+# Los módulos del proyecto están en el directorio padre
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from control_trafico import LimitadorTokens, ConcurrenciaAdaptativa, ControlTrafico
+
+
+class Reloj:
+    def __init__(self):
+        self.momento = 0.0
+
+    def __call__(self):
+        return self.momento
+
+    def dormir(self, segundos):
+        self.momento += segundos
+
+
+class Respuesta:
+    def __init__(self, status_code, latencia=0.1, headers=None):
+        self.status_code = status_code
+        self.elapsed = timedelta(seconds=latencia)
+        self.headers = headers or {}
+
+
+def test_token_bucket_respeta_rafaga_ritmo_y_retry_after():
+    reloj = Reloj()
+    limitador = LimitadorTokens(tasa=2, rafaga=3, reloj=reloj, dormir=reloj.dormir)
+
+    assert [limitador.adquirir() for _ in range(3)] == [0, 0, 0]
+    assert limitador.adquirir() == pytest.approx(0.5)
+    limitador.pausar(10)
+    assert limitador.adquirir() == pytest.approx(10)
+
+
+def test_aimd_sube_poco_a_poco_y_baja_a_la_mitad():
+    reloj = Reloj()
+    concurrencia = ConcurrenciaAdaptativa(inicial=4, minimo=1, maximo=50, latencia_objetivo=2.0, reloj=reloj)
+    control = ControlTrafico(LimitadorTokens(1000, 1000, reloj=reloj, dormir=reloj.dormir), concurrencia, reloj=reloj)
+
+    for _ in range(8):
+        control.ejecutar(lambda: Respuesta(404))   # un 404 es una respuesta normal
+    # +1/límite por respuesta: en torno a uno más por cada ronda completa
+    assert 5 < concurrencia.limite < 6
+    antes = concurrencia.limite
+
+    # Varias saturaciones seguidas cuentan como una sola reducción
+    for _ in range(3):
+        control.ejecutar(lambda: Respuesta(503))
+    assert concurrencia.limite == pytest.approx(antes / 2)
+
+    # Un Retry-After detiene todas las peticiones
+    control.ejecutar(lambda: Respuesta(429, headers={'Retry-After': '5'}))
+    assert control.limitador.adquirir() == pytest.approx(5)
+
+    with pytest.raises(requests.Timeout):
+        control.ejecutar(lambda: (_ for _ in ()).throw(requests.Timeout()))
+    assert concurrencia.limite == pytest.approx(antes / 4)
+    assert control.estadisticas()['saturaciones'] == 5
+
+
+def test_no_pasa_del_limite_de_peticiones_simultaneas():
+    concurrencia = ConcurrenciaAdaptativa(inicial=3, minimo=1, maximo=3, latencia_objetivo=2.0)
+    control = ControlTrafico(LimitadorTokens(1000, 1000), concurrencia)
+    simultaneas = []
+    lock = threading.Lock()
+
+    def peticion():
+        with lock:
+            simultaneas.append(concurrencia.en_curso)
+        time.sleep(0.02)
+        return Respuesta(200)
+
+    hilos = [threading.Thread(target=control.ejecutar, args=(peticion,)) for _ in range(12)]
+    for hilo in hilos:
+        hilo.start()
+    for hilo in hilos:
+        hilo.join()
+
+    assert max(simultaneas) == 3
+    assert concurrencia.en_curso == 0
@@ -0,0 +1,47 @@
+import os
+import sys
+import json
+
+import pytest
+
+# Los módulos del proyecto están en el directorio padre
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import diagnosticos
+from detector_patrones_cambio import DetectorPatronesCambio
+
+SUMARIO = (
+    "CONSEJERÍA DE ECONOMÍA, HACIENDA Y EMPLEO\n"
+    "Resolución por la que se dispone la inscripción del convenio colectivo de la empresa "
+    "Limpiezas Sol, S.L. (Código número 28001412012025) BOCM-20250524-10\n"
+)
+
+
+@pytest.fixture(autouse=True)
+def desactivar_al_terminar():
+    yield
+    diagnosticos.desactivar()
+
+
+def test_desactivados_no_hacen_nada():
+    assert not diagnosticos.activos()
+    assert diagnosticos.diagnosticar_sumario('20250524', SUMARIO, []) is None
+
+
+def test_reutilizan_el_texto_extraido_por_el_detector(monkeypatch, tmp_path):
+    ruta = tmp_path / 'diagnosticos.jsonl'
+    diagnosticos.activar(str(ruta), mostrar=False)
+
+    extracciones = []
+    detector = DetectorPatronesCambio(usar_prefiltro=False)
+    monkeypatch.setattr(detector, '_extraer_texto_pdf', lambda ruta_pdf: extracciones.append(ruta_pdf) or SUMARIO)
+
+    detectados = detector.analizar_sumario_dia('sumario.pdf', '20250524')
+
+    assert len(extracciones) == 1
+    [registro] = [json.loads(linea) for linea in ruta.read_text(encoding='utf-8').splitlines()]
+    assert registro['origen'] == 'analisis'
+    assert registro['codigos'] == ['28001412012025']
+    assert registro['menciones_convenio_colectivo'] == 1
+    assert registro['muestra'].startswith('ECONOMÍA')
+    assert [d['documento'] for d in registro['detectados']] == [d.documento for d in detectados] == ['10']
@@ -0,0 +1,149 @@
+import os
+import sys
+import time
+import threading
+
+# Los módulos del proyecto están en el directorio padre
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from detector_patrones_cambio import ConvenioDetectado
+from almacen_sqlite import AlmacenSQLite
+from pipeline_convenios import procesar_convenios
+
+
+def pdf_con_texto(lineas):
+    """PDF mínimo de una página con las líneas indicadas (solo ASCII)"""
+    contenido = "BT /F1 10 Tf 50 750 Td " + " ".join(f"({linea}) Tj 0 -14 Td" for linea in lineas) + " ET"
+    objetos = [
+        "<< /Type /Catalog /Pages 2 0 R >>",
+        "<< /Type /Pages /Kids [3 0 R] /Count 1 >>",
+        "<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] /Contents 4 0 R /Resources << /Font << /F1 5 0 R >> >> >>",
+        f"<< /Length {len(contenido)} >>\nstream\n{contenido}\nendstream",
+        "<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
+    ]
+    pdf, posiciones = "%PDF-1.4\n", []
+    for n, objeto in enumerate(objetos, 1):
+        posiciones.append(len(pdf))
+        pdf += f"{n} 0 obj\n{objeto}\nendobj\n"
+    xref = len(pdf)
+    pdf += f"xref\n0 {len(objetos) + 1}\n0000000000 65535 f \n" + "".join(f"{p:010d} 00000 n \n" for p in posiciones)
+    pdf += f"trailer\n<< /Size {len(objetos) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n"
+    return pdf.encode('latin-1')
+
+
+def detectado(documento, codigo):
+    return ConvenioDetectado(documento, codigo, 'Nuevo', '20250524', 'ECONOMIA', None, 'Convenio', 0, 8)
+
+
+class Respuesta:
+    def __init__(self, status_code, content=b''):
+        self.status_code = status_code
+        self.content = content
+
+
+class SesionLenta:
+    """Cada descarga tarda 'espera' segundos; el documento '2' no existe"""
+
+    def __init__(self, espera):
+        self.espera = espera
+        self.simultaneas = self.maximo = 0
+        self.lock = threading.Lock()
+
+    def get(self, url, timeout):
+        with self.lock:
+            self.simultaneas += 1
+            self.maximo = max(self.maximo, self.simultaneas)
+        time.sleep(self.espera)
+        with self.lock:
+            self.simultaneas -= 1
+        if url.endswith('-2.PDF'):
+            return Respuesta(404)
+        documento = url.rsplit('-', 1)[1].split('.')[0]
+        return Respuesta(200, pdf_con_texto([
+            f"Convenio colectivo de la empresa Limpiezas {documento}, S.L.",
+            "TABLA SALARIAL 2025",
+            "Categoria Salario base",
+            "Oficial de primera 1.520,10",
+        ]))
+
+
+def test_descargas_simultaneas_y_orden_del_sumario(tmp_path):
+    sesion = SesionLenta(espera=0.2)
+    procesados = []
+    detalles = [detectado(str(n), f"28{n:012d}") for n in range(1, 7)]
+
+    resultado = procesar_convenios("20250524", detalles, session=sesion, descargas=6, procesos=2,
+                                   directorio_pdfs=str(tmp_path), persistir=False, al_procesar=procesados.append)
+    # Seis descargas de 0,2 s a la vez, no una detrás de otra
+    assert resultado.segundos < 1.0
+    assert sesion.maximo > 1
+
+    # El documento 2 falla; los demás salen en el orden del sumario
+    assert resultado.fallidos == 1
+    assert [c['fichero'] for c in resultado.convenios] == [f"BOCM-20250524-{n}.PDF" for n in (1, 3, 4, 5, 6)]
+    assert resultado.convenios[0]['nombre_convenio'] == "Limpiezas 1"
+    assert [c['codigo_principal'] for c in procesados] == [c['codigo_principal'] for c in resultado.convenios]
+    assert procesados[0]['tablas_salariales'][0]['importe'] == '1520.10'
+    assert sorted(os.listdir(tmp_path)) == [f"BOCM-20250524-{n}.PDF" for n in (1, 3, 4, 5, 6)]
+
+
+def test_reutiliza_pdfs_descargados_y_guarda_en_la_base(tmp_path):
+    detalles = [detectado(str(n), f"28{n:012d}") for n in (1, 3)]
+    procesar_convenios("20250524", detalles, session=SesionLenta(espera=0), procesos=0,
+                       directorio_pdfs=str(tmp_path / 'pdfs'), persistir=False)
+
+    # Sin red: los PDFs salen del directorio
+    class SinRed:
+        def get(self, url, timeout):
+            raise ConnectionError("sin conexión")
+
+    almacen = AlmacenSQLite(ruta=str(tmp_path / 'convenios.sqlite3'))
+    etapas = []
+    resultado = procesar_convenios("20250524", detalles, session=SinRed(), procesos=0,
+                                   directorio_pdfs=str(tmp_path / 'pdfs'), almacen=almacen,
+                                   al_etapa=lambda detalle, etapa: etapas.append((detalle.documento, etapa)))
+    assert (resultado.fallidos, resultado.escritos) == (0, 2)
+    # 'procesado' llega cuando la cola lo ha guardado en la base
+    assert sorted(e for e in etapas if e[1] == 'procesado') == [('1', 'procesado'), ('3', 'procesado')]
+    assert len(almacen.leer_convenios()) == 2
+    almacen.cerrar()
+
+
+def en_menos_de(segundos, funcion, *args, **kwargs):
+    """Resultado de funcion(); falla en lugar de colgar la prueba si no termina a tiempo"""
+    salida = {}
+    hilo = threading.Thread(target=lambda: salida.update(resultado=funcion(*args, **kwargs)), daemon=True)
+    hilo.start()
+    hilo.join(segundos)
+    assert not hilo.is_alive(), "procesar_convenios se ha quedado bloqueado"
+    return salida['resultado']
+
+
+def test_pdf_guardado_ilegible_se_vuelve_a_descargar(tmp_path):
+    # Un directorio con el nombre del PDF: existe y no está vacío, pero open() falla
+    os.makedirs(tmp_path / "BOCM-20250524-1.PDF" / "x")
+    etapas = []
+    resultado = en_menos_de(10, procesar_convenios, "20250524", [detectado('1', '28000000000001')],
+                            session=SesionLenta(espera=0), procesos=0, directorio_pdfs=str(tmp_path),
+                            persistir=False, al_etapa=lambda detalle, etapa: etapas.append(etapa))
+    # La descarga llega aunque no se pueda guardar encima del directorio
+    assert (resultado.procesados, resultado.fallidos) == (1, 0)
+    assert etapas == ['descargado', 'extraido', 'procesado']
+
+
+def test_un_destino_que_falla_no_bloquea_las_descargas(tmp_path, monkeypatch):
+    monkeypatch.setattr('pipeline_convenios.PIPELINE_COLA_MAX', 1)
+    detalles = [detectado(str(n), f"28{n:012d}") for n in (1, 3, 4, 5, 6)]
+    entregados = []
+
+    def al_procesar(convenio):
+        if convenio['fichero'] == "BOCM-20250524-1.PDF":
+            raise ValueError("disco lleno")
+        entregados.append(convenio['fichero'])
+
+    resultado = en_menos_de(10, procesar_convenios, "20250524", detalles, session=SesionLenta(espera=0),
+                            descargas=5, procesos=0, directorio_pdfs=None, persistir=False,
+                            al_procesar=al_procesar)
+    assert (resultado.procesados, resultado.fallidos) == (4, 1)
+    assert entregados == [f"BOCM-20250524-{n}.PDF" for n in (3, 4, 5, 6)]
+    assert [c['fichero'] for c in resultado.convenios] == entregados
@@ -0,0 +1,83 @@
+import os
+import sys
+
+import pytest
+
+# Los módulos del proyecto están en el directorio padre
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from almacen_mysql import AlmacenMySQL
+from almacen_sqlite import AlmacenSQLite
+
+
+def consultas(almacen):
+    """Consultas calientes con parámetros de ejemplo: las mismas sentencias que ejecuta el almacén"""
+    return {
+        'nombre_ya_esta': (almacen.QUERY_EXISTE_NOMBRE, ('Convenio inexistente',)),
+        'buscar_por_nombre_o_codigo': (almacen.QUERY_BUSCAR_POR_NOMBRE_O_CODIGO, ('Convenio inexistente', '00000000000000')),
+        'ids_convenios': (almacen.QUERY_IDS_CONVENIOS.format(marcadores=almacen.marcadores(2)), ('Convenio A', 'Convenio B')),
+        'ids_versiones': (almacen.QUERY_IDS_VERSIONES.format(marcadores=almacen.marcadores(2)), (1, 2)),
+    }
+
+
+NOMBRES_CONSULTAS = sorted(consultas(AlmacenSQLite))
+
+# Índices de basededatos.txt (y migracion_indices_convenios.txt) que debe usar cada consulta en MySQL
+INDICES_MYSQL = {
+    'nombre_ya_esta': {'uq_convenios_nombre'},
+    'buscar_por_nombre_o_codigo': {'uq_convenios_nombre', 'idx_convenios_codigo'},
+    'ids_convenios': {'uq_convenios_nombre'},
+    'ids_versiones': {'idx_versiones_convenio_num'},
+}
+
+
+@pytest.fixture(scope='module')
+def almacen_mysql():
+    almacen = AlmacenMySQL(tamano_pool=1)
+    try:
+        with almacen.conexion():
+            pass
+    except Exception:
+        pytest.skip("Servidor MySQL no disponible")
+    yield almacen
+    almacen.cerrar()
+
+
+@pytest.fixture(scope='module')
+def almacen_sqlite(tmp_path_factory):
+    almacen = AlmacenSQLite(ruta=str(tmp_path_factory.mktemp('planes') / 'convenios.sqlite3'), tamano_pool=1)
+    yield almacen
+    almacen.cerrar()
+
+
+@pytest.mark.parametrize('nombre', NOMBRES_CONSULTAS)
+def test_consulta_usa_indice_mysql(almacen_mysql, nombre):
+    consulta, params = consultas(almacen_mysql)[nombre]
+    with almacen_mysql.conexion() as (conn, cursor):
+        cursor.execute("EXPLAIN " + consulta, params)
+        columnas = [c[0] for c in cursor.description]
+        filas = [dict(zip(columnas, fila)) for fila in cursor.fetchall()]
+
+    # Las filas sin tabla real (<union1,2>, resultados derivados) no leen datos.
+    # Con la tabla vacía MySQL resuelve la consulta en el plan a partir del
+    # índice único ("no matching row in const table") y tampoco lee datos
+    accesos = [f for f in filas if f['table'] and not f['table'].startswith('<')]
+    resueltas = [f for f in filas if 'no matching row' in str(f.get('Extra') or '')]
+    assert accesos or resueltas
+    for fila in accesos:
+        assert fila['type'] != 'ALL', f"{nombre}: recorrido completo de {fila['table']}"
+        assert fila['key'] in INDICES_MYSQL[nombre], f"{nombre}: {fila['table']} usa {fila['key']}"
+
+
+@pytest.mark.parametrize('nombre', NOMBRES_CONSULTAS)
+def test_consulta_usa_indice_sqlite(almacen_sqlite, nombre):
+    consulta, params = consultas(almacen_sqlite)[nombre]
+    with almacen_sqlite.conexion() as (conn, cursor):
+        cursor.execute("EXPLAIN QUERY PLAN " + consulta, params)
+        detalles = [fila[3] for fila in cursor.fetchall()]
+
+    # SEARCH = búsqueda por índice; SCAN (aunque sea de un índice) = recorrido completo
+    accesos = [d for d in detalles if d.startswith(('SEARCH convenios', 'SCAN convenios'))]
+    assert accesos, detalles
+    for detalle in accesos:
+        assert detalle.startswith('SEARCH'), f"{nombre}: {detalle}"
@@ -0,0 +1,84 @@
+import os
+import sys
+import json
+from datetime import datetime, timedelta
+
+# Los módulos del proyecto están en el directorio padre
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bocm_scraper import ScraperError
+from config import PLANIFICADOR_INTERVALO_MIN, PLANIFICADOR_INTERVALO_MAX
+from planificador import Planificador
+from pipeline_convenios import ResultadoProceso
+
+
+class Reloj:
+    def __init__(self, inicio):
+        self.momento = inicio
+        self.esperas = []
+
+    def ahora(self):
+        return self.momento
+
+    def dormir(self, segundos):
+        self.esperas.append(segundos)
+        self.momento += timedelta(seconds=segundos)
+
+
+class Respuesta:
+    def __init__(self, status_code):
+        self.status_code = status_code
+        self.headers = {}
+
+
+class Scraper:
+    """El sumario 125 aparece a las 08:10; antes todo da 404"""
+
+    def __init__(self, reloj):
+        self.session = self
+        self.reloj = reloj
+        self.sumarios = {}
+        self.pedidas = []
+        self.busquedas_completas = 0
+
+    def head(self, url, timeout, allow_redirects):
+        self.pedidas.append(url)
+        publicado = self.reloj.ahora() >= datetime(2025, 5, 27, 8, 10)
+        return Respuesta(200 if publicado and url.endswith('/12500.PDF') else 404)
+
+    def get_sumario_url(self, fecha):
+        self.busquedas_completas += 1
+        raise ScraperError("sin publicar")
+
+
+def test_sondea_la_url_prevista_y_mide_la_latencia(tmp_path):
+    ruta_estado = tmp_path / 'estado.json'
+    ruta_estado.write_text(json.dumps({'ultimo': {'fecha': '20250526', 'numero': 124},
+                                       'horas_publicacion': ['08:00']}))
+    reloj = Reloj(datetime(2025, 5, 27, 6, 0))
+    scraper = Scraper(reloj)
+    procesadas = []
+
+    def procesar(fecha):
+        procesadas.append(scraper.sumarios[fecha.strftime('%Y%m%d')])
+        return ResultadoProceso([], 2, 0, 2, 0, 0, 1.0)
+
+    planificador = Planificador(scraper, procesar, str(ruta_estado), str(tmp_path / 'metricas.jsonl'),
+                                ahora=reloj.ahora, dormir=reloj.dormir)
+    planificador.vigilar(dias=1)
+
+    # Hasta la hora de inicio no se sondea; lejos de las 08:00 el intervalo crece, cerca es el mínimo
+    assert reloj.esperas[0] == 3600
+    sondeos = reloj.esperas[1:]
+    assert sondeos[:2] == [PLANIFICADOR_INTERVALO_MIN * 2, PLANIFICADOR_INTERVALO_MIN * 4]
+    assert max(sondeos) == PLANIFICADOR_INTERVALO_MAX
+    assert sondeos[-1] == PLANIFICADOR_INTERVALO_MIN
+
+    # Cada sondeo pide solo los boletines 125 y 126, y se procesa con la URL encontrada
+    assert len(scraper.pedidas) <= 2 * (len(sondeos) + 1)
+    assert procesadas == [('https://www.bocm.es/boletin/CM_Boletin_BOCM/2025/05/27/12500.PDF', 125)]
+
+    [metrica] = [json.loads(linea) for linea in (tmp_path / 'metricas.jsonl').read_text().splitlines()]
+    assert metrica['publicado_estimado'] and 0 < metrica['latencia_deteccion'] <= PLANIFICADOR_INTERVALO_MIN
+    assert metrica['convenios'] == 2
+    assert json.loads(ruta_estado.read_text())['ultimo'] == {'fecha': '20250527', 'numero': 125}
@@ -0,0 +1,196 @@
+import os
+import sys
+import sqlite3
+import threading
+
+import pytest
+
+# Los módulos del proyecto están en el directorio padre
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from pool_conexiones import PoolConexiones, PoolAgotadoError
+
+
+class ConexionFalsa:
+    def __init__(self):
+        self.cerrada = False
+        self.viva = True
+        self.rollbacks = 0
+
+    def cursor(self):
+        return CursorFalso()
+
+    def rollback(self):
+        self.rollbacks += 1
+
+    def close(self):
+        self.cerrada = True
+
+
+class CursorFalso:
+    def close(self):
+        pass
+
+
+def crear_pool(**kwargs):
+    creadas = []
+
+    def fabrica():
+        conn = ConexionFalsa()
+        creadas.append(conn)
+        return conn
+
+    return PoolConexiones(fabrica, **kwargs), creadas
+
+
+def test_reutiliza_conexiones():
+    pool, creadas = crear_pool(tamano=2)
+
+    for _ in range(5):
+        with pool.conexion() as (conn, cursor):
+            pass
+
+    assert len(creadas) == 1
+    assert pool.estadisticas() == {'abiertas': 1, 'libres': 1, 'tamano': 2}
+
+
+def test_devuelve_la_conexion_y_hace_rollback_si_hay_error():
+    pool, creadas = crear_pool(tamano=1)
+
+    with pytest.raises(ValueError):
+        with pool.conexion() as (conn, cursor):
+            raise ValueError("fallo en la consulta")
+
+    assert creadas[0].rollbacks == 1
+    with pool.conexion() as (conn, cursor):
+        assert conn is creadas[0]
+
+
+def test_descarta_la_conexion_si_falla_el_rollback_al_devolverla():
+    pool, creadas = crear_pool(tamano=1)
+
+    with pool.conexion():
+        creadas[0].rollback = lambda: (_ for _ in ()).throw(OSError("conexión perdida"))
+
+    assert creadas[0].cerrada
+    assert pool.estadisticas()['abiertas'] == 0
+
+
+class ConexionSinAutocommit:
+    """SQLite con una transacción siempre abierta desde la primera consulta, como mysql-connector"""
+
+    def __init__(self, ruta):
+        self.conn = sqlite3.connect(ruta, isolation_level=None, check_same_thread=False)
+
+    def cursor(self):
+        if not self.conn.in_transaction:
+            self.conn.execute("BEGIN")
+        return self.conn.cursor()
+
+    def commit(self):
+        self.conn.commit()
+
+    def rollback(self):
+        self.conn.rollback()
+
+    def close(self):
+        self.conn.close()
+
+
+def test_no_presta_conexiones_con_una_instantanea_antigua(tmp_path):
+    ruta = str(tmp_path / 'pool.sqlite3')
+    with sqlite3.connect(ruta) as conn:
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("CREATE TABLE convenios (codigo TEXT)")
+    pool = PoolConexiones(lambda: ConexionSinAutocommit(ruta), tamano=2)
+
+    with pool.conexion() as (lectora, cursor):
+        cursor.execute("SELECT COUNT(*) FROM convenios")
+        assert cursor.fetchone() == (0,)
+
+    # Otra conexión del pool guarda un convenio mientras la primera está libre
+    with pool.conexion() as (conn, _):
+        assert conn is lectora
+        with pool.conexion() as (escritora, cursor):
+            cursor.execute("INSERT INTO convenios VALUES ('28001412012025')")
+            escritora.commit()
+
+    with pool.conexion() as (conn, cursor):
+        assert conn is lectora
+        cursor.execute("SELECT COUNT(*) FROM convenios")
+        assert cursor.fetchone() == (1,)
+    pool.cerrar()
+
+
+def test_descarta_conexiones_que_no_responden():
+    pool, creadas = crear_pool(tamano=1, validar=lambda conn: conn.viva, validar_tras=0)
+
+    with pool.conexion() as (conn, cursor):
+        pass
+    creadas[0].viva = False
+
+    with pool.conexion() as (conn, cursor):
+        assert conn is creadas[1]
+
+    assert creadas[0].cerrada
+    assert pool.estadisticas()['abiertas'] == 1
+
+
+def test_no_supera_el_tamano_y_espera_una_conexion_libre():
+    pool, creadas = crear_pool(tamano=1, espera_max=0.05)
+
+    with pool.conexion():
+        with pytest.raises(PoolAgotadoError):
+            with pool.conexion():
+                pass
+
+    liberada = threading.Event()
+
+    def usar_y_liberar():
+        with pool.conexion():
+            liberada.wait(1)
+
+    hilo = threading.Thread(target=usar_y_liberar)
+    hilo.start()
+    pool.espera_max = 2
+    liberada.set()
+    with pool.conexion() as (conn, cursor):
+        assert conn is creadas[0]
+    hilo.join()
+
+    assert len(creadas) == 1
+
+
+def test_cerrar_cierra_las_conexiones_libres():
+    pool, creadas = crear_pool(tamano=2)
+    with pool.conexion():
+        pass
+
+    pool.cerrar()
+
+    assert creadas[0].cerrada
+    with pytest.raises(PoolAgotadoError):
+        with pool.conexion():
+            pass
+
+
+def test_descartar_una_conexion_despierta_a_quien_espera():
+    pool, creadas = crear_pool(tamano=1, espera_max=5)
+    obtenida = []
+
+    def esperar_conexion():
+        with pool.conexion() as (conn, cursor):
+            obtenida.append(conn)
+
+    with pool.conexion() as (conn, cursor):
+        hilo = threading.Thread(target=esperar_conexion)
+        hilo.start()
+        hilo.join(0.1)
+        assert obtenida == []
+        # Falla el rollback: la conexión se descarta en vez de devolverse
+        conn.rollback = lambda: (_ for _ in ()).throw(OSError("conexión perdida"))
+
+    hilo.join(1)
+    assert not hilo.is_alive()
+    assert obtenida == [creadas[1]]
+    assert creadas[0].cerrada
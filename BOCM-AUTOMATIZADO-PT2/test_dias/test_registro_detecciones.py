@@ -0,0 +1,40 @@
+import os
+import sys
+import json
+
+# Los módulos del proyecto están en el directorio padre
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import registro_detecciones
+from registro_detecciones import RegistroDetecciones
+from detector_patrones_cambio import ProcesadorInteligenteBOCM
+
+
+def test_guardar_solo_anade_y_al_cargar_vale_el_ultimo_analisis(tmp_path):
+    ruta = tmp_path / 'registro.jsonl'
+    registro = RegistroDetecciones(str(ruta))
+    registro.guardar('20250524', 'a', '1', [{'codigo': '1'}])
+    registro.guardar('20250526', 'b', '1', [])
+    registro.guardar('20250524', 'c', '1', [{'codigo': '2'}])
+    assert len(ruta.read_text(encoding='utf-8').splitlines()) == 3
+
+    # Una línea a medias de una ejecución caída no invalida el resto
+    with open(ruta, 'a', encoding='utf-8') as f:
+        f.write('{"fecha": "20250527", "huel')
+
+    recargado = RegistroDetecciones(str(ruta))
+    assert recargado.obtener('20250524', 'c', '1') == [{'codigo': '2'}]
+    assert recargado.obtener('20250524', 'a', '1') is None
+    assert recargado.obtener('20250527', 'd', '1') is None
+    # Se compacta: una línea por fecha y ningún temporal suelto
+    assert [json.loads(l)['fecha'] for l in ruta.read_text(encoding='utf-8').splitlines()] == ['20250524', '20250526']
+    assert os.listdir(tmp_path) == ['registro.jsonl']
+
+
+def test_un_solo_registro_por_proceso(monkeypatch):
+    monkeypatch.setattr(registro_detecciones, '_registro', None)
+    cargas = []
+    monkeypatch.setattr(RegistroDetecciones, '_cargar', lambda self: cargas.append(self) or {})
+
+    assert ProcesadorInteligenteBOCM().registro is ProcesadorInteligenteBOCM().registro
+    assert len(cargas) == 1
@@ -0,0 +1,94 @@
+import os
+import sys
+
+import pytest
+import requests
+
+# Los módulos del proyecto están en el directorio padre
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from resiliencia_http import Resiliencia, CircuitoAbierto, endpoint_de
+
+URL_DOCUMENTO = "https://www.bocm.es/boletin/CM_Orden_BOCM/2025/05/24/BOCM-20250524-1.PDF"
+URL_SUMARIO = "https://www.bocm.es/boletin/CM_Boletin_BOCM/2025/05/24/12300.PDF"
+
+
+class Reloj:
+    def __init__(self):
+        self.momento = 0.0
+        self.esperas = []
+
+    def __call__(self):
+        return self.momento
+
+    def dormir(self, segundos):
+        self.esperas.append(segundos)
+        self.momento += segundos
+
+
+class Respuesta:
+    def __init__(self, status_code):
+        self.status_code = status_code
+        self.cerrada = False
+
+    def close(self):
+        self.cerrada = True
+
+
+def servidor(*resultados):
+    """Petición que devuelve (o lanza) los resultados indicados, uno por intento"""
+    pendientes = list(resultados)
+
+    def peticion():
+        resultado = pendientes.pop(0)
+        if isinstance(resultado, Exception):
+            raise resultado
+        return Respuesta(resultado)
+    return peticion
+
+
+def resiliencia(reloj, **opciones):
+    return Resiliencia(**{'reintentos': 3, 'espera_base': 1, 'espera_max': 3, 'umbral_circuito': 3,
+                          'espera_circuito': 60, 'reloj': reloj, 'dormir': reloj.dormir,
+                          'azar': lambda minimo, maximo: maximo, **opciones})
+
+
+def test_reintenta_errores_pasajeros_con_espera_exponencial():
+    reloj = Reloj()
+    http = resiliencia(reloj, umbral_circuito=10)
+
+    respuesta = http.ejecutar('GET', URL_DOCUMENTO, servidor(requests.Timeout(), 503, 200))
+    assert respuesta.status_code == 200
+    assert reloj.esperas == [1, 2]
+
+    # Un 404 no se reintenta; un POST tampoco
+    assert http.ejecutar('HEAD', URL_SUMARIO, servidor(404)).status_code == 404
+    assert http.ejecutar('POST', URL_DOCUMENTO, servidor(503, 200)).status_code == 503
+
+    # Agotados los reintentos se devuelve la última respuesta; la espera no pasa de espera_max
+    reloj.esperas = []
+    assert http.ejecutar('GET', URL_DOCUMENTO, servidor(502, 502, 502, 502)).status_code == 502
+    assert reloj.esperas == [1, 2, 3]
+
+    metricas = http.metricas()[endpoint_de(URL_DOCUMENTO)]
+    assert (metricas['peticiones'], metricas['reintentos'], metricas['fallos']) == (8, 5, 7)
+
+
+def test_cortacircuitos_por_endpoint():
+    reloj = Reloj()
+    http = resiliencia(reloj, reintentos=0)
+
+    for _ in range(3):
+        with pytest.raises(requests.ConnectionError):
+            http.ejecutar('GET', URL_DOCUMENTO, servidor(requests.ConnectionError()))
+
+    # Abierto: falla sin llamar al servidor; otros endpoints siguen funcionando
+    with pytest.raises(CircuitoAbierto):
+        http.ejecutar('GET', URL_DOCUMENTO, servidor())
+    assert http.ejecutar('HEAD', URL_SUMARIO, servidor(404)).status_code == 404
+
+    # Pasada la espera, una prueba buena lo cierra
+    reloj.dormir(60)
+    assert http.ejecutar('GET', URL_DOCUMENTO, servidor(200)).status_code == 200
+    metricas = http.metricas()[endpoint_de(URL_DOCUMENTO)]
+    assert (metricas['circuito'], metricas['aperturas'], metricas['rechazadas']) == ('cerrado', 1, 1)
@@ -0,0 +1,43 @@
+import os
+import sys
+
+import pytest
+
+# Los módulos del proyecto están en el directorio padre
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from resultados_jsonl import SalidaJSONL, leer_resultados, ruta_resultados
+
+
+def convenio(fecha, n):
+    return {'fichero': f"BOCM-{fecha}-{n}.PDF", 'codigo_principal': f"28{n:012d}"}
+
+
+def test_fechas_cerradas_e_interrumpidas(tmp_path):
+    directorio = str(tmp_path)
+    with SalidaJSONL(directorio, fsync_cada=2) as salida:
+        salida.abrir_fecha("20250524")
+        for n in range(3):
+            salida.escribir(convenio("20250524", n))
+        # Mientras se escribe, la fecha no tiene aún su nombre definitivo
+        assert not os.path.exists(ruta_resultados("20250524", directorio))
+        salida.cerrar_fecha()
+
+    with pytest.raises(ConnectionError):
+        with SalidaJSONL(directorio) as salida:
+            salida.abrir_fecha("20250523")
+            salida.escribir(convenio("20250523", 7))
+            raise ConnectionError("caída a mitad de la fecha")
+
+    assert os.path.exists(ruta_resultados("20250523", directorio) + '.parcial')
+    assert [r['fichero'] for r in leer_resultados(directorio)] == \
+        ["BOCM-20250523-7.PDF"] + [f"BOCM-20250524-{n}.PDF" for n in range(3)]
+    assert len(list(leer_resultados(directorio, incluir_parciales=False))) == 3
+    assert len(list(leer_resultados(directorio, desde="20250524", hasta="20250524"))) == 3
+
+
+def test_ignora_la_ultima_linea_a_medias(tmp_path):
+    with open(ruta_resultados("20250524", str(tmp_path)) + '.parcial', 'w', encoding='utf-8') as f:
+        f.write('{"fichero": "BOCM-20250524-1.PDF"}\n{"fichero": "BOCM-2025')
+
+    assert [r['fichero'] for r in leer_resultados(str(tmp_path))] == ["BOCM-20250524-1.PDF"]
@@ -0,0 +1,93 @@
+import os
+import sys
+import time
+from decimal import Decimal
+
+# Los módulos del proyecto están en el directorio padre
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from almacen_sqlite import AlmacenSQLite
+from tablas_salariales import extraer_tablas_salariales
+
+# Texto como el que devuelve extract_text() en los anexos de un convenio
+CONVENIO_2024 = """
+Artículo 25. Retribuciones
+Las retribuciones para 2024 serán las del anexo I, con un incremento del 3,00 por 100.
+ANEXO I
+TABLA SALARIAL AÑO 2024
+Categoría profesional Salario base Plus convenio
+Grupo I
+Jefe de administración 1.800,00 120,00
+Oficial de primera 1.500,00 € 95,50 €
+Artículo 26. Dietas
+La dieta completa será de 45,00 euros.
+"""
+
+CONVENIO_2025 = """
+ANEXO I
+TABLA SALARIAL AÑO 2025
+Categoría profesional Salario base Plus convenio
+Jefe de administración 1.850,45 120,00
+Oficial de primera 1.545,00 95,50
+Auxiliar administrativo 1.210,00 80,25
+ANEXO II
+TABLAS SALARIALES
+Categoría 2025 2026
+Peón 1.133,00 1.166,99
+"""
+
+
+def test_extrae_conceptos_de_la_cabecera_y_anios_por_columna():
+    filas = extraer_tablas_salariales(CONVENIO_2025)
+
+    assert len(filas) == 8
+    assert filas[0][:4] == (2025, "Jefe de administración", "Salario base", Decimal("1850.45"))
+    assert filas[5][:4] == (2025, "Auxiliar administrativo", "Plus convenio", Decimal("80.25"))
+    assert [(f.ejercicio, f.concepto_retributivo, f.importe) for f in filas[6:]] == \
+        [(2025, "Salario", Decimal("1133.00")), (2026, "Salario", Decimal("1166.99"))]
+
+
+def test_ignora_importes_fuera_de_las_tablas():
+    filas = extraer_tablas_salariales(CONVENIO_2024)
+
+    assert {f.categoria_profesional for f in filas} == {"Jefe de administración", "Oficial de primera"}
+    assert all(f.ejercicio == 2024 for f in filas)
+
+
+def test_descarta_pronto_las_lineas_largas_que_no_son_filas():
+    # Muchos importes seguidos de texto: una expresión con repeticiones anidadas tardaría minutos
+    texto = "TABLA SALARIAL 2025\nOficial " + "1,23 " * 200 + "x\nPeón 1.133,00 €"
+    inicio = time.perf_counter()
+    filas = extraer_tablas_salariales(texto)
+    assert time.perf_counter() - inicio < 0.5
+    assert [(f.categoria_profesional, f.importe) for f in filas] == [("Peón", Decimal("1133.00"))]
+
+
+def test_ingesta_carga_las_tablas_y_calcula_las_diferencias_en_sql(tmp_path):
+    almacen = AlmacenSQLite(ruta=str(tmp_path / 'convenios.sqlite3'))
+
+    def convenio(codigo, fecha, texto):
+        return {'nombre_convenio': "Oficinas", 'id_procedencia': 3, 'codigo_principal': codigo,
+                'fecha_publicacion': fecha, 'fichero': f"BOCM-{fecha}-1.PDF",
+                'tablas_salariales': [f.a_dict() for f in extraer_tablas_salariales(texto)]}
+
+    almacen.ingestar_convenios([convenio("28001412012024", "20240115", CONVENIO_2024)])
+    resumen = almacen.ingestar_convenios([convenio("28001412012025", "20250524", CONVENIO_2025)])
+    assert resumen['importes'] == 8
+
+    with almacen.conexion() as (conn, cursor):
+        cursor.execute("""
+            SELECT categoria_profesional, concepto_retributivo, importe_antiguo, importe_nuevo, diferencia
+            FROM historial_tablas_salariales ORDER BY categoria_profesional
+        """)
+        diferencias = cursor.fetchall()
+
+    # Solo cambian los salarios base (los pluses siguen igual y Auxiliar es nueva)
+    assert [(d[0], d[1]) for d in diferencias] == [("Jefe de administración", "Salario base"), ("Oficial de primera", "Salario base")]
+    assert [round(d[4], 2) for d in diferencias] == [50.45, 45.0]
+
+    # Las tablas no dicen desde cuándo rige cada importe: no se inventa la fecha
+    with almacen.conexion() as (conn, cursor):
+        cursor.execute("SELECT DISTINCT fecha_entrada_vigor, fecha_fin_vigor FROM tablas_salariales")
+        assert cursor.fetchall() == [(None, None)]
+    almacen.cerrar()